@@ -8,72 +8,131 @@ if sys.stderr.encoding != 'utf-8':
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from flask_socketio import SocketIO
 import json
 import os
 import uuid # For generating unique task IDs
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from analytics_api import analytics_api
+from task_queue import TaskQueue
+from gremlin import queue_hashtag_update
+from config_store import add_hashtags, find_hashtag, remove_hashtags
+
 app = Flask(__name__)
 CORS(app) # Enable CORS for all routes
+socketio = SocketIO(app, cors_allowed_origins='*')
+app.register_blueprint(analytics_api)
 
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
-GREMLIN_INSTRUCTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gremlin_instructions.json')
+task_queue = TaskQueue()
 
-def add_gremlin_task(task_id, command):
-    try:
-        instructions = []
-        if os.path.exists(GREMLIN_INSTRUCTIONS_FILE):
-            with open(GREMLIN_INSTRUCTIONS_FILE, 'r', encoding='utf-8') as f:
-                try:
-                    instructions = json.load(f)
-                except json.JSONDecodeError:
-                    instructions = [] # File is empty or corrupted, start fresh
-        
-        instructions.append({'task_id': task_id, 'command': command})
-        
-        with open(GREMLIN_INSTRUCTIONS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(instructions, f, indent=2, ensure_ascii=False)
-        print(f"[API_SERVER] Added task {task_id} to Gremlin instructions.")
-    except Exception as e:
-        print(f"[API_SERVER] Error adding task to Gremlin instructions: {e}")
+def queue_updates(hashtags):
+    """Queues a Gremlin data update for each hashtag and returns {hashtag: task_id}."""
+    task_ids = {}
+    for hashtag in hashtags:
+        task_ids[hashtag] = queue_hashtag_update(task_queue, hashtag, task_id=str(uuid.uuid4()))
+        print(f"[API_SERVER] Queued data update task {task_ids[hashtag]} for {hashtag}.")
+    return task_ids
+
+def requested_hashtags(data):
+    """The non-empty hashtags of a {'hashtags': [...]} request body, or None if it is malformed."""
+    hashtags = data.get('hashtags')
+    if not isinstance(hashtags, list) or not all(isinstance(hashtag, str) for hashtag in hashtags):
+        return None
+    return [hashtag.strip() for hashtag in hashtags if hashtag.strip()]
+
+def config_error(e):
+    if isinstance(e, FileNotFoundError):
+        return jsonify({'status': 'error', 'message': f'Config file not found at {CONFIG_FILE}'}), 500
+    if isinstance(e, json.JSONDecodeError):
+        return jsonify({'status': 'error', 'message': f'Error decoding JSON from {CONFIG_FILE}'}), 500
+    return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/add_hashtag', methods=['POST'])
 def add_hashtag():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     new_hashtag = data.get('hashtag')
 
     if not new_hashtag:
         return jsonify({'status': 'error', 'message': 'No hashtag provided'}), 400
 
+    # Cheap check against the cached config before taking the file lock.
+    if find_hashtag(new_hashtag, CONFIG_FILE):
+        return jsonify({'status': 'info', 'message': f'Hashtag "{new_hashtag}" already exists.'}), 200
     try:
-        with open(CONFIG_FILE, 'r+', encoding='utf-8') as f:
-            config = json.load(f)
-            hashtags = config.get('hashtags', [])
-            
-            # Add only if not already present (case-insensitive)
-            if new_hashtag.lower() not in [h.lower() for h in hashtags]:
-                hashtags.append(new_hashtag)
-                config['hashtags'] = hashtags
-                f.seek(0)  # Rewind to the beginning of the file
-                json.dump(config, f, indent=2, ensure_ascii=False)
-                f.truncate() # Truncate any remaining old content
-
-                # Add a task for Gremlin to update social data for the new hashtag
-                task_id = str(uuid.uuid4())
-                update_command = f"{sys.executable} {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts', 'update_social_data.py')} --hashtag \"{new_hashtag}\"")
-                add_gremlin_task(task_id, update_command)
-
-                return jsonify({'status': 'success', 'message': f'Hashtag "{new_hashtag}" added and data update queued.'}), 200
-            else:
-                return jsonify({'status': 'info', 'message': f'Hashtag "{new_hashtag}" already exists.'}), 200
-
-    except FileNotFoundError:
-        return jsonify({'status': 'error', 'message': f'Config file not found at {CONFIG_FILE}'}), 500
-    except json.JSONDecodeError:
-        return jsonify({'status': 'error', 'message': f'Error decoding JSON from {CONFIG_FILE}'}), 500
+        added, _ = add_hashtags([new_hashtag], CONFIG_FILE)
     except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+        return config_error(e)
+    if not added:
+        return jsonify({'status': 'info', 'message': f'Hashtag "{new_hashtag}" already exists.'}), 200
+
+    # Add a task for Gremlin to update social data for the new hashtag
+    task_ids = queue_updates(added)
+    return jsonify({'status': 'success', 'message': f'Hashtag "{new_hashtag}" added and data update queued.', 'task_id': task_ids[new_hashtag]}), 200
+
+@app.route('/add_hashtags', methods=['POST'])
+def add_hashtags_bulk():
+    """Adds several hashtags with one config write and queues one data update task per new hashtag."""
+    hashtags = requested_hashtags(request.get_json(silent=True) or {})
+    if not hashtags:
+        return jsonify({'status': 'error', 'message': 'Expected a non-empty list of hashtags'}), 400
+    try:
+        added, existing = add_hashtags(hashtags, CONFIG_FILE)
+    except Exception as e:
+        return config_error(e)
+    task_ids = queue_updates(added)
+    return jsonify({
+        'status': 'success' if added else 'info',
+        'message': f'{len(added)} hashtags added and data updates queued; {len(existing)} already existed.',
+        'added': added,
+        'existing': existing,
+        'task_ids': task_ids,
+    }), 200
+
+@app.route('/remove_hashtags', methods=['POST'])
+def remove_hashtags_bulk():
+    """Removes several hashtags from config.json with one write. Their collected data is kept."""
+    hashtags = requested_hashtags(request.get_json(silent=True) or {})
+    if not hashtags:
+        return jsonify({'status': 'error', 'message': 'Expected a non-empty list of hashtags'}), 400
+    try:
+        removed, missing = remove_hashtags(hashtags, CONFIG_FILE)
+    except Exception as e:
+        return config_error(e)
+    return jsonify({
+        'status': 'success' if removed else 'info',
+        'message': f'{len(removed)} hashtags removed; {len(missing)} were not configured.',
+        'removed': removed,
+        'missing': missing,
+    }), 200
+
+@app.route('/tasks/<task_id>', methods=['GET'])
+def task_status(task_id):
+    """A queued task's state ('queued' or 'running') and its recorded attempts, or the final status once it has finished."""
+    task = task_queue.task(task_id)
+    results = task_queue.results(task_id)
+    if task is None and not results:
+        return jsonify({'status': 'error', 'message': f'Unknown task: {task_id}'}), 404
+    return jsonify({
+        'task_id': task_id,
+        'state': task['status'] if task else results[0]['status'],
+        'attempts': results,
+    }), 200
+
+@app.route('/data_updated', methods=['POST'])
+def data_updated():
+    """Relays per-hashtag updates from make-html.py --watch to every open report page."""
+    data = request.get_json(silent=True) or {}
+    updates = data.get('updates')
+    if not isinstance(updates, list):
+        return jsonify({'status': 'error', 'message': 'Expected a list of updates'}), 400
+    for update in updates:
+        socketio.emit('data_updated', update)
+    print(f"[API_SERVER] Pushed data_updated for {len(updates)} hashtags.")
+    return jsonify({'status': 'success', 'pushed': len(updates)}), 200
 
 if __name__ == '__main__':
     print("Starting Flask server for LearnGraph...")
     print(f"Config file path: {CONFIG_FILE}")
-    app.run(port=5000, debug=True)
\ No newline at end of file
+    socketio.run(app, port=5000, debug=True)
\ No newline at end of file
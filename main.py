@@ -16,6 +16,16 @@ def main():
         "--hashtag",
         help="Process only a specific hashtag when updating data."
     )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        help="Reuse cached scraper responses up to this many seconds old when updating data."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the scraper response cache when updating data."
+    )
     args = parser.parse_args()
 
     project_root = os.path.dirname(os.path.abspath(__file__))
@@ -29,6 +39,10 @@ def main():
         command.append('--update-data')
         if args.hashtag:
             command.extend(['--hashtag', args.hashtag])
+        if args.max_age is not None:
+            command.extend(['--max-age', str(args.max_age)])
+        if args.no_cache:
+            command.append('--no-cache')
     
     try:
         process = subprocess.run(command, check=True, capture_output=True, text=True)
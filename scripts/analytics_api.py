@@ -0,0 +1,228 @@
+"""
+Read-only JSON analytics API, registered on api_server.py's Flask app.
+
+  GET /hashtags                          every configured hashtag with its hotness and subreddit status
+  GET /hashtags/<tag>/daily              daily Bluesky post counts
+  GET /hashtags/<tag>/top-posters        top authors by posts and by engagement
+  GET /hashtags/<tag>/posts?limit=&cursor=   stored posts, newest first, cursor-paginated
+  GET /youtube                           YouTubeAnalytics.csv rows
+  GET /reddit                            RedditAnalytics.csv rows
+
+Responses are built from config.json and the exported CSVs (posts come from
+social.db) and kept in memory, keyed on the source files' (mtime, size), so
+a response is only rebuilt after the files behind it change. Every response
+carries an ETag and Last-Modified and answers conditional requests with 304,
+and bodies over GZIP_MIN_BYTES are gzipped for clients that accept it.
+"""
+
+import os
+import gzip
+import json
+import base64
+import hashlib
+import threading
+from email.utils import formatdate
+
+from flask import Blueprint, Response, abort, jsonify, request
+
+from config_store import find_hashtag
+from report_data import (
+    file_signature,
+    format_hashtag_for_display,
+    hotness_levels,
+    read_bluesky_analytics,
+    read_config,
+    read_csv_rows,
+)
+from storage import SocialDataStore
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.join(SCRIPT_DIR, '..')
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'config.json')
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+BLUESKY_CSV = os.path.join(DATA_DIR, 'BlueskyAnalytics.csv')
+YOUTUBE_CSV = os.path.join(DATA_DIR, 'YouTubeAnalytics.csv')
+REDDIT_CSV = os.path.join(DATA_DIR, 'RedditAnalytics.csv')
+DB_PATH = os.path.join(DATA_DIR, 'social.db')
+
+GZIP_MIN_BYTES = 1024
+# Post pages are cached per cursor; past this many cached responses the cache starts over.
+MAX_CACHED_RESPONSES = 1024
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+analytics_api = Blueprint('analytics_api', __name__)
+
+_responses = {}
+_responses_lock = threading.Lock()
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SocialDataStore(DB_PATH)
+        return _store
+
+class CachedBody:
+    """One serialized response: the JSON body, its gzipped form, ETag and Last-Modified."""
+
+    def __init__(self, data, mtime):
+        self.body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.last_modified = mtime
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+def _signature(paths):
+    return tuple(file_signature(path) for path in paths)
+
+def cached_json(cache_key, paths, build):
+    """Returns the CachedBody for cache_key, calling build() only if a file in paths changed since it was built."""
+    signature = _signature(paths)
+    with _responses_lock:
+        cached = _responses.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    mtimes = [sig[0] / 1e9 for sig in signature if sig]
+    body = CachedBody(build(), max(mtimes) if mtimes else None)
+    with _responses_lock:
+        if len(_responses) >= MAX_CACHED_RESPONSES:
+            _responses.clear()
+        _responses[cache_key] = (signature, body)
+    return body
+
+def json_response(cached):
+    """Serves a CachedBody with validators, 304 handling and optional gzip."""
+    use_gzip = len(cached.body) >= GZIP_MIN_BYTES and 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+    # Each encoding is a different representation, so it gets its own ETag.
+    etag = cached.etag + ('-gz' if use_gzip else '')
+    response = Response(cached.gzipped() if use_gzip else cached.body, mimetype='application/json')
+    response.set_etag(etag)
+    if cached.last_modified is not None:
+        response.headers['Last-Modified'] = formatdate(cached.last_modified, usegmt=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response.make_conditional(request)
+
+@analytics_api.errorhandler(400)
+@analytics_api.errorhandler(404)
+def json_error(error):
+    return jsonify({'status': 'error', 'message': error.description}), error.code
+
+def resolve_hashtag(tag):
+    """Returns the configured spelling of tag (case-insensitive), or aborts with 404."""
+    hashtag = find_hashtag(tag, CONFIG_PATH)
+    if hashtag is None:
+        abort(404, description=f"Unknown hashtag: {tag}")
+    return hashtag
+
+def _find_analytics(analytics, hashtag):
+    return analytics.get(hashtag) or next((entry for key, entry in analytics.items() if key.lower() == hashtag.lower()), None)
+
+def build_hashtags():
+    config = read_config(CONFIG_PATH)
+    bluesky = read_bluesky_analytics(BLUESKY_CSV)
+    youtube = {row.get('hashtag', '').lower(): row for row in read_csv_rows(YOUTUBE_CSV)}
+    statuses = {key.lower(): value for key, value in config.get('subreddit_status', {}).items()}
+
+    max_daily_posts = {}
+    for hashtag in config.get('hashtags', []):
+        entry = _find_analytics(bluesky, hashtag)
+        if entry and entry['daily']:
+            max_daily_posts[hashtag] = max(entry['daily'].values())
+    # Same quartile population as the report: every YouTube row with a numeric view count.
+    population = [int(row['total_views']) for row in youtube.values() if (row.get('total_views') or '').isdigit()]
+    views = {}
+    for hashtag in config.get('hashtags', []):
+        if hashtag.lower() in youtube:
+            views_str = youtube[hashtag.lower()].get('total_views') or ''
+            views[hashtag] = int(views_str) if views_str.isdigit() else 0
+    bluesky_levels = hotness_levels(max_daily_posts) if max_daily_posts else {}
+    youtube_levels = hotness_levels(views, population=population) if population else {}
+
+    return {'hashtags': [
+        {
+            'hashtag': hashtag,
+            'display': format_hashtag_for_display(hashtag),
+            'max_daily_posts': max_daily_posts.get(hashtag, 0),
+            'bluesky_hotness': bluesky_levels.get(hashtag, -1),
+            'youtube_views': views.get(hashtag),
+            'youtube_hotness': youtube_levels.get(hashtag, -1),
+            'subreddit_status': statuses.get(hashtag.lower(), 'Exists'),
+        }
+        for hashtag in config.get('hashtags', [])
+    ]}
+
+@analytics_api.route('/hashtags', methods=['GET'])
+def hashtags():
+    return json_response(cached_json('hashtags', [CONFIG_PATH, BLUESKY_CSV, YOUTUBE_CSV], build_hashtags))
+
+@analytics_api.route('/hashtags/<tag>/daily', methods=['GET'])
+def hashtag_daily(tag):
+    hashtag = resolve_hashtag(tag)
+
+    def build():
+        entry = _find_analytics(read_bluesky_analytics(BLUESKY_CSV), hashtag) or {'daily': {}}
+        return {'hashtag': hashtag, 'daily': [{'date': date, 'posts': posts} for date, posts in sorted(entry['daily'].items())]}
+
+    return json_response(cached_json(('daily', hashtag), [CONFIG_PATH, BLUESKY_CSV], build))
+
+@analytics_api.route('/hashtags/<tag>/top-posters', methods=['GET'])
+def hashtag_top_posters(tag):
+    hashtag = resolve_hashtag(tag)
+
+    def build():
+        entry = _find_analytics(read_bluesky_analytics(BLUESKY_CSV), hashtag) or {}
+        return {
+            'hashtag': hashtag,
+            'activity': [{'author': author, 'posts': value} for author, value in entry.get('top_poster_activity', [])],
+            'engagement': [{'author': author, 'engagement': value} for author, value in entry.get('top_poster_engagement', [])],
+        }
+
+    return json_response(cached_json(('top-posters', hashtag), [CONFIG_PATH, BLUESKY_CSV], build))
+
+def encode_cursor(post_id):
+    return base64.urlsafe_b64encode(json.dumps({'before': post_id}).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))['before'])
+    except (ValueError, KeyError, TypeError):
+        abort(400, description='Invalid cursor')
+
+@analytics_api.route('/hashtags/<tag>/posts', methods=['GET'])
+def hashtag_posts(tag):
+    """Stored posts, newest first. next_cursor is null on the last page."""
+    hashtag = resolve_hashtag(tag)
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        abort(400, description='limit must be an integer')
+    cursor = request.args.get('cursor')
+    before_id = decode_cursor(cursor) if cursor else None
+
+    def build():
+        posts = get_store().posts_page(hashtag, before_id, limit + 1)
+        next_cursor = encode_cursor(posts[limit - 1]['id']) if len(posts) > limit else None
+        return {'hashtag': hashtag, 'posts': posts[:limit], 'next_cursor': next_cursor}
+
+    # The write-ahead log changes with every insert, so it versions the cached pages.
+    paths = [DB_PATH, DB_PATH + '-wal']
+    return json_response(cached_json(('posts', hashtag, before_id, limit), paths, build))
+
+@analytics_api.route('/youtube', methods=['GET'])
+def youtube():
+    return json_response(cached_json('youtube', [YOUTUBE_CSV], lambda: {'youtube': read_csv_rows(YOUTUBE_CSV)}))
+
+@analytics_api.route('/reddit', methods=['GET'])
+def reddit():
+    return json_response(cached_json('reddit', [REDDIT_CSV], lambda: {'reddit': read_csv_rows(REDDIT_CSV)}))
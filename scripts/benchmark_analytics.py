@@ -0,0 +1,75 @@
+"""
+Benchmarks analyze_bluesky_data against the columnar NumPy engine.
+
+Generates synthetic posts (23 hashtags, a long-tailed author distribution,
+~30 days of RFC 3339 timestamps plus a sprinkling of missing and malformed
+ones), checks that both engines return identical records and prints timings.
+
+Usage:
+  python benchmark_analytics.py                 # 10k, 100k and 1M posts
+  python benchmark_analytics.py --sizes 10000
+"""
+
+import io
+import time
+import random
+import argparse
+import contextlib
+
+from update_social_data import analyze_bluesky_data
+from columnar_analytics import analyze_bluesky_data_columnar, analyze_columns, load_post_columns
+
+def make_posts(count, seed=0):
+    rng = random.Random(seed)
+    hashtags = [f'Tag{i}' for i in range(23)]
+    authors = [f'author{i}' for i in range(max(10, count // 20))]
+    posts = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.002:
+            created_at = ''
+        elif roll < 0.003:
+            created_at = 'not-a-date'
+        elif roll < 0.1:
+            created_at = f'2025-07-{rng.randint(1, 30):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}+00:00'
+        else:
+            created_at = f'2025-07-{rng.randint(1, 30):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.{rng.randint(0, 999):03d}Z'
+        posts.append({
+            'hashtag': hashtags[min(int(rng.paretovariate(1.2)) - 1, len(hashtags) - 1)],
+            'author': authors[min(int(rng.paretovariate(0.8)) - 1, len(authors) - 1)],
+            'text': '',
+            'likes': rng.randint(0, 20),
+            'reposts': rng.randint(0, 5),
+            'replies': rng.randint(0, 5),
+            'uri': f'at://did:plc:bench/app.bsky.feed.post/{i}',
+            'created_at': created_at,
+        })
+    return posts
+
+def timed(func, *args):
+    # Both engines log per record/warning; keep that out of the timing output.
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+    return result, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the row-wise and columnar Bluesky analytics engines.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help='Numbers of posts to benchmark.')
+    args = parser.parse_args()
+
+    # "columnar" includes turning the post dicts into columns; "analysis only"
+    # starts from ready-made columns, as when they are loaded from the store.
+    print(f"{'posts':>10} {'row-wise (s)':>13} {'columnar (s)':>13} {'analysis only (s)':>18} {'speedup':>8}  identical")
+    for size in args.sizes:
+        posts = make_posts(size)
+        expected, row_time = timed(analyze_bluesky_data, posts)
+        actual, columnar_time = timed(analyze_bluesky_data_columnar, posts)
+        columns = load_post_columns(posts)
+        _, analysis_time = timed(analyze_columns, columns)
+        print(f"{size:>10} {row_time:>13.3f} {columnar_time:>13.3f} {analysis_time:>18.3f} "
+              f"{row_time / columnar_time:>7.1f}x  {expected == actual}")
+
+if __name__ == '__main__':
+    main()
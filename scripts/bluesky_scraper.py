@@ -1,24 +1,52 @@
 import os
 import argparse
-from atproto import Client, models
+from atproto import Client, SessionEvent, models
 from dotenv import load_dotenv
 import json
 import re # Import regex module
 import sys # Import sys module
+import threading
+from datetime import datetime
 
+from file_lock import FileLock, atomic_write_json
 
 
-SESSION_FILE = 'bluesky_session.json'
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SESSION_FILE = os.path.join(PROJECT_ROOT, 'bluesky_session.json')
+SESSION_LOCK_FILE = SESSION_FILE + '.lock'
+
+# Serializes client creation between threads; SESSION_LOCK_FILE does the same between processes.
+_client_lock = threading.Lock()
 
 def load_session():
-    if os.path.exists(SESSION_FILE):
-        with open(SESSION_FILE, 'r') as f:
-            return json.load(f)
-    return None
+    """Returns the saved atproto session string, or None if there is no usable one."""
+    if not os.path.exists(SESSION_FILE):
+        return None
+    try:
+        with open(SESSION_FILE, 'r', encoding='utf-8') as f:
+            session = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[DEBUG] Could not read saved session: {type(e).__name__}: {e}", file=sys.stderr)
+        return None
+    if 'password' in session:
+        # Older versions stored the plaintext credentials here; never keep them on disk.
+        print("[DEBUG] Removing legacy session file that contained a password.", file=sys.stderr)
+        os.remove(SESSION_FILE)
+        return None
+    return session.get('session_string')
+
+def save_session(session_string):
+    atomic_write_json(SESSION_FILE, {'session_string': session_string}, mode=0o600)
 
-def save_session(session):
-    with open(SESSION_FILE, 'w') as f:
-        json.dump(session, f)
+def _save_refreshed_session(event, session):
+    if event in (SessionEvent.CREATE, SessionEvent.REFRESH):
+        try:
+            with FileLock(SESSION_LOCK_FILE):
+                save_session(session.export())
+            print(f"[DEBUG] Saved Bluesky session after {event.value}.", file=sys.stderr)
+        except Exception as e:
+            print(f"[DEBUG] Could not save Bluesky session: {type(e).__name__}: {e}", file=sys.stderr)
 
 def clean_string(s):
     """Removes common non-printable ASCII characters from a string."""
@@ -28,90 +56,167 @@ def clean_string(s):
     return re.sub(r'[^\x20-\x7E\n\r\t]', '', s)
 
 def get_bluesky_client():
-    """Initializes and returns an authenticated Bluesky client."""
+    """Initializes and returns an authenticated Bluesky client.
+
+    Reuses the access/refresh tokens saved in SESSION_FILE and only falls back to
+    a password login when there is no saved session or it can no longer be
+    refreshed. The session file is read and written under a lock file so
+    concurrent workers do not log in at the same time or overwrite a newer token.
+    """
     # Load environment variables from .env file
     load_dotenv()
 
-    client = Client()
-    
-    # Try to load existing session
-    session = load_session()
-    if session:
-        print("[DEBUG] Attempting to use saved session.", file=sys.stderr)
+    with _client_lock, FileLock(SESSION_LOCK_FILE):
+        client = Client()
+
+        # Try to load existing session
+        session_string = load_session()
+        if session_string:
+            print("[DEBUG] Attempting to use saved session.", file=sys.stderr)
+            try:
+                # Importing the session refreshes the access token if it has expired.
+                client.login(session_string=session_string)
+                refreshed = client.export_session_string()
+                if refreshed != session_string:
+                    save_session(refreshed)
+                client.on_session_change(_save_refreshed_session)
+                print("Successfully logged into Bluesky using saved session.", file=sys.stderr)
+                return client
+            except Exception as e:
+                print(f"[DEBUG] Error using saved session, attempting fresh login: {type(e).__name__}: {e}", file=sys.stderr)
+                client = Client()
+                # Fall through to fresh login if session fails
+
+        username = os.environ.get('BLUESKY_USERNAME') # Directly use env var
+        password = os.environ.get('BLUESKY_PASSWORD') # Directly use env var
+
+        if not username or not password:
+            print("Error: Bluesky username and password not found in environment variables.", file=sys.stderr)
+            print("Please set BLUESKY_USERNAME and BLUESKY_PASSWORD in your .env file or environment.", file=sys.stderr)
+            return None
+
         try:
-            client.login(session['identifier'], session['password'])
-            # If login successful with old credentials, it means session is still valid or refreshed
-            print("Successfully logged into Bluesky using saved session.", file=sys.stderr)
+            print(f"[DEBUG] Attempting fresh login with username: {username}", file=sys.stderr)
+            client.login(username, password)
+            save_session(client.export_session_string()) # Save tokens only, never the password
+            client.on_session_change(_save_refreshed_session)
+            print("Successfully logged into Bluesky with fresh credentials.", file=sys.stderr)
             return client
         except Exception as e:
-            print(f"[DEBUG] Error using saved session, attempting fresh login: {type(e).__name__}: {e}", file=sys.stderr)
-            # Fall through to fresh login if session fails
-
-    username = os.environ.get('BLUESKY_USERNAME') # Directly use env var
-    password = os.environ.get('BLUESKY_PASSWORD') # Directly use env var
+            print(f"Error logging into Bluesky: {type(e).__name__}: {e}", file=sys.stderr)
+            return None
 
-    if not username or not password:
-        print("Error: Bluesky username and password not found in environment variables.", file=sys.stderr)
-        print("Please set BLUESKY_USERNAME and BLUESKY_PASSWORD in your .env file or environment.", file=sys.stderr)
+def parse_created_at(created_at):
+    """Parses a Bluesky createdAt timestamp, returning None when it is missing or malformed."""
+    if not created_at:
         return None
-
     try:
-        print(f"[DEBUG] Attempting fresh login with username: {username} and password: {'*' * len(password) if password else 'None'}", file=sys.stderr)
-        client.login(username, password)
-        save_session({'identifier': username, 'password': password}) # Save new session
-        print("Successfully logged into Bluesky with fresh credentials.", file=sys.stderr)
-        return client
-    except Exception as e:
-        print(f"Error logging into Bluesky: {type(e).__name__}: {e}", file=sys.stderr)
+        return datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    except ValueError:
         return None
 
-def search_bluesky_hashtag(client: Client, hashtag: str, limit: int = 10):
-    """Searches for posts with a given hashtag on Bluesky and returns relevant data."""
+def post_to_dict(post, hashtag):
+    record = post.record
+    author = post.author.display_name or post.author.handle
+    text = record.text
+    like_count = post.like_count if post.like_count is not None else 0
+    repost_count = post.repost_count if post.repost_count is not None else 0
+    reply_count = post.reply_count if post.reply_count is not None else 0
+    created_at = record.created_at if hasattr(record, 'created_at') else None # Extract createdAt
+
+    return {
+        'hashtag': hashtag,
+        'author': author,
+        'text': text,
+        'likes': like_count,
+        'reposts': repost_count,
+        'replies': reply_count,
+        'uri': post.uri,
+        'created_at': created_at # Add createdAt to the data
+    }
+
+def search_bluesky_hashtag(client: Client, hashtag: str, limit: int = 10, stop_at: dict = None, max_pages: int = 1):
+    """Searches for posts with a given hashtag on Bluesky and returns relevant data.
+
+    Results are read newest first, `limit` posts per page, following the search
+    cursor for up to `max_pages` pages. When `stop_at` is given as the newest
+    already-stored post ({'uri': ..., 'created_at': ...}), the walk stops at the
+    first page that reaches it and only posts newer than it are returned.
+
+    Returns {'posts': [...], 'complete': bool}, where complete means the walk
+    reached `stop_at` or the end of the results, so no post newer than
+    `stop_at` was left unread. Returns None if the search failed; posts from
+    the pages read before the failure are dropped.
+    """
     if not client:
-        return []
+        return None
+
+    stop_uri = stop_at.get('uri') if stop_at else None
+    stop_created_at = parse_created_at(stop_at.get('created_at')) if stop_at else None
 
-    print(f"Searching for posts with hashtag: #{hashtag} (limit: {limit})", file=sys.stderr)
+    print(f"Searching for posts with hashtag: #{hashtag} (limit: {limit}, max pages: {max_pages})", file=sys.stderr)
     posts_data = []
+    cursor = None
+    pages = 0
+    complete = False
     try:
-        response = client.app.bsky.feed.search_posts(params={'q': f'#{hashtag}', 'limit': limit})
-        
-        if response and response.posts:
+        while pages < max_pages:
+            params = {'q': f'#{hashtag}', 'limit': limit, 'sort': 'latest'}
+            if stop_created_at:
+                params['since'] = stop_created_at.isoformat()
+            if cursor:
+                params['cursor'] = cursor
+            response = client.app.bsky.feed.search_posts(params=params)
+            pages += 1
+
+            if not response or not response.posts:
+                complete = True
+                break
+
+            reached_known_data = False
             for post in response.posts:
-                record = post.record
-                author = post.author.display_name or post.author.handle
-                text = record.text
-                like_count = post.like_count if post.like_count is not None else 0
-                repost_count = post.repost_count if post.repost_count is not None else 0
-                reply_count = post.reply_count if post.reply_count is not None else 0
-                created_at = record.created_at if hasattr(record, 'created_at') else None # Extract createdAt
-
-                posts_data.append({
-                    'hashtag': hashtag,
-                    'author': author,
-                    'text': text,
-                    'likes': like_count,
-                    'reposts': repost_count,
-                    'replies': reply_count,
-                    'uri': post.uri,
-                    'created_at': created_at # Add createdAt to the data
-                })
-        else:
+                post_data = post_to_dict(post, hashtag)
+                if stop_uri and post_data['uri'] == stop_uri:
+                    reached_known_data = True
+                    break
+                created_at = parse_created_at(post_data['created_at'])
+                if stop_created_at and created_at and created_at < stop_created_at:
+                    reached_known_data = True
+                    break
+                posts_data.append(post_data)
+
+            cursor = response.cursor
+            if reached_known_data or not cursor:
+                complete = True
+                break
+
+        print(f"[DEBUG] Fetched {len(posts_data)} posts for #{hashtag} in {pages} page(s).", file=sys.stderr)
+        if not posts_data:
             print(f"No posts found for #{hashtag}.", file=sys.stderr)
     except Exception as e:
         print(f"Error searching Bluesky: {type(e).__name__}: {e}", file=sys.stderr)
-    return posts_data
+        return None
+    return {'posts': posts_data, 'complete': complete}
 
 def main():
     parser = argparse.ArgumentParser(description="Scrape Bluesky posts by hashtag.")
     parser.add_argument("hashtag", help="The hashtag to search for (e.g., LearnGraph).")
-    parser.add_argument("--limit", type=int, default=10, help="Maximum number of posts to retrieve.")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum number of posts to retrieve per page.")
+    parser.add_argument("--max-pages", type=int, default=1, help="Maximum number of result pages to follow.")
+    parser.add_argument("--stop-at-uri", help="URI of the newest already-stored post; stop when it is reached.")
+    parser.add_argument("--stop-at-created-at", help="createdAt of the newest already-stored post; stop at older posts.")
     args = parser.parse_args()
 
+    stop_at = None
+    if args.stop_at_uri or args.stop_at_created_at:
+        stop_at = {'uri': args.stop_at_uri, 'created_at': args.stop_at_created_at}
+
     client = get_bluesky_client()
-    if client:
-        posts = search_bluesky_hashtag(client, args.hashtag, args.limit)
-        # Instead of printing formatted output, print the raw JSON data to stdout
-        print(json.dumps(posts))
+    result = search_bluesky_hashtag(client, args.hashtag, args.limit, stop_at=stop_at, max_pages=args.max_pages)
+    if result is None:
+        sys.exit(1)
+    # Instead of printing formatted output, print the raw JSON data to stdout
+    print(json.dumps(result))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,474 @@
+"""
+Long-running collector: polls every configured hashtag on every platform on
+its own adaptive schedule, instead of cold main.py / quick_update.py runs.
+
+The scraper engine (and its logged-in clients), the store, the post URI
+index and the Bluesky high-water marks are opened once and kept for the
+life of the process. config.json is re-read through config_store (a stat
+per loop), so added or removed hashtags gain or lose their feeds without a
+restart.
+
+Each (platform, hashtag) pair is a Feed with its own interval:
+
+  Bluesky          interval = target_posts_per_poll / observed post rate,
+                   where the rate is a moving average of new posts per
+                   second (seeded from the stored daily counts). A poll that
+                   finds nothing new stretches the interval by EMPTY_BACKOFF.
+  Reddit, YouTube  summaries, not post streams: a changed summary resets the
+                   interval to min_interval_seconds, an unchanged one
+                   stretches it by EMPTY_BACKOFF.
+
+Reddit polls also return the subreddit's status, which is written to
+subreddit_status in config.json like update_social_data.py does; a missing,
+banned or private subreddit is not an error, its feed is just dropped.
+
+Intervals stay within each platform's min/max ("collector" in config.json,
+DEFAULT_SETTINGS otherwise). A poll whose scraper failed (it raised, or the
+poll function returned None) backs the feed off exponentially (interval *
+2^consecutive errors, capped at the maximum) without touching its learned
+interval. Polls always fetch live; the response cache would hide new posts
+from a feed that polls faster than the cache TTL.
+
+Due feeds run as one batch on the fetch scheduler (per-platform limits from
+"scraper_limits"); their new posts are then stored, aggregated and exported
+the same way update_social_data.py does, and pushed to open reports.
+
+GET http://127.0.0.1:5056/health returns per-scraper last success time,
+latency and error counts plus every feed's schedule, with status 503 while a
+scraper has failed UNHEALTHY_AFTER_ERRORS polls in a row. Hashtags whose own
+polls keep failing are listed under their scraper as failing_hashtags.
+
+Usage:
+  python collector.py [--port 5056] [--engine inprocess] [--max-workers 8]
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config_store import CONFIG_PATH, read_config
+from fetch_scheduler import FetchScheduler
+from live_updates import NOTIFY_URL, LiveUpdatePublisher
+from refresh_tiers import rank_hashtags
+from scraper_engine import ENGINES, create_engine
+from storage import export_csvs, open_store
+from uri_index import PostUriIndex
+from update_social_data import (
+    SKIPPED_SUBREDDIT_STATUSES, UpdateContext, aggregate_new_posts, process_bluesky, process_youtube,
+    read_high_water_marks, read_scraper_limits, record_subreddit_statuses, store_reddit_analytics,
+    subreddit_map, write_high_water_marks,
+)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SCRIPT_DIR, '..', 'data')
+HIGH_WATER_MARKS_PATH = os.path.join(DATA_DIR, 'BlueskyHighWaterMarks.json')
+
+HEALTH_PORT = 5056
+DEFAULT_SETTINGS = {
+    'Bluesky': {'min_interval_seconds': 120, 'max_interval_seconds': 3600, 'target_posts_per_poll': 20},
+    'Reddit': {'min_interval_seconds': 3600, 'max_interval_seconds': 6 * 3600},
+    'YouTube': {'min_interval_seconds': 6 * 3600, 'max_interval_seconds': 24 * 3600},
+}
+# Weight of the newest rate sample in a Bluesky feed's moving average.
+RATE_SMOOTHING = 0.3
+EMPTY_BACKOFF = 1.5
+# Feeds that do not poll right away on startup are spread over this many seconds.
+STARTUP_SPREAD_SECONDS = 600
+# Longest sleep between loops, so config.json changes are picked up promptly.
+CONFIG_CHECK_SECONDS = 30
+UNHEALTHY_AFTER_ERRORS = 3
+
+def read_collector_settings(config):
+    """Returns {platform: settings}, DEFAULT_SETTINGS overridden by the "collector" section of the config."""
+    overrides = config.get('collector', {})
+    return {platform: {**defaults, **overrides.get(platform, {})} for platform, defaults in DEFAULT_SETTINGS.items()}
+
+def isoformat(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).isoformat(timespec='seconds') if timestamp else None
+
+def clamp(value, low, high):
+    return min(max(value, low), high)
+
+class Feed:
+    """Polling schedule of one (platform, hashtag) pair."""
+
+    def __init__(self, platform, hashtag, settings, next_due, rate=None):
+        self.platform = platform
+        self.hashtag = hashtag
+        self.settings = settings
+        self.rate = rate
+        self.interval = self.learned_interval() if rate else settings['min_interval_seconds']
+        self.next_due = next_due
+        self.last_poll = None
+        self.last_result = None
+        self.consecutive_errors = 0
+
+    @property
+    def key(self):
+        return self.platform, self.hashtag
+
+    def learned_interval(self):
+        target = self.settings.get('target_posts_per_poll', 1)
+        return clamp(target / self.rate, self.settings['min_interval_seconds'], self.settings['max_interval_seconds'])
+
+    def record_success(self, result, now):
+        """Adapts the interval to a successful poll's result and schedules the next poll."""
+        if self.platform == 'Bluesky':
+            new_posts = len(result)
+            if self.last_poll is not None:
+                sample = new_posts / max(now - self.last_poll, 1.0)
+                self.rate = sample if self.rate is None else RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * self.rate
+            if new_posts and self.rate:
+                self.interval = self.learned_interval()
+            elif new_posts:
+                self.interval = self.settings['min_interval_seconds']
+            else:
+                self.interval = min(self.interval * EMPTY_BACKOFF, self.settings['max_interval_seconds'])
+        elif result != self.last_result:
+            self.interval = self.settings['min_interval_seconds']
+        else:
+            self.interval = min(self.interval * EMPTY_BACKOFF, self.settings['max_interval_seconds'])
+        self.last_result = result
+        self.last_poll = now
+        self.consecutive_errors = 0
+        self.next_due = now + self.interval
+
+    def record_error(self, now):
+        """Backs off exponentially; the learned interval is kept for when the platform recovers."""
+        self.consecutive_errors += 1
+        backoff = self.interval * 2 ** self.consecutive_errors
+        self.next_due = now + min(backoff, max(self.settings['max_interval_seconds'], self.interval))
+
+    def status(self):
+        return {
+            'platform': self.platform,
+            'hashtag': self.hashtag,
+            'interval_seconds': round(self.interval, 1),
+            'posts_per_hour': round(self.rate * 3600, 2) if self.rate is not None else None,
+            'last_poll': isoformat(self.last_poll),
+            'next_due': isoformat(self.next_due),
+            'consecutive_errors': self.consecutive_errors,
+        }
+
+class ScraperHealth:
+    """Poll counters of one platform's scraper."""
+
+    def __init__(self, platform):
+        self.platform = platform
+        self.polls = 0
+        self.errors = 0
+        self.empty_polls = 0
+        self.consecutive_errors = 0
+        self.last_success = None
+        self.last_error = None
+        self.last_error_message = None
+        self.last_latency = None
+        self.total_latency = 0.0
+
+    def record(self, latency, error=None, empty=False):
+        self.polls += 1
+        self.last_latency = latency
+        self.total_latency += latency
+        if error:
+            self.errors += 1
+            self.consecutive_errors += 1
+            self.last_error = time.time()
+            self.last_error_message = error
+            return
+        self.consecutive_errors = 0
+        self.last_success = time.time()
+        if empty:
+            self.empty_polls += 1
+
+    @property
+    def healthy(self):
+        return self.consecutive_errors < UNHEALTHY_AFTER_ERRORS
+
+    def status(self):
+        return {
+            'healthy': self.healthy,
+            'polls': self.polls,
+            'errors': self.errors,
+            'consecutive_errors': self.consecutive_errors,
+            'empty_polls': self.empty_polls,
+            'last_success': isoformat(self.last_success),
+            'last_error': isoformat(self.last_error),
+            'last_error_message': self.last_error_message,
+            'last_latency_seconds': round(self.last_latency, 3) if self.last_latency is not None else None,
+            'average_latency_seconds': round(self.total_latency / self.polls, 3) if self.polls else None,
+        }
+
+def poll_reddit(hashtag, subreddit_name, context):
+    """Fetches one subreddit through the bulk path, which also reports its status.
+
+    Returns {'summary', 'status'}, or None if the subreddit could not be read
+    for an unknown reason. A subreddit that is missing, banned or private has
+    no summary but is not a failure.
+    """
+    print(f"[DEBUG] Processing Reddit for #{hashtag} (r/{subreddit_name})")
+    data, statuses = context.engine.collect_subreddits([subreddit_name], max_workers=1)
+    status = statuses.get(subreddit_name)
+    summary = store_reddit_analytics(subreddit_name, data.get(subreddit_name), context)
+    if summary is None and status not in SKIPPED_SUBREDDIT_STATUSES:
+        return None
+    return {'summary': summary, 'status': status}
+
+def timed_poll(func, args):
+    """Runs one feed's poll as a scheduler job; returns (result, latency, error message or None).
+
+    The scheduler would log an exception and record None, so errors are
+    caught here to keep their message and latency. The process_* functions
+    return None when their scraper failed, so a None result counts as an
+    error too.
+    """
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+        error = None if result is not None else 'scraper failed (see log)'
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    return result, time.perf_counter() - start, error
+
+class Collector:
+    """Keeps the scraper engine, store, URI index and feeds warm between polls."""
+
+    def __init__(self, engine_name='inprocess', max_workers=8, push_url=NOTIFY_URL,
+                 config_path=CONFIG_PATH, data_dir=DATA_DIR):
+        self.config_path = config_path
+        self.data_dir = data_dir
+        self.push_url = push_url
+        self.max_workers = max_workers
+        self.engine = create_engine(engine_name)
+        self.store = open_store(os.path.join(data_dir, 'social.db'), data_dir)
+        self.uri_index = PostUriIndex(self.store, os.path.join(data_dir, 'post_uris.bloom'))
+        self.marks_path = os.path.join(data_dir, os.path.basename(HIGH_WATER_MARKS_PATH))
+        self.context = UpdateContext(self.engine, self.store, {}, uri_index=self.uri_index)
+        self.feeds = {}
+        self.health = {platform: ScraperHealth(platform) for platform in DEFAULT_SETTINGS}
+        self.started = time.time()
+        self.loops = 0
+        self._config = None
+        self._subreddits = {}
+        self._scheduler = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def refresh_feeds(self):
+        """Adds and removes feeds to match config.json; only does work after the file changed."""
+        try:
+            config = read_config(self.config_path)
+        except Exception as e:
+            print(f"[ERROR] Could not read {self.config_path}, keeping the current feeds: {e}")
+            return
+        if config is self._config:
+            return
+        self._config = config
+        self._scheduler = FetchScheduler(read_scraper_limits(self.config_path), max_workers=self.max_workers)
+        settings = read_collector_settings(config)
+        hashtags = config.get('hashtags', [])
+        templates = config.get('platform_url_templates', {})
+        self._subreddits = subreddit_map(config, hashtags)
+        momentum = {item['hashtag']: item['momentum'] for item in rank_hashtags(config, self.data_dir)}
+
+        with self.context.uri_lock:
+            for hashtag, marker in read_high_water_marks(self.marks_path, self.store, hashtags).items():
+                self.context.high_water_marks.setdefault(hashtag, marker)
+
+        with self._lock:
+            wanted = self._add_feeds(hashtags, templates, settings, momentum)
+            for key in set(self.feeds) - wanted:
+                del self.feeds[key]
+        print(f"[INFO] Collector tracking {len(self.feeds)} feeds for {len(hashtags)} hashtags.")
+
+    def _add_feeds(self, hashtags, templates, settings, momentum):
+        """Creates the feeds that are missing and returns the keys of every configured feed."""
+        wanted = set()
+        now = time.time()
+        for hashtag in hashtags:
+            for platform in DEFAULT_SETTINGS:
+                if not templates.get(platform) or (platform == 'Reddit' and not self._subreddits.get(hashtag)):
+                    continue
+                key = (platform, hashtag)
+                wanted.add(key)
+                if key in self.feeds:
+                    self.feeds[key].settings = settings[platform]
+                    continue
+                if platform == 'Bluesky':
+                    # Bluesky polls stop at the high-water mark, so they are cheap enough to run right away.
+                    rate = momentum.get(hashtag, 0) / 86400 or None
+                    self.feeds[key] = Feed(platform, hashtag, settings[platform], now, rate)
+                else:
+                    spread = min(settings[platform]['min_interval_seconds'], STARTUP_SPREAD_SECONDS)
+                    self.feeds[key] = Feed(platform, hashtag, settings[platform], now + random.uniform(0, spread))
+        return wanted
+
+    def job(self, feed):
+        if feed.platform == 'Bluesky':
+            func, args = process_bluesky, (feed.hashtag, self.context)
+        elif feed.platform == 'Reddit':
+            func, args = poll_reddit, (feed.hashtag, self._subreddits[feed.hashtag], self.context)
+        else:
+            func, args = process_youtube, (feed.hashtag, self.context)
+        return feed.key, feed.platform, timed_poll, (func, args)
+
+    def poll_due(self):
+        """Polls every due feed in one scheduler batch and stores what it found. Returns the number of polls."""
+        now = time.time()
+        due = [feed for feed in self.feeds.values() if feed.next_due <= now]
+        if not due:
+            return 0
+        publisher = LiveUpdatePublisher(self.store, self.push_url) if self.push_url else None
+        new_posts_by_hashtag = {}
+
+        def on_result(key, outcome):
+            feed = self.feeds.get(key)
+            result, latency, error = outcome
+            finished = time.time()
+            with self._lock:
+                self.health[key[0]].record(latency, error, empty=not error and not result)
+                if feed is None:
+                    pass
+                elif error:
+                    feed.record_error(finished)
+                else:
+                    feed.record_success(result, finished)
+            if error:
+                print(f"[ERROR] Collector poll {key[0]} #{key[1]} failed: {error}")
+                return
+            if key[0] == 'Bluesky' and result:
+                new_posts_by_hashtag[key[1]] = result
+            elif key[0] == 'Reddit':
+                self.record_subreddit_status(key[1], result['status'])
+            if publisher:
+                publisher.on_result(key, result)
+
+        print(f"[DEBUG] Collector polling {len(due)} due feeds.")
+        self._scheduler.run([self.job(feed) for feed in due], on_result=on_result)
+        self.store_new_posts(new_posts_by_hashtag)
+        if publisher:
+            publisher.report()
+        return len(due)
+
+    def record_subreddit_status(self, hashtag, status):
+        """Writes a polled subreddit's status to config.json and drops the feed of one that cannot be read."""
+        if status is None:
+            return
+        record_subreddit_statuses(self.config_path, {hashtag: status})
+        if status in SKIPPED_SUBREDDIT_STATUSES:
+            print(f"[INFO] Subreddit for #{hashtag} is {status}; no longer polling it.")
+            with self._lock:
+                self.feeds.pop(('Reddit', hashtag), None)
+
+    def store_new_posts(self, new_posts_by_hashtag):
+        """Stores the posts of one batch, then updates the marks, analytics and exported CSVs."""
+        hashtags = self._config.get('hashtags', []) if self._config else []
+        all_new_posts = [post for hashtag in hashtags for post in new_posts_by_hashtag.get(hashtag, [])]
+        if all_new_posts:
+            self.store.insert_posts(all_new_posts)
+        self.uri_index.sync()
+        with self.context.uri_lock:
+            # The index (or the store) answers for these URIs now.
+            self.context.claimed_uris.clear()
+            marks = dict(self.context.high_water_marks)
+        write_high_water_marks(marks, self.marks_path)
+        if aggregate_new_posts(self.store):
+            self.store.replace_bluesky_analytics(self.store.analytics_from_counters())
+        # Reddit and YouTube polls upsert their summaries, so export after every batch.
+        export_csvs(self.store, self.data_dir)
+
+    def seconds_until_next_poll(self):
+        with self._lock:
+            next_due = min((feed.next_due for feed in self.feeds.values()), default=None)
+        if next_due is None:
+            return CONFIG_CHECK_SECONDS
+        return clamp(next_due - time.time(), 0, CONFIG_CHECK_SECONDS)
+
+    def run(self):
+        print("[INFO] Collector started.")
+        try:
+            while not self._stop.is_set():
+                self.refresh_feeds()
+                self.poll_due()
+                self.loops += 1
+                self._stop.wait(self.seconds_until_next_poll())
+        finally:
+            self.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self.uri_index.report()
+        self.uri_index.close()
+        self.store.close()
+        print("[INFO] Collector stopped.")
+
+    def health_status(self):
+        with self._lock:
+            scrapers = {platform: health.status() for platform, health in self.health.items()}
+            for feed in self.feeds.values():
+                if feed.consecutive_errors >= UNHEALTHY_AFTER_ERRORS:
+                    scrapers[feed.platform].setdefault('failing_hashtags', []).append(feed.hashtag)
+            feeds = sorted((feed.status() for feed in self.feeds.values()), key=lambda item: item['next_due'] or '')
+            healthy = all(health.healthy for health in self.health.values())
+        return {
+            'status': 'ok' if healthy else 'degraded',
+            'started': isoformat(self.started),
+            'loops': self.loops,
+            'scrapers': scrapers,
+            'feeds': feeds,
+        }
+
+def make_health_handler(collector):
+    class HealthHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/health':
+                self.send_error(404)
+                return
+            status = collector.health_status()
+            body = json.dumps(status, indent=2).encode('utf-8')
+            self.send_response(200 if status['status'] == 'ok' else 503)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return HealthHandler
+
+def start_health_server(collector, port=HEALTH_PORT):
+    """Serves GET /health on localhost from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_health_handler(collector))
+    threading.Thread(target=server.serve_forever, name='collector-health', daemon=True).start()
+    print(f"[INFO] Collector health at http://127.0.0.1:{server.server_address[1]}/health")
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Continuously collect social data with adaptive polling intervals.")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default='inprocess',
+                        help="Scraper engine; 'inprocess' keeps logged-in clients between polls.")
+    parser.add_argument("--max-workers", type=int, default=8, help="Maximum number of concurrent polls across all platforms.")
+    parser.add_argument("--port", type=int, default=HEALTH_PORT, help="Port of the /health endpoint (0 disables it).")
+    parser.add_argument("--push-url", default=NOTIFY_URL, help="api_server endpoint that relays fresh numbers to open reports.")
+    parser.add_argument("--no-push", action="store_true", help="Do not push live updates to open reports.")
+    args = parser.parse_args()
+
+    collector = Collector(args.engine, max(args.max_workers, 1), None if args.no_push else args.push_url)
+    server = start_health_server(collector, args.port) if args.port else None
+    try:
+        collector.run()
+    except KeyboardInterrupt:
+        print("[INFO] Interrupted; shutting down.")
+    finally:
+        if server:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
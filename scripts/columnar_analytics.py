@@ -0,0 +1,277 @@
+"""
+Columnar NumPy engine for the Bluesky analytics.
+
+analyze_bluesky_data_columnar() returns exactly what
+update_social_data.analyze_bluesky_data() returns (same records, same order,
+same tie-breaking) but loads the posts into arrays once and computes every
+metric with grouped reductions instead of per-post dict updates. Hashtags,
+authors and dates are categorical-encoded, and createdAt strings are parsed in
+bulk: rows in the usual RFC 3339 shape are validated with array operations and
+only unusual rows go through datetime.fromisoformat one by one.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+TOP_N = 5
+
+# Shape of the timestamps the vectorized fast path in parse_dates handles;
+# '0' marks a digit.
+_TEMPLATE = '0000-00-00T00:00:00'
+
+def load_post_columns(posts):
+    """Turns an iterable of post dicts into columns (see columns_from_lists)."""
+    hashtags, authors, created_ats, engagement, uris = [], [], [], [], []
+    for post in posts:
+        hashtags.append(post['hashtag'])
+        authors.append(post['author'] or '')
+        created_ats.append(post.get('created_at') or '')
+        engagement.append(post.get('likes', 0) + post.get('reposts', 0) + post.get('replies', 0))
+        uris.append(post.get('uri'))
+    return columns_from_lists(hashtags, authors, created_ats, engagement, uris)
+
+def load_post_columns_from_store(store):
+    """Loads the analytics columns straight from the SQLite store, without building post dicts."""
+    return columns_from_lists(*store.post_columns())
+
+def columns_from_lists(hashtags, authors, created_ats, engagement, uris=None):
+    """Builds the column dict the engine works on.
+
+    Hashtags and authors are factorized into integer codes (hashtag_names /
+    author_names hold the values); created_at becomes a fixed-width string
+    array ('' when missing) and engagement an int64 array.
+    """
+    hashtag_names, hashtag_codes = factorize(hashtags)
+    author_names, author_codes = factorize(authors)
+    return {
+        'hashtag_names': hashtag_names,
+        'hashtag': hashtag_codes,
+        'author_names': author_names,
+        'author': author_codes,
+        'created_at': np.array(created_ats, dtype=str) if created_ats else np.array([], dtype='U1'),
+        'engagement': np.array(engagement, dtype=np.int64),
+        'uri': uris,
+    }
+
+def factorize(values):
+    """Returns (distinct values, codes) with codes numbered in order of first appearance.
+
+    A plain dict is faster here than sorting strings with np.unique, gives the
+    first-appearance numbering the row-wise engine's dicts have, and copes with
+    None authors.
+    """
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int64, count=len(values))
+    return list(index), codes
+
+def _group(keys):
+    """Groups rows by integer keys.
+
+    Returns (group_keys, first_row, counts, inverse): the distinct keys in
+    ascending order, the first row of each group, the group sizes and each
+    row's group index. Keys spanning a small range use bincount; sparse ones
+    fall back to sorting.
+    """
+    n = len(keys)
+    low = keys.min()
+    span = int(keys.max() - low) + 1
+    if span <= max(4 * n, 1 << 16):
+        offsets = keys - low
+        counts = np.bincount(offsets, minlength=span)
+        first_row = np.full(span, n, dtype=np.int64)
+        np.minimum.at(first_row, offsets, np.arange(n))
+        present = np.flatnonzero(counts)
+        lookup = np.zeros(span, dtype=np.int64)
+        lookup[present] = np.arange(len(present))
+        return present + low, first_row[present], counts[present], lookup[offsets]
+    group_keys, first_row, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    return group_keys, first_row, counts, inverse.reshape(-1)
+
+def parse_dates(created_at, uris=None):
+    """Parses createdAt strings in bulk.
+
+    Returns (day_slots, valid): where valid[i] is True, day_slots[i] encodes
+    the date as (year * 12 + month - 1) * 31 + day - 1. A row is valid exactly
+    when datetime.fromisoformat(s.replace('Z', '+00:00')) succeeds, matching
+    analyze_bluesky_data; unparseable rows print the same warning it does.
+    """
+    n = len(created_at)
+    day_slots = np.zeros(n, dtype=np.int64)
+    valid = np.zeros(n, dtype=bool)
+    if n == 0:
+        return day_slots, valid
+
+    width = max(created_at.dtype.itemsize // 4, 19)
+    padded = created_at if created_at.dtype.itemsize // 4 == width else created_at.astype(f'U{width}')
+    codes = padded.view(np.uint32).reshape(n, width)
+    lengths = np.char.str_len(padded)
+
+    # Check the first 19 characters against YYYY-MM-DDTHH:MM:SS. They are
+    # copied once into a position-major uint8 block (anything above 255 is
+    # clamped, so it cannot pass for a digit or separator) which keeps every
+    # per-position test below a contiguous pass.
+    chars = np.ascontiguousarray(np.minimum(codes[:, :19], 255).astype(np.uint8).T)
+    digits = chars - np.uint8(ord('0'))  # non-digits wrap around to values above 9
+    date_shape = np.ones(n, dtype=bool)
+    time_shape = lengths >= 19
+    for position, expected in enumerate(_TEMPLATE):
+        shape = date_shape if position < 10 else time_shape
+        if expected == '0':
+            shape &= digits[position] <= 9
+        elif position == 10:
+            shape &= (chars[position] == ord('T')) | (chars[position] == ord(' '))
+        else:
+            shape &= chars[position] == ord(expected)
+
+    values = digits.astype(np.int64)
+    def field(*positions):
+        total = values[positions[0]]
+        for position in positions[1:]:
+            total = total * 10 + values[position]
+        return total
+
+    year, month, day = field(0, 1, 2, 3), field(5, 6), field(8, 9)
+    time_in_range = (field(11, 12) < 24) & (field(14, 15) < 60) & (field(17, 18) < 60)
+    fast = (date_shape & (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+            & ((lengths == 10) | (time_shape & time_in_range)))
+    slots = np.where(fast, (year * 12 + month - 1) * 31 + day - 1, 0)
+
+    # The rest of date validity (month lengths, leap years, year 0) only
+    # depends on the date, so check each distinct date once.
+    if fast.any():
+        present, _, _, inverse = _group(slots[fast])
+        slot_ok = np.array([_parses(format_day_slot(slot)) for slot in present.tolist()], dtype=bool)
+        fast[fast] = slot_ok[inverse]
+
+    # Whatever follows the seconds (fraction and/or UTC offset) is checked once
+    # per distinct tail, after blanking the fraction digits which cannot make a
+    # timestamp invalid.
+    tail_rows = np.flatnonzero(fast & (lengths > 19))
+    if len(tail_rows):
+        tail = codes[tail_rows, 19:].copy()
+        if tail.shape[1] > 1:
+            digits = (tail[:, 1:] >= ord('0')) & (tail[:, 1:] <= ord('9'))
+            fraction_digits = np.logical_and.accumulate(digits, axis=1) & (tail[:, :1] == ord('.'))
+            tail[:, 1:][fraction_digits] = ord('0')
+        fast[tail_rows[~_tails_ok(tail)]] = False
+
+    day_slots[fast] = slots[fast]
+    valid[fast] = True
+
+    # Everything else non-empty takes the exact per-row path.
+    for i in np.flatnonzero(~fast & (lengths > 0)).tolist():
+        created_at_str = str(created_at[i])
+        try:
+            date = datetime.fromisoformat(created_at_str.replace('Z', '+00:00')).date()
+            day_slots[i] = (date.year * 12 + date.month - 1) * 31 + date.day - 1
+            valid[i] = True
+        except ValueError:
+            uri = uris[i] if uris is not None else None
+            print(f"[WARNING] Could not parse date {created_at_str} for post {uri}")
+    return day_slots, valid
+
+def format_day_slot(slot):
+    """Turns a day slot from parse_dates() back into 'YYYY-MM-DD'."""
+    months, day = divmod(slot, 31)
+    year, month = divmod(months, 12)
+    return f"{year:04d}-{month + 1:02d}-{day + 1:02d}"
+
+def _tails_ok(tail, max_scans=8):
+    """Checks (fraction-blanked) timestamp tails, given as rows of code points.
+
+    Real data only has a handful of distinct tails ('Z', '.000Z', '+00:00'),
+    so peel them off one at a time with a vectorized comparison and only sort
+    whatever is left after max_scans distinct tails.
+    """
+    ok = np.zeros(len(tail), dtype=bool)
+    remaining = np.arange(len(tail))
+    for _ in range(max_scans):
+        if not len(remaining):
+            return ok
+        sample = tail[remaining[0]]
+        same = (tail[remaining] == sample).all(axis=1)
+        ok[remaining[same]] = _parses('2000-01-01T00:00:00' + _codes_to_str(sample))
+        remaining = remaining[~same]
+    if len(remaining):
+        tails = np.ascontiguousarray(tail[remaining]).view(f'U{tail.shape[1]}').reshape(-1)
+        unique_tails, inverse = np.unique(tails, return_inverse=True)
+        tail_ok = np.array([_parses('2000-01-01T00:00:00' + t) for t in unique_tails.tolist()], dtype=bool)
+        ok[remaining] = tail_ok[inverse.reshape(-1)]
+    return ok
+
+def _codes_to_str(codes):
+    return ''.join(chr(c) for c in codes.tolist() if c)
+
+def _parses(created_at_str):
+    try:
+        datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
+        return True
+    except ValueError:
+        return False
+
+def _top_n_per_group(group_rank, values, first_seen, top_n):
+    """Returns row indices of the top_n values per group, ordered like the row-wise engine.
+
+    Groups come out in group_rank order; within a group values are descending
+    and ties keep first-seen order (what a stable sort over an insertion-ordered
+    dict gives).
+    """
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((first_seen, -values, group_rank))
+    sorted_groups = group_rank[order]
+    group_start = np.r_[0, np.flatnonzero(np.diff(sorted_groups)) + 1]
+    starts = np.repeat(group_start, np.diff(np.r_[group_start, len(order)]))
+    return order[(np.arange(len(order)) - starts) < top_n]
+
+def analyze_columns(columns, top_n=TOP_N):
+    """Computes daily_posts, top_poster_activity and top_poster_engagement from columns."""
+    print("[DEBUG] Analyzing Bluesky data (columnar engine)...")
+    n = len(columns['hashtag'])
+    analytics_data = []
+    if n == 0:
+        print("[DEBUG] Generated 0 analytics records.")
+        return analytics_data
+
+    hashtag_names, hashtag_codes = columns['hashtag_names'], columns['hashtag']
+    author_names, author_codes = columns['author_names'], columns['author']
+    day_slots, valid = parse_dates(columns['created_at'], columns.get('uri'))
+    num_hashtags = len(hashtag_names)
+
+    # daily_posts: group valid rows by date, then by (hashtag, date).
+    valid_rows = np.flatnonzero(valid)
+    if len(valid_rows):
+        dates, _, _, date_codes = _group(day_slots[valid_rows])
+        date_names = [format_day_slot(slot) for slot in dates.tolist()]
+        num_dates = len(date_names)
+        keys, key_first, counts, _ = _group(hashtag_codes[valid_rows] * num_dates + date_codes)
+        key_hashtags = keys // num_dates
+        key_dates = keys % num_dates
+        key_first_row = valid_rows[key_first]
+        # Hashtags are listed in order of their first dated post, and each
+        # hashtag's dates in the order they first appear for that hashtag.
+        hashtag_first_dated = np.full(num_hashtags, n, dtype=np.int64)
+        np.minimum.at(hashtag_first_dated, key_hashtags, key_first_row)
+        order = np.lexsort((key_first_row, hashtag_first_dated[key_hashtags]))
+        for h, d, c in zip(key_hashtags[order].tolist(), key_dates[order].tolist(), counts[order].tolist()):
+            analytics_data.append({'metric': 'daily_posts', 'hashtag': hashtag_names[h], 'date': date_names[d], 'author': None, 'value': c})
+
+    # Per (hashtag, author) post counts and engagement sums.
+    num_authors = len(author_names)
+    pairs, pair_first, activity, pair_inverse = _group(hashtag_codes * num_authors + author_codes)
+    engagement = np.bincount(pair_inverse, weights=columns['engagement'], minlength=len(pairs)).astype(np.int64)
+    pair_hashtags = pairs // num_authors
+    pair_authors = pairs % num_authors
+
+    for metric, values in (('top_poster_activity', activity), ('top_poster_engagement', engagement)):
+        rows = _top_n_per_group(pair_hashtags, values, pair_first, top_n)
+        for h, a, v in zip(pair_hashtags[rows].tolist(), pair_authors[rows].tolist(), values[rows].tolist()):
+            analytics_data.append({'metric': metric, 'hashtag': hashtag_names[h], 'author': author_names[a], 'date': None, 'value': v})
+
+    print(f"[DEBUG] Generated {len(analytics_data)} analytics records.")
+    return analytics_data
+
+def analyze_bluesky_data_columnar(scraped_data, top_n=TOP_N):
+    """Drop-in replacement for analyze_bluesky_data() using the columnar engine."""
+    return analyze_columns(load_post_columns(scraped_data), top_n)
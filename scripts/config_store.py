@@ -0,0 +1,113 @@
+"""
+Shared access to config.json.
+
+read_config() parses the file once and returns the cached result until the
+file's mtime or size changes, and hashtag_index() keeps a case-insensitive
+index of the configured hashtags alongside it. The returned config is
+shared: treat it as read-only and change the file through update_config(),
+which re-reads it under a lock file, applies the change and replaces the
+file atomically, so concurrent writers (api_server requests, Reddit status
+updates) never lose each other's edits and readers never see a partial file.
+"""
+
+import os
+import json
+import threading
+
+from file_lock import FileLock, atomic_write_json
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(SCRIPT_DIR, '..', 'config.json')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def file_signature(path):
+    """Returns (mtime_ns, size) of path, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _cached(config_path):
+    """Returns (config, hashtag index) for config_path, re-parsing only after the file changed."""
+    key = os.path.abspath(config_path)
+    signature = file_signature(config_path)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    entry = (config, {hashtag.lower(): hashtag for hashtag in config.get('hashtags', [])})
+    with _cache_lock:
+        _cache[key] = (signature, entry)
+    return entry
+
+def read_config(config_path=CONFIG_PATH):
+    """Returns the parsed config (shared; do not modify it)."""
+    return _cached(config_path)[0]
+
+def hashtag_index(config_path=CONFIG_PATH):
+    """Returns {lowercased hashtag: configured spelling}."""
+    return _cached(config_path)[1]
+
+def find_hashtag(hashtag, config_path=CONFIG_PATH):
+    """Returns the configured spelling of hashtag (case-insensitive), or None if it is not configured."""
+    return hashtag_index(config_path).get(hashtag.lower())
+
+def update_config(change, config_path=CONFIG_PATH):
+    """Applies change(config) to a fresh copy of the file under its lock and writes the result atomically.
+
+    change edits the dict in place and returns a value that is passed back to
+    the caller; if that value is falsy the file is left untouched.
+    """
+    with FileLock(config_path + '.lock'):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        result = change(config)
+        if result:
+            atomic_write_json(config_path, config, indent=2, ensure_ascii=False)
+    return result
+
+def add_hashtags(hashtags, config_path=CONFIG_PATH):
+    """Appends the hashtags that are not configured yet (case-insensitive) in one write.
+
+    Returns (added, existing), each in the configured spelling.
+    """
+    added, existing = [], []
+
+    def change(config):
+        configured = config.setdefault('hashtags', [])
+        index = {hashtag.lower(): hashtag for hashtag in configured}
+        for hashtag in hashtags:
+            if hashtag.lower() in index:
+                existing.append(index[hashtag.lower()])
+            else:
+                configured.append(hashtag)
+                index[hashtag.lower()] = hashtag
+                added.append(hashtag)
+        return added
+
+    update_config(change, config_path)
+    return added, existing
+
+def remove_hashtags(hashtags, config_path=CONFIG_PATH):
+    """Removes the given hashtags (case-insensitive) in one write. Returns (removed, missing)."""
+    requested = {hashtag.lower(): hashtag for hashtag in hashtags}
+    removed = []
+
+    def change(config):
+        kept = []
+        for hashtag in config.get('hashtags', []):
+            if hashtag.lower() in requested:
+                removed.append(hashtag)
+            else:
+                kept.append(hashtag)
+        config['hashtags'] = kept
+        return removed
+
+    update_config(change, config_path)
+    found = {hashtag.lower() for hashtag in removed}
+    return removed, [hashtag for key, hashtag in requested.items() if key not in found]
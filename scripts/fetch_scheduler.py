@@ -0,0 +1,85 @@
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Used for any platform that has no entry under "scraper_limits" in config.json.
+DEFAULT_LIMITS = {'max_concurrency': 2, 'min_interval': 0.5}
+
+class PlatformLimiter:
+    """Caps concurrent calls to one platform and spaces out their start times.
+
+    max_concurrency bounds how many calls may be in flight at once, and
+    min_interval is the minimum number of seconds between two call starts,
+    which keeps a burst of queued hashtags under the platform's rate limit.
+    """
+
+    def __init__(self, platform, max_concurrency=2, min_interval=0.5):
+        self.platform = platform
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_interval = max(0.0, float(min_interval))
+        self._slots = threading.Semaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def __enter__(self):
+        self._slots.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self.min_interval
+        delay = start_at - now
+        if delay > 0:
+            time.sleep(delay)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._slots.release()
+        return False
+
+class FetchScheduler:
+    """Runs (platform, callable) jobs on a shared thread pool with per-platform limits."""
+
+    def __init__(self, scraper_limits=None, max_workers=8):
+        self.max_workers = max(1, int(max_workers))
+        self._limits = dict(scraper_limits or {})
+        self._limiters = {}
+
+    def limiter(self, platform):
+        if platform not in self._limiters:
+            limits = {**DEFAULT_LIMITS, **self._limits.get(platform, {})}
+            self._limiters[platform] = PlatformLimiter(platform, limits['max_concurrency'], limits['min_interval'])
+        return self._limiters[platform]
+
+    def _run_job(self, platform, func, args):
+        if platform is None:
+            return func(*args)
+        with self.limiter(platform):
+            return func(*args)
+
+    def run(self, jobs, on_result=None):
+        """Runs jobs given as (key, platform, func, args) tuples.
+
+        A job whose platform is None takes no limiter slot; use it for batch
+        jobs that enter their platform's limiter() around each request
+        themselves. Returns a {key: result} dict. A job that raises is logged and recorded
+        as None so one failing platform call does not abort the whole refresh.
+        on_result, if given, is called in the caller's thread as (key, result)
+        for each job as soon as it finishes.
+        """
+        results = {}
+        for job in jobs:
+            if job[1] is not None:
+                self.limiter(job[1])  # create limiters up front, outside the worker threads
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._run_job, platform, func, args): key for key, platform, func, args in jobs}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Scheduled job {key} failed: {type(e).__name__}: {e}", file=sys.stderr)
+                    results[key] = None
+                if on_result:
+                    on_result(key, results[key])
+        return results
@@ -0,0 +1,78 @@
+import os
+import json
+import time
+import tempfile
+
+class FileLock:
+    """Cross-process lock backed by an exclusively created lock file.
+
+    Works the same on Windows and POSIX and also excludes other threads of the
+    same process, since each acquire has to create the file itself. A lock file
+    older than stale_after seconds is assumed to belong to a crashed process and
+    is removed.
+    """
+
+    def __init__(self, path, timeout=30, poll_interval=0.05, stale_after=120):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._held = False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                with os.fdopen(fd, 'w') as f:
+                    f.write(str(os.getpid()))
+                self._held = True
+                return
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale_after:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue  # released between the two calls; retry immediately
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for lock {self.path}")
+            time.sleep(self.poll_interval)
+
+    def release(self):
+        if self._held:
+            self._held = False
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+def atomic_write_text(path, text, mode=None):
+    """Writes text to path through a temporary file and a rename, so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def atomic_write_json(path, data, mode=None, **dump_kwargs):
+    atomic_write_text(path, json.dumps(data, **dump_kwargs), mode=mode)
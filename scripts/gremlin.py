@@ -1,29 +1,144 @@
 import os
-import time
 import json
+import shlex
 import subprocess
 import threading
 import sys
-import datetime
+import time
+import socket
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from task_queue import Doorbell, TaskQueue, ring_doorbell
 
 # Get the absolute path of the script and project root
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.join(script_dir, '..')
 
+# Instructions written by older api_server versions; imported into the task queue on startup.
 INSTRUCTION_FILE = os.path.join(project_root, 'gremlin_instructions.json')
-RESULT_FILE = os.path.join(project_root, 'gremlin_results.json')
-
-def execute_task(task_id, command):
-    print(f"Gremlin: Executing task {task_id} with command: {command}")
-    result = {
-        'task_id': task_id,
-        'status': 'running',
-        'timestamp': datetime.datetime.now().isoformat()
-    }
-    
+UPDATE_SCRIPT = os.path.join(script_dir, 'update_social_data.py')
+
+WORKER_ID = f"gremlin-{socket.gethostname()}-{os.getpid()}"
+# Longest wait between queue checks when nothing rings the doorbell.
+IDLE_TIMEOUT_SECONDS = 30
+DEFAULT_WORKERS = 2
+
+# Task kind for a social data update; the payload is {'hashtags': [...]}.
+UPDATE_KIND = 'update_social_data'
+# Queued update tasks are merged into one update_social_data.py run of at most this many hashtags.
+MAX_HASHTAGS_PER_RUN = 25
+
+def queue_hashtag_update(queue, hashtag, task_id=None):
+    """Queues a social data update for hashtag. A queued update for the same hashtag is reused. Returns the task id."""
+    return queue.enqueue({'hashtags': [hashtag]}, task_id=task_id, kind=UPDATE_KIND, dedupe_key=hashtag.lower())
+
+def merged_hashtags(tasks):
+    """The hashtags of update tasks in queue order, without case-insensitive duplicates."""
+    hashtags = {}
+    for task in tasks:
+        for hashtag in task['payload'].get('hashtags', []):
+            hashtags.setdefault(hashtag.lower(), hashtag)
+    return list(hashtags.values())
+
+def task_command(tasks):
+    """Returns the argument list that runs tasks (one update run, or one legacy command), or None if there is nothing to run."""
+    if tasks[0]['kind'] == UPDATE_KIND:
+        hashtags = merged_hashtags(tasks)
+        return [sys.executable, UPDATE_SCRIPT, '--hashtag', *hashtags] if hashtags else None
+    command = tasks[0]['payload'].get('command')
+    if not command:
+        return None
+    if isinstance(command, list):
+        return command
+    # Commands queued by older api_server versions are single strings. Windows
+    # parses a string command line itself; elsewhere it has to be split.
+    return command if os.name == 'nt' else shlex.split(command)
+
+class Gremlin:
+    """Runs queued tasks on a fixed pool of worker threads.
+
+    A task is only claimed when a worker is free, so tasks that arrive while
+    the pool is busy stay queued. Update tasks are then claimed together and
+    run as one multi-hashtag update_social_data.py run, and only one update
+    runs at a time (the runs share the data files); other tasks use the
+    remaining workers.
+    """
+
+    def __init__(self, queue, workers=DEFAULT_WORKERS):
+        self.queue = queue
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gremlin')
+        self._slots = threading.Semaphore(workers)
+        self._lock = threading.Lock()
+        self._update_running = False
+
+    def claim(self):
+        """Claims the next unit of work (a list of tasks), or returns None."""
+        with self._lock:
+            exclude = (UPDATE_KIND,) if self._update_running else ()
+        task = self.queue.claim(WORKER_ID, exclude_kinds=exclude)
+        if task is None:
+            return None
+        tasks = [task]
+        if task['kind'] == UPDATE_KIND:
+            with self._lock:
+                self._update_running = True
+            tasks += self.queue.claim_related(task, MAX_HASHTAGS_PER_RUN - 1)
+        return tasks
+
+    def run(self):
+        print(f"Gremlin: Starting instruction loop with {self.workers} workers...")
+        # Listen before the first claim, so a task enqueued in between still wakes us.
+        doorbell = Doorbell(port=self.queue.doorbell_port)
+        try:
+            while True:
+                self._slots.acquire()
+                tasks = self.claim()
+                if tasks is None:
+                    self._slots.release()
+                    with self._lock:
+                        exclude = (UPDATE_KIND,) if self._update_running else ()
+                    # Sleeps until an enqueue rings, a retry is due or a lease expires.
+                    doorbell.wait(self.queue.next_due_in(IDLE_TIMEOUT_SECONDS, exclude_kinds=exclude))
+                    continue
+                self._pool.submit(self.execute, tasks)
+        finally:
+            doorbell.close()
+            self._pool.shutdown(wait=True)
+
+    def execute(self, tasks):
+        try:
+            execute_tasks(self.queue, tasks)
+        except Exception as e:
+            print(f"Gremlin: An unexpected error occurred: {e}")
+        finally:
+            if tasks[0]['kind'] == UPDATE_KIND:
+                with self._lock:
+                    self._update_running = False
+                # Wake the claim loop for the update tasks it skipped meanwhile.
+                ring_doorbell(port=self.queue.doorbell_port)
+            self._slots.release()
+
+def execute_tasks(queue, tasks):
+    """Runs one unit of work and acks (or nacks, for a retry) each of its tasks with the shared result."""
+    task_ids = ', '.join(task['id'] for task in tasks)
+    command = task_command(tasks)
+    if command is None:
+        print(f"Gremlin: Invalid instruction (missing command) for task {task_ids}. Skipping.")
+        for task in tasks:
+            queue.ack(task, {'status': 'invalid'})
+        return
+
+    print(f"Gremlin: Executing task {task_ids} with command: {command}")
+    result = {}
+    start = time.time()
     try:
-        # Always pass the command as a single string when shell=True
-        process = subprocess.run(command, shell=True, capture_output=True, text=True, encoding='utf-8')
+        with contextlib.ExitStack() as leases:
+            for task in tasks:
+                leases.enter_context(queue.keep_alive(task))
+            process = subprocess.run(command, capture_output=True, text=True, encoding='utf-8')
         result['stdout'] = process.stdout
         result['stderr'] = process.stderr
         result['returncode'] = process.returncode
@@ -31,62 +146,52 @@ def execute_task(task_id, command):
     except Exception as e:
         result['status'] = 'error'
         result['stderr'] = str(e)
-    finally:
-        result['timestamp'] = datetime.datetime.now().isoformat()
-        write_result(result)
-        print(f"Gremlin: Task {task_id} finished with status: {result['status']}")
-
-def write_result(result):
-    results = []
-    if os.path.exists(RESULT_FILE):
-        try:
-            with open(RESULT_FILE, 'r', encoding='utf-8') as f:
-                results = json.load(f)
-        except json.JSONDecodeError:
-            pass # File might be empty or corrupted, start fresh
-    
-    results.append(result)
-    with open(RESULT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2)
-
-def gremlin_loop():
-    print("Gremlin: Starting instruction loop...")
-    while True:
-        print(f"Gremlin: Checking for instructions at {INSTRUCTION_FILE}")
-        if os.path.exists(INSTRUCTION_FILE):
-            try:
-                with open(INSTRUCTION_FILE, 'r', encoding='utf-8') as f:
-                    instructions = json.load(f)
-                
-                if instructions:
-                    # Take the first instruction
-                    instruction = instructions.pop(0)
-                    task_id = instruction.get('task_id', 'unknown')
-                    command = instruction.get('command')
-
-                    if command:
-                        # Write remaining instructions back to file
-                        with open(INSTRUCTION_FILE, 'w', encoding='utf-8') as f:
-                            json.dump(instructions, f, indent=2)
-                        
-                        # Execute task in a new thread to keep the loop responsive
-                        task_thread = threading.Thread(target=execute_task, args=(task_id, command))
-                        task_thread.start()
-                    else:
-                        print(f"Gremlin: Invalid instruction (missing command) for task {task_id}. Skipping.")
-                        # If invalid, still remove it from the queue
-                        with open(INSTRUCTION_FILE, 'w', encoding='utf-8') as f:
-                            json.dump(instructions, f, indent=2)
-                else:
-                    # Instruction file is empty, delete it
-                    os.remove(INSTRUCTION_FILE)
-            except json.JSONDecodeError:
-                print("Gremlin: Error decoding instruction file. Deleting to prevent loop.")
-                os.remove(INSTRUCTION_FILE)
-            except Exception as e:
-                print(f"Gremlin: An unexpected error occurred: {e}")
-        
-        time.sleep(1) # Check for new instructions every second
+    run_seconds = time.time() - start
+
+    depth = queue.depth()
+    run_metrics = {
+        'worker': WORKER_ID,
+        'kind': tasks[0]['kind'],
+        'tasks': len(tasks),
+        'hashtags': len(merged_hashtags(tasks)) if tasks[0]['kind'] == UPDATE_KIND else None,
+        'run_seconds': round(run_seconds, 3),
+        'queue_depth': sum(count for statuses in depth.values() for status, count in statuses.items() if status == 'queued'),
+        'status': result['status'],
+    }
+    print(f"[METRICS] {json.dumps(run_metrics)}")
+    for task in tasks:
+        metrics = dict(run_metrics, wait_seconds=round(start - task['created_at'], 3), attempt=task['attempts'])
+        task_result = dict(result, metrics=metrics)
+        if result['status'] == 'completed':
+            queue.ack(task, task_result)
+        else:
+            queue.nack(task, task_result)
+    print(f"Gremlin: Task {task_ids} finished with status: {result['status']}")
+
+def import_legacy_instructions(queue, path=INSTRUCTION_FILE):
+    """Moves tasks left in the old JSON instruction file into the queue and removes the file."""
+    if not os.path.exists(path):
+        return
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            instructions = json.load(f)
+    except json.JSONDecodeError:
+        instructions = []
+    imported = 0
+    for instruction in instructions:
+        if instruction.get('command'):
+            queue.enqueue({'command': instruction['command']}, task_id=instruction.get('task_id'), ring=False)
+            imported += 1
+    os.remove(path)
+    print(f"Gremlin: Imported {imported} tasks from {path}.")
+
+def gremlin_loop(queue=None, workers=DEFAULT_WORKERS):
+    queue = queue or TaskQueue()
+    import_legacy_instructions(queue)
+    Gremlin(queue, workers).run()
 
 if __name__ == "__main__":
-    gremlin_loop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run queued LearnGraph tasks.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of tasks to run at a time.")
+    args = parser.parse_args()
+    gremlin_loop(workers=max(args.workers, 1))
@@ -0,0 +1,126 @@
+"""
+Live data_updated pushes for open reports.
+
+The report page listens on the api_server's Socket.IO channel for
+data_updated events ({hashtag, bluesky_hotness, youtube_data,
+youtube_hotness}). Payloads are POSTed to the server's /data_updated
+endpoint, which emits them to every connected page. make-html.py --watch
+pushes what changed in the data files; update_social_data.py pushes each
+hashtag as soon as its scrape finishes, through LiveUpdatePublisher.
+"""
+
+import json
+import urllib.request
+import urllib.error
+from datetime import datetime
+
+from report_data import format_hashtag_for_display, hotness_levels
+
+NOTIFY_URL = 'http://127.0.0.1:5000/data_updated'
+
+def notify_data_updated(updates, url=NOTIFY_URL, timeout=5):
+    """POSTs data_updated payloads to the api_server, which emits them to the open report pages.
+
+    Returns True if the server accepted them. A server that is not running is
+    not an error: the report file on disk is still up to date.
+    """
+    if not updates:
+        return True
+    body = json.dumps({'updates': updates}).encode('utf-8')
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'}, method='POST')
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return 200 <= response.status < 300
+    except (urllib.error.URLError, OSError) as e:
+        print(f"[DEBUG] Could not push {len(updates)} updates to {url}: {e}")
+        return False
+
+class LiveUpdatePublisher:
+    """Pushes per-hashtag deltas while an update run is still fetching.
+
+    Starts from what the store holds and folds in each finished job's result:
+    a Bluesky job's new posts are added to that hashtag's stored daily counts
+    (they are only inserted at the end of the run), a YouTube job's summary
+    replaces the stored one. Hotness levels are recomputed across all
+    hashtags with the report's quartile rules, and every hashtag whose
+    payload changed is pushed, so a shift in the quartiles reaches the other
+    rows too. Use on_result as the fetch scheduler's on_result callback.
+
+    The first failed push disables the publisher for the rest of the run, so a
+    missing api_server costs one short timeout rather than one per job.
+    """
+
+    def __init__(self, store, url=NOTIFY_URL, timeout=2):
+        self.store = store
+        self.url = url
+        self.timeout = timeout
+        self.enabled = True
+        self.pushed = 0
+        self.max_daily_posts = {format_hashtag_for_display(hashtag): count
+                                for hashtag, count in store.max_daily_post_counts().items()}
+        self.youtube = {format_hashtag_for_display(row['hashtag']): row for row in store.rows('youtube_analytics')}
+        self.payloads = self._payloads()
+
+    def _payloads(self):
+        bluesky_levels = hotness_levels(self.max_daily_posts) if self.max_daily_posts else {}
+        views = {hashtag: row.get('total_views') or 0 for hashtag, row in self.youtube.items()}
+        population = [row['total_views'] for row in self.youtube.values() if row.get('total_views') is not None]
+        youtube_levels = hotness_levels(views, population=population) if population else {}
+        return {
+            hashtag: {
+                'hashtag': hashtag,
+                'bluesky_hotness': bluesky_levels.get(hashtag, -1),
+                'youtube_data': self.youtube.get(hashtag) if population else None,
+                'youtube_hotness': youtube_levels.get(hashtag, -1),
+            }
+            for hashtag in set(self.max_daily_posts) | set(self.youtube)
+        }
+
+    def add_bluesky_posts(self, hashtag, new_posts):
+        new_counts = {}
+        for post in new_posts:
+            created_at = post.get('created_at')
+            try:
+                date = str(datetime.fromisoformat(created_at.replace('Z', '+00:00')).date()) if created_at else None
+            except ValueError:
+                date = None
+            if date:
+                new_counts[date] = new_counts.get(date, 0) + 1
+        if not new_counts:
+            return
+        counts = self.store.daily_post_counts(hashtag)
+        for date, count in new_counts.items():
+            counts[date] = counts.get(date, 0) + count
+        self.max_daily_posts[format_hashtag_for_display(hashtag)] = max(counts.values())
+
+    def add_youtube_summary(self, summary):
+        if summary:
+            self.youtube[format_hashtag_for_display(summary['hashtag'])] = summary
+
+    def on_result(self, key, result):
+        """Folds one finished job's result into the live state and pushes what changed."""
+        platform, hashtag = key
+        if platform == 'Bluesky' and result:
+            self.add_bluesky_posts(hashtag, result)
+        elif platform == 'YouTube' and result:
+            for summary in (result.values() if hashtag is None else [result]):
+                self.add_youtube_summary(summary)
+        else:
+            return
+        self.publish()
+
+    def publish(self):
+        payloads = self._payloads()
+        changed = [payload for hashtag, payload in sorted(payloads.items()) if self.payloads.get(hashtag) != payload]
+        self.payloads = payloads
+        if not changed or not self.enabled:
+            return
+        if notify_data_updated(changed, self.url, self.timeout):
+            self.pushed += len(changed)
+        else:
+            print("[DEBUG] Live updates disabled for the rest of this run.")
+            self.enabled = False
+
+    def report(self):
+        if self.pushed:
+            print(f"[INFO] Pushed {self.pushed} live hashtag updates to {self.url}.")
@@ -6,13 +6,52 @@ import datetime
 import argparse
 import time
 import subprocess # Added for running update_social_data.py
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from jinja2 import Environment, FileSystemLoader # Import Jinja2
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 import json
-from collections import defaultdict
 import numpy as np
 
+from response_cache import add_cache_arguments, cache_arguments
+from report_watch import ReportWatcher, content_hash
+from live_updates import NOTIFY_URL, notify_data_updated
+from file_lock import atomic_write_text
+from report_data import (
+    format_hashtag_for_display,
+    read_analytics_data,
+    read_bluesky_analytics,
+    read_config,
+    read_reddit_analytics_data,
+    read_youtube_analytics_data,
+)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(SCRIPT_DIR, '..', 'templates')
+TEMPLATE_CACHE_DIR = os.path.join(SCRIPT_DIR, '..', 'data', 'template_cache')
+BLUESKY_CSV_PATH = os.path.join(SCRIPT_DIR, '..', 'data', 'BlueskyAnalytics.csv')
+
+# Hashed data files of shell reports (see write_report_data) and how pages and summaries reference them.
+DATA_FILE_PATTERN = re.compile(r'(?:report|hashtag)-[0-9a-f]{16}\.js')
+REPORT_SCRIPT_PATTERN = re.compile(r'data/(report-[0-9a-f]{16}\.js)')
+HASHTAG_SCRIPT_PATTERN = re.compile(r'data/(hashtag-[0-9a-f]{16}\.js)')
+# Unreferenced data files younger than this are kept by prune_report_data().
+DATA_FILE_GRACE_SECONDS = 600
+
+def create_template_environment(template_dir=TEMPLATE_DIR, cache_dir=TEMPLATE_CACHE_DIR):
+    """Returns the Jinja2 environment shared by every render in this process.
+
+    Compiled templates are kept in memory and re-checked against the template
+    file's mtime on each lookup (auto_reload), so a template is only recompiled
+    after it changes. The compiled bytecode is also stored in cache_dir, so a
+    fresh process skips the compile step until the template changes.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        bytecode_cache=FileSystemBytecodeCache(cache_dir),
+        auto_reload=True
+    )
+
+TEMPLATE_ENV = create_template_environment()
+
 def parse_csv_table(csv_path):
     with open(csv_path, 'r', encoding='utf-8') as f:
         reader = csv.reader(f)
@@ -35,130 +74,38 @@ def parse_md_table(md_path):
         rows.append(cells)
     return headers, rows
 
-def read_analytics_data(csv_path):
-    daily_posts = defaultdict(list)
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['metric'] == 'daily_posts':
-                    hashtag = format_hashtag_for_display(row['hashtag'])
-                    value = int(row['value'])
-                    daily_posts[hashtag].append(value)
-        
-        # Calculate hotness based on quantiles
-        all_max_posts = [max(posts) for posts in daily_posts.values() if posts]
-        if not all_max_posts:
-            return {}, 0, {}
-
-        quantiles = np.percentile(all_max_posts, [25, 50, 75])
-        hotness_levels = {}
-        for hashtag, posts in daily_posts.items():
-            max_posts = max(posts) if posts else 0
-            if max_posts <= quantiles[0]:
-                hotness_levels[hashtag] = 0  # Low
-            elif max_posts <= quantiles[1]:
-                hotness_levels[hashtag] = 1  # Medium
-            elif max_posts <= quantiles[2]:
-                hotness_levels[hashtag] = 2  # High
-            else:
-                hotness_levels[hashtag] = 3  # Very High
-
-        print(f"[DEBUG] Loaded Bluesky analytics data for {len(daily_posts)} hashtags.")
-        return daily_posts, max(all_max_posts), hotness_levels
-
-    except FileNotFoundError:
-        print(f"[WARNING] Bluesky Analytics CSV file not found: {csv_path}. Proceeding without Bluesky analytics.")
-        return {}, 0, {}
-    except Exception as e:
-        print(f"[ERROR] Error reading Bluesky analytics CSV: {e}")
-        return {}, 0, {}
-
-def read_reddit_analytics_data(csv_path):
-    reddit_analytics_data = {}
-    max_subscribers = 0
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                subreddit = row.get('subreddit')
-                subscribers_str = row.get('subscribers')
-                if subreddit and subscribers_str and subscribers_str.isdigit():
-                    subscribers = int(subscribers_str)
-                    reddit_analytics_data[subreddit] = subscribers
-                    if subscribers > max_subscribers:
-                        max_subscribers = subscribers
-        print(f"[DEBUG] Loaded Reddit analytics data for {len(reddit_analytics_data)} subreddits. Max subscribers: {max_subscribers}")
-    except FileNotFoundError:
-        print(f"[WARNING] Reddit Analytics CSV file not found: {csv_path}. Proceeding without Reddit analytics.")
-    except Exception as e:
-        print(f"[ERROR] Error reading Reddit analytics CSV: {e}")
-    return reddit_analytics_data, max_subscribers
-
-def read_youtube_analytics_data(csv_path):
-    youtube_analytics_data = {}
-    hotness_levels = {}
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            all_views = [int(row['total_views']) for row in reader if row.get('total_views') and row['total_views'].isdigit()]
-            f.seek(0) # Reset file pointer
-            next(reader) # Skip header
-            if not all_views:
-                return {}, {}
-
-            quantiles = np.percentile(all_views, [25, 50, 75])
-            for row in reader:
-                hashtag = format_hashtag_for_display(row.get('hashtag'))
-                if hashtag:
-                    youtube_analytics_data[hashtag] = row
-                    views_str = row.get('total_views', '0')
-                    views = int(views_str) if views_str.isdigit() else 0
-                    if views <= quantiles[0]:
-                        hotness_levels[hashtag] = 0  # Low
-                    elif views <= quantiles[1]:
-                        hotness_levels[hashtag] = 1  # Medium
-                    elif views <= quantiles[2]:
-                        hotness_levels[hashtag] = 2  # High
-                    else:
-                        hotness_levels[hashtag] = 3  # Very High
-
-        print(f"[DEBUG] Loaded YouTube analytics data for {len(youtube_analytics_data)} hashtags.")
-    except FileNotFoundError:
-        print(f"[WARNING] YouTube Analytics CSV file not found: {csv_path}. Proceeding without YouTube analytics.")
-    except Exception as e:
-        print(f"[ERROR] Error reading YouTube analytics CSV: {e}")
-    return youtube_analytics_data, hotness_levels
-
 def load_config(config_path):
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def format_hashtag_for_display(hashtag_raw):
-    """Formats a raw hashtag string for display, preserving camelCase but ensuring initial capitalization."""
-    if not hashtag_raw:
-        return ""
-    # Capitalize the first letter, and keep the rest as is (preserving camelCase)
-    return hashtag_raw[0].upper() + hashtag_raw[1:]
-
-def generate_html(headers, rows, out_path, analytics_data, max_daily_posts, hotness_levels, reddit_analytics_data, max_subscribers, youtube_analytics_data, youtube_hotness_levels, config):
-    # Set up Jinja2 environment
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.join(script_dir, '..')
-    template_dir = os.path.join(project_root, 'templates')
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template('report_template.html')
+    return read_config(config_path)
+
+def column_labels(headers):
+    """Returns (labels, classes) per column: the header without its link marker, and that label without spaces."""
+    labels = [header.replace(' 🔗', '') for header in headers]
+    return labels, [label.replace(' ', '') for label in labels]
+
+def final_subreddit_statuses(config):
+    """Returns {display hashtag: subreddit status} for every configured hashtag ('Exists' unless the config says otherwise)."""
+    return {
+        format_hashtag_for_display(hashtag): config['subreddit_status'].get(format_hashtag_for_display(hashtag), 'Exists')
+        for hashtag in config.get('hashtags', [])
+    }
+
+def generate_html(headers, rows, out_path, analytics_data, max_daily_posts, hotness_levels, reddit_analytics_data, max_subscribers, youtube_analytics_data, youtube_hotness_levels, config, data_script=None):
+    """Renders the report to out_path.
 
-    # Create a comprehensive subreddit_status for all hashtags
-    final_subreddit_status = {}
-    for hashtag_raw in config.get('hashtags', []):
-        hashtag_display = format_hashtag_for_display(hashtag_raw)
-        # Use existing status from config, or default to 'Exists'
-        final_subreddit_status[hashtag_display] = config['subreddit_status'].get(hashtag_display, 'Exists')
+    By default the page's script data is inlined. With data_script (a path
+    relative to out_path, see write_report_data) the page only references it.
+    """
+    start_time = time.perf_counter()
+    template = TEMPLATE_ENV.get_template('report_template.html')
+
+    final_subreddit_status = final_subreddit_statuses(config)
+    labels, column_classes = column_labels(headers)
 
     # Render the template with data
     html = template.render(
         headers=headers,
+        column_labels=labels,
+        column_classes=column_classes,
         rows=rows,
         analytics_data=analytics_data,
         max_daily_posts=max_daily_posts,
@@ -168,14 +115,116 @@ def generate_html(headers, rows, out_path, analytics_data, max_daily_posts, hotn
         youtube_analytics_data=youtube_analytics_data,
         youtube_hotness_levels=youtube_hotness_levels,
         reddit_status_colors=config['reddit_status_colors'],
-        subreddit_status=final_subreddit_status # Pass the comprehensive status
+        subreddit_status=final_subreddit_status, # Pass the comprehensive status
+        data_script=data_script
     )
+    render_seconds = time.perf_counter() - start_time
 
     with open(out_path, 'w', encoding='utf-8') as f:
         f.write(html)
+    print(f"[INFO] Rendered {len(rows)} hashtags in {render_seconds * 1000:.1f} ms.")
     print(f"HTML written to: {out_path}")
 
-def generate_report(args, config):
+def hashtag_details(rows, bluesky_csv_path, youtube_analytics_data):
+    """Returns {display hashtag: detail} with the data the expanded view loads on demand."""
+    bluesky = {format_hashtag_for_display(hashtag): entry for hashtag, entry in read_bluesky_analytics(bluesky_csv_path).items()}
+    details = {}
+    for row in rows:
+        hashtag = row[0]
+        entry = bluesky.get(hashtag, {})
+        details[hashtag] = {
+            'daily': sorted(entry.get('daily', {}).items()),
+            'top_poster_activity': entry.get('top_poster_activity', []),
+            'top_poster_engagement': entry.get('top_poster_engagement', []),
+            'youtube': youtube_analytics_data.get(hashtag),
+        }
+    return details
+
+def write_hashed_script(data_dir, prefix, script):
+    """Writes script to data_dir/<prefix>-<content hash>.js unless that file exists, and returns its name.
+
+    An existing file is touched instead, so prune_report_data() treats it as new.
+    """
+    name = f"{prefix}-{content_hash(script)[:16]}.js"
+    path = os.path.join(data_dir, name)
+    if os.path.exists(path):
+        os.utime(path)
+    else:
+        atomic_write_text(path, script, mode=0o644)
+    return name
+
+def referenced_data_files(paths, pattern):
+    """Returns the data file names that pattern finds in the given files."""
+    names = set()
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                names.update(pattern.findall(f.read()))
+        except OSError:
+            continue
+    return names
+
+def prune_report_data(report_dir, grace_seconds=DATA_FILE_GRACE_SECONDS):
+    """Deletes the hashed data files in report_dir/data that no report page references any more.
+
+    Pages reference report-*.js files and those reference hashtag-*.js files.
+    Files changed within grace_seconds are kept, so a report another process
+    is still writing does not lose its data. Returns the number of deleted files.
+    """
+    data_dir = os.path.join(report_dir, 'data')
+    if not os.path.isdir(data_dir):
+        return 0
+    pages = [os.path.join(report_dir, name) for name in os.listdir(report_dir) if name.endswith('.html')]
+    reports = referenced_data_files(pages, REPORT_SCRIPT_PATTERN)
+    hashtags = referenced_data_files([os.path.join(data_dir, name) for name in reports], HASHTAG_SCRIPT_PATTERN)
+    referenced = reports | hashtags
+
+    removed = 0
+    cutoff = time.time() - grace_seconds
+    for name in os.listdir(data_dir):
+        if name in referenced or not DATA_FILE_PATTERN.fullmatch(name):
+            continue
+        path = os.path.join(data_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        print(f"[INFO] Removed {removed} report data files no report references.")
+    return removed
+
+def write_report_data(inputs, out_path):
+    """Writes the data files of a shell report next to out_path and returns the summary script's relative path.
+
+    The summary script (hotness levels, YouTube data, subreddit statuses and
+    the name of each hashtag's detail script) loads with the page; a hashtag's
+    detail script (daily series, top posters) only loads when its row is
+    expanded. Files are named by content hash, so they can be cached forever
+    and unchanged data is not rewritten; prune_report_data() deletes them
+    once no page in the report directory references them. They are scripts
+    rather than JSON because browsers block fetch() on reports opened from disk.
+    """
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(out_path)), 'data')
+    os.makedirs(data_dir, exist_ok=True)
+
+    details = {}
+    for hashtag, detail in hashtag_details(inputs['rows'], BLUESKY_CSV_PATH, inputs['youtube_analytics_data']).items():
+        script = f"window.learnGraphReportDetail({json.dumps(hashtag)}, {json.dumps(detail, cls=NpEncoder)});\n"
+        details[hashtag] = 'data/' + write_hashed_script(data_dir, 'hashtag', script)
+
+    summary = {
+        'hotness_levels': inputs['hotness_levels'],
+        'youtube_analytics_data': inputs['youtube_analytics_data'],
+        'subreddit_status': final_subreddit_statuses(inputs['config']),
+        'details': details,
+    }
+    script = f"window.learnGraphReportData = {json.dumps(summary, cls=NpEncoder)};\n"
+    return 'data/' + write_hashed_script(data_dir, 'report', script)
+
+def build_report_inputs(config):
+    """Returns the keyword arguments of generate_html() (all but out_path) for the current config and data files."""
     hashtags = config.get('hashtags', [])
     platform_url_templates = config.get('platform_url_templates', {})
     headers = ['Hashtag'] + list(platform_url_templates.keys())
@@ -187,40 +236,108 @@ def generate_report(args, config):
             row.append(url)
         rows.append(row)
 
-    # Read analytics data
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.join(script_dir, '..')
-    bluesky_analytics_csv_path = os.path.join(project_root, 'data', 'BlueskyAnalytics.csv')
-    analytics_data, max_daily_posts, hotness_levels = read_analytics_data(bluesky_analytics_csv_path)
-
-    reddit_analytics_csv_path = os.path.join(project_root, 'data', 'RedditAnalytics.csv')
-    reddit_analytics_data, max_subscribers = read_reddit_analytics_data(reddit_analytics_csv_path)
-
-    youtube_analytics_csv_path = os.path.join(project_root, 'data', 'YouTubeAnalytics.csv')
-    youtube_analytics_data, youtube_hotness_levels = read_youtube_analytics_data(youtube_analytics_csv_path)
-
-    print(f"[DEBUG] Bluesky Analytics Data passed to template: {analytics_data}")
-    print(f"[DEBUG] Max Daily Posts passed to template: {max_daily_posts}")
-    print(f"[DEBUG] Reddit Analytics Data passed to template: {reddit_analytics_data}")
-    print(f"[DEBUG] YouTube Analytics Data passed to template: {youtube_analytics_data}")
-    print(f"[DEBUG] Hotness Levels: {hotness_levels}")
-    print(f"[DEBUG] YouTube Hotness Levels: {youtube_hotness_levels}")
-    print(f"[DEBUG] Subreddit Status: {config['subreddit_status']}")
-
-    # Create the output directory if it doesn't exist
-    output_dir = os.path.join(project_root, 'reports')
-    out_dir = os.path.dirname(args.output) if args.output else output_dir
-    os.makedirs(out_dir, exist_ok=True)
-
+    # Read analytics data (each loader skips files that have not changed since its last call)
+    data_dir = os.path.join(SCRIPT_DIR, '..', 'data')
+    analytics_data, max_daily_posts, hotness_levels = read_analytics_data(os.path.join(data_dir, 'BlueskyAnalytics.csv'))
+    reddit_analytics_data, max_subscribers = read_reddit_analytics_data(os.path.join(data_dir, 'RedditAnalytics.csv'))
+    youtube_analytics_data, youtube_hotness_levels = read_youtube_analytics_data(os.path.join(data_dir, 'YouTubeAnalytics.csv'))
+
+    return {
+        'headers': headers,
+        'rows': rows,
+        'analytics_data': analytics_data,
+        'max_daily_posts': max_daily_posts,
+        'hotness_levels': hotness_levels,
+        'reddit_analytics_data': reddit_analytics_data,
+        'max_subscribers': max_subscribers,
+        'youtube_analytics_data': youtube_analytics_data,
+        'youtube_hotness_levels': youtube_hotness_levels,
+        'config': config,
+    }
+
+def report_output_path(args, timestamped=True):
+    """Returns args.output, or a report path in reports/ (timestamped unless timestamped is False), creating its directory."""
+    output_dir = os.path.join(SCRIPT_DIR, '..', 'reports')
     if args.output:
         out_file = args.output
-    else:
-        base = 'HashtagReport'
+    elif timestamped:
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M")
-        out_file = os.path.join(output_dir, f"{base}_{timestamp}.html")
+        out_file = os.path.join(output_dir, f"HashtagReport_{timestamp}.html")
+    else:
+        out_file = os.path.join(output_dir, "HashtagReport.html")
+    os.makedirs(os.path.dirname(os.path.abspath(out_file)), exist_ok=True)
+    return out_file
 
-    generate_html(headers, rows, out_file, analytics_data, max_daily_posts, hotness_levels, reddit_analytics_data, max_subscribers, youtube_analytics_data, youtube_hotness_levels, config)
+def generate_report(args, config):
+    inputs = build_report_inputs(config)
+
+    print(f"[DEBUG] Bluesky Analytics Data passed to template: {inputs['analytics_data']}")
+    print(f"[DEBUG] Max Daily Posts passed to template: {inputs['max_daily_posts']}")
+    print(f"[DEBUG] Reddit Analytics Data passed to template: {inputs['reddit_analytics_data']}")
+    print(f"[DEBUG] YouTube Analytics Data passed to template: {inputs['youtube_analytics_data']}")
+    print(f"[DEBUG] Hotness Levels: {inputs['hotness_levels']}")
+    print(f"[DEBUG] YouTube Hotness Levels: {inputs['youtube_hotness_levels']}")
+    print(f"[DEBUG] Subreddit Status: {config['subreddit_status']}")
 
+    out_path = report_output_path(args)
+    data_script = write_report_data(inputs, out_path) if args.shell else None
+    generate_html(out_path=out_path, data_script=data_script, **inputs)
+    prune_report_data(os.path.dirname(os.path.abspath(out_path)))
+
+def hashtag_updates(inputs):
+    """Returns {hashtag: data_updated payload} in the shape the report page's Socket.IO handler expects."""
+    youtube_analytics_data = inputs['youtube_analytics_data']
+    return {
+        row[0]: {
+            'hashtag': row[0],
+            'bluesky_hotness': inputs['hotness_levels'].get(row[0], -1),
+            'youtube_data': youtube_analytics_data.get(row[0]),
+            'youtube_hotness': inputs['youtube_hotness_levels'].get(row[0], -1),
+        }
+        for row in inputs['rows']
+    }
+
+class ReportRegenerator:
+    """Change callback for --watch: keeps one report file current and pushes per-hashtag changes.
+
+    The report is re-rendered only when the content hash of its inputs (config,
+    loaded data and template source) changes, always to the same file, and the
+    hashtags whose cells changed are pushed to the open pages as data_updated
+    events through the api_server.
+    """
+
+    def __init__(self, config_path, out_path, notify_url=NOTIFY_URL, shell=False):
+        self.config_path = config_path
+        self.out_path = out_path
+        self.notify_url = notify_url
+        self.shell = shell
+        self.template_path = os.path.join(TEMPLATE_DIR, 'report_template.html')
+        self.inputs_hash = None
+        self.updates = {}
+
+    def __call__(self, sources=('config', 'template', 'bluesky', 'reddit', 'youtube')):
+        print(f"\n[INFO] Inputs changed: {', '.join(sorted(sources))}.")
+        inputs = build_report_inputs(load_config(self.config_path))
+        with open(self.template_path, 'r', encoding='utf-8') as f:
+            template_source = f.read()
+        # A shell report also carries the top posters, which the other inputs do not include.
+        details_source = read_bluesky_analytics(BLUESKY_CSV_PATH) if self.shell else None
+        inputs_hash = content_hash(inputs, template_source, details_source)
+        if inputs_hash == self.inputs_hash:
+            print("[DEBUG] Report inputs unchanged; not re-rendering.")
+            return
+        first_run = self.inputs_hash is None
+        self.inputs_hash = inputs_hash
+        data_script = write_report_data(inputs, self.out_path) if self.shell else None
+        generate_html(out_path=self.out_path, data_script=data_script, **inputs)
+        prune_report_data(os.path.dirname(os.path.abspath(self.out_path)))
+
+        updates = hashtag_updates(inputs)
+        changed = [payload for hashtag, payload in updates.items() if self.updates.get(hashtag) != payload]
+        self.updates = updates
+        if changed and not first_run:
+            print(f"[INFO] Pushing updates for {len(changed)} hashtags to open reports.")
+            notify_data_updated(json.loads(json.dumps(changed, cls=NpEncoder)), self.notify_url)
 
 class NpEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -233,16 +350,6 @@ class NpEncoder(json.JSONEncoder):
         return super(NpEncoder, self).default(obj)
 
 
-class MyEventHandler(FileSystemEventHandler):
-    def __init__(self, args, config):
-        self.args = args
-        self.config = config
-
-    def on_modified(self, event):
-        if not event.is_directory and event.src_path == self.args.input:
-            print(f"\nFile modified: {event.src_path}. Regenerating...")
-            generate_report(self.args, self.config)
-
 def main():
     # Get the absolute path of the script and project root
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -259,7 +366,17 @@ def main():
     parser.add_argument(
         "--watch",
         action="store_true",
-        help="Watch the input file for changes and regenerate the HTML automatically."
+        help="Watch config.json, the data CSVs and the templates, keep reports/HashtagReport.html (or --output) current and push changes to open reports."
+    )
+    parser.add_argument(
+        "--notify-url",
+        default=NOTIFY_URL,
+        help="api_server endpoint that relays data_updated events to open reports in --watch mode."
+    )
+    parser.add_argument(
+        "--shell",
+        action="store_true",
+        help="Write a small report page that loads its data from content-hashed files in a data/ directory next to it; per-hashtag details load when a row is expanded."
     )
     parser.add_argument(
         "--update-data",
@@ -276,6 +393,7 @@ def main():
         "--hashtag",
         help="Process only a specific hashtag when updating data."
     )
+    add_cache_arguments(parser)
     args = parser.parse_args()
 
     config = load_config(config_path)
@@ -286,14 +404,15 @@ def main():
         update_command = [sys.executable, update_script_path]
         if args.hashtag:
             update_command.extend(['--hashtag', args.hashtag])
+        update_command.extend(cache_arguments(args))
         subprocess.run(update_command)
 
     if args.watch:
-        print(f"Watching {config_path} for changes... Press Ctrl+C to stop.")
-        event_handler = MyEventHandler(args, config)
-        observer = Observer()
-        observer.schedule(event_handler, os.path.dirname(config_path), recursive=False)
-        observer.start()
+        regenerate = ReportRegenerator(config_path, report_output_path(args, timestamped=False), args.notify_url, args.shell)
+        regenerate()
+        watcher = ReportWatcher(config_path, os.path.join(project_root, 'data'), TEMPLATE_DIR, regenerate)
+        print(f"Watching {config_path}, the data CSVs and the templates for changes... Press Ctrl+C to stop.")
+        watcher.start()
         try:
             start_time = time.time()
             while True:
@@ -304,10 +423,10 @@ def main():
         except KeyboardInterrupt:
             pass
         finally:
-            observer.stop()
-            observer.join()
+            watcher.stop()
     else:
-        generate_report(args, config)
+        # Reloaded in case the update run changed it (e.g. subreddit statuses).
+        generate_report(args, load_config(config_path))
 
 if __name__ == "__main__":
     main()
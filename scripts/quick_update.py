@@ -8,31 +8,26 @@ Use this for routine maintenance and quick insights.
 """
 
 import argparse
-import json
 import os
 import sys
 from datetime import datetime
 import subprocess
 
+from config_store import read_config
+from refresh_tiers import due_hashtags, mark_refreshed, plan_refresh
+from response_cache import add_cache_arguments, cache_arguments
+
 def load_config():
     """Load configuration from config.json"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(script_dir, '..', 'config.json')
-    with open(config_path, 'r') as f:
-        return json.load(f)
+    return read_config()
 
 def get_top_hashtags(limit=5):
-    """Get top performing hashtags based on recent activity"""
-    config = load_config()
-    # These are the consistently high-performing hashtags based on your data
-    top_hashtags = [
-        'Education',      # 131 posts/day peak
-        'EdTech',         # 84 posts/day peak  
-        'teachers',       # 48 posts/day peak
-        'AIinEducation',  # 19 posts/day peak
-        'LifelongLearning' # 19 posts/day peak
-    ]
-    return top_hashtags[:limit]
+    """Get top performing hashtags, ranked by recent Bluesky momentum and YouTube views"""
+    return [item['hashtag'] for item in plan_refresh(load_config())[:limit]]
+
+def get_due_hashtags(limit=5):
+    """Get the hashtags whose refresh tier says they are due, hottest first"""
+    return due_hashtags(plan_refresh(load_config()), limit)
 
 def quick_report_only():
     """Generate report without updating data"""
@@ -50,24 +45,30 @@ def quick_report_only():
         print(f"❌ Error generating report: {result.stderr}")
         return False
 
-def targeted_update(hashtags):
-    """Update only specific high-value hashtags"""
+def targeted_update(hashtags, cache_args=()):
+    """Update only specific high-value hashtags, all in one update_social_data.py run"""
+    if not hashtags:
+        print("💤 No hashtags are due for a refresh.")
+        return True
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
     update_script = os.path.join(script_dir, 'update_social_data.py')
     
-    print(f"🎯 Updating {len(hashtags)} high-priority hashtags...")
-    
-    for hashtag in hashtags:
-        print(f"  📊 Processing #{hashtag}...")
-        result = subprocess.run([sys.executable, update_script, '--hashtag', hashtag],
-                              capture_output=True, text=True, timeout=120)
-        
-        if result.returncode == 0:
-            print(f"  ✅ #{hashtag} updated")
-        else:
-            print(f"  ⚠️  #{hashtag} failed (continuing...)")
-    
-    return True
+    print(f"🎯 Updating {len(hashtags)} high-priority hashtags: {', '.join('#' + hashtag for hashtag in hashtags)}")
+    # One process shares the scraper clients, the fetch scheduler and the YouTube/Reddit batches across all tags.
+    try:
+        result = subprocess.run([sys.executable, update_script, '--hashtag', *hashtags, *cache_args],
+                              capture_output=True, text=True, timeout=120 * len(hashtags))
+    except subprocess.TimeoutExpired:
+        print("  ⚠️  Update timed out")
+        return False
+
+    if result.returncode == 0:
+        mark_refreshed(hashtags)
+        print(f"  ✅ {len(hashtags)} hashtags updated")
+        return True
+    print(f"  ⚠️  Update failed: {result.stderr.strip()[-500:]}")
+    return False
 
 def show_status():
     """Show current project status and key metrics"""
@@ -105,10 +106,17 @@ def show_status():
             print(f"  ❌ {filename}: Missing")
     
     # Show top hashtags
-    top_hashtags = get_top_hashtags()
-    print(f"\n🔥 Top {len(top_hashtags)} Hashtags:")
-    for i, hashtag in enumerate(top_hashtags, 1):
-        print(f"  {i}. #{hashtag}")
+    plan = plan_refresh(config)
+    print(f"\n🔥 Top {min(len(plan), 5)} Hashtags (score = momentum + YouTube views):")
+    for i, item in enumerate(plan[:5], 1):
+        print(f"  {i}. #{item['hashtag']} [{item['tier']}] score {item['score']:.2f}, {item['momentum']} posts/day momentum, {item['youtube_views']} views")
+
+    print("\n⏱️  Refresh Tiers:")
+    for tier in dict.fromkeys(item['tier'] for item in plan):
+        items = [item for item in plan if item['tier'] == tier]
+        due = sum(item['due'] for item in items)
+        interval_hours = items[0]['interval'].total_seconds() / 3600
+        print(f"  {tier}: {len(items)} hashtags, every {interval_hours:g}h, {due} due now")
     
     # Show recent reports
     reports_dir = os.path.join(script_dir, '..', 'reports')
@@ -131,16 +139,20 @@ def main():
 Examples:
   python quick_update.py status              # Show current status
   python quick_update.py report              # Generate report only (fast)
-  python quick_update.py update              # Update top 5 hashtags only
-  python quick_update.py update --limit 3    # Update top 3 hashtags only
-  python quick_update.py full                # Update top hashtags + generate report
+  python quick_update.py update              # Update up to 5 hashtags that are due (hot tier first)
+  python quick_update.py update --limit 3    # Update up to 3 due hashtags
+  python quick_update.py update --force      # Update the top 5 hashtags whether due or not
+  python quick_update.py full                # Update due hashtags + generate report
         """
     )
     
     parser.add_argument('action', choices=['status', 'report', 'update', 'full'],
                        help='Action to perform')
     parser.add_argument('--limit', type=int, default=5,
-                       help='Number of top hashtags to update (default: 5)')
+                       help='Maximum number of hashtags to update (default: 5)')
+    parser.add_argument('--force', action='store_true',
+                       help='Update the top-ranked hashtags even if their refresh tier says they are not due')
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
     
@@ -154,14 +166,14 @@ Examples:
         quick_report_only()
     
     elif args.action == 'update':
-        top_hashtags = get_top_hashtags(args.limit)
-        targeted_update(top_hashtags)
-        print(f"✅ Updated {len(top_hashtags)} hashtags")
+        top_hashtags = get_top_hashtags(args.limit) if args.force else get_due_hashtags(args.limit)
+        if targeted_update(top_hashtags, cache_arguments(args)):
+            print(f"✅ Updated {len(top_hashtags)} hashtags")
     
     elif args.action == 'full':
-        top_hashtags = get_top_hashtags(args.limit)
+        top_hashtags = get_top_hashtags(args.limit) if args.force else get_due_hashtags(args.limit)
         print("Phase 1: Targeted data update...")
-        targeted_update(top_hashtags)
+        targeted_update(top_hashtags, cache_arguments(args))
         print("\nPhase 2: Generating report...")
         quick_report_only()
         print("✅ Full update complete!")
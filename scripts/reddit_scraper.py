@@ -4,7 +4,19 @@ from dotenv import load_dotenv
 import json
 import sys
 import time
-from prawcore.exceptions import PrawcoreException, ReadTimeout, RequestException
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from prawcore.exceptions import PrawcoreException, ReadTimeout, RequestException, NotFound, Forbidden, Redirect
+
+from config_store import read_config, update_config
+
+# Values used in config.json's subreddit_status / reddit_status_colors.
+STATUS_EXISTS = 'Exists'
+STATUS_NO_CONTENT = 'No Content'
+STATUS_PRIVATE = 'Private'
+STATUS_BANNED = 'Banned'
+STATUS_NON_EXISTENT = 'Non-existent'
+UNAVAILABLE_STATUSES = (STATUS_NON_EXISTENT, STATUS_BANNED, STATUS_PRIVATE)
 
 def get_reddit_client():
     load_dotenv()
@@ -87,17 +99,169 @@ def get_subreddit_data(reddit_client, subreddit_name, max_retries=3):
     print(f"[ERROR] Failed to fetch data for subreddit r/{subreddit_name} after {max_retries} attempts.", file=sys.stderr)
     return None
 
+def _wait_for_rate_limit(reddit_client, reserve, lock):
+    """Sleeps until the rate-limit window resets when fewer than reserve requests remain.
+
+    PRAW records Reddit's X-Ratelimit-* response headers in reddit.auth.limits.
+    """
+    with lock:
+        limits = reddit_client.auth.limits
+        remaining, reset_timestamp = limits.get('remaining'), limits.get('reset_timestamp')
+        if remaining is not None and reset_timestamp and remaining < reserve:
+            delay = max(0.0, reset_timestamp - time.time())
+            print(f"[DEBUG] Reddit rate limit nearly used ({remaining} requests left); waiting {delay:.0f}s.", file=sys.stderr)
+            time.sleep(delay)
+
+def _probe_missing_subreddit(reddit_client, subreddit_name):
+    """Works out why a subreddit is absent from the info endpoint (one about request)."""
+    try:
+        reddit_client.subreddit(subreddit_name)._fetch()
+        return STATUS_EXISTS
+    except Redirect:
+        return STATUS_NON_EXISTENT  # Reddit redirects unknown names to its subreddit search
+    except NotFound:
+        return STATUS_BANNED
+    except Forbidden:
+        return STATUS_PRIVATE
+    except PrawcoreException as e:
+        print(f"[ERROR] Could not check r/{subreddit_name}: {type(e).__name__}: {e}", file=sys.stderr)
+        return None
+
+def collect_subreddits(reddit_client, subreddit_names, max_workers=4, hot_limit=5):
+    """Fetches metadata and hot posts for many subreddits at once.
+
+    Subscribers and active users for every subreddit come from the info
+    endpoint, 100 names per request, instead of one lazy about request each.
+    Names the endpoint does not return are probed concurrently to tell banned
+    (404), private (403) and non-existent subreddits apart, and the hot
+    listings of the public ones are fetched concurrently, pausing when the
+    rate-limit headers say the window is nearly used up.
+
+    Returns (data, statuses): data maps each readable subreddit name to the
+    dict get_subreddit_data() returns, statuses maps every name to one of the
+    subreddit_status values (None if it could not be determined).
+    """
+    if not reddit_client:
+        print("[DEBUG] Reddit client not initialized, cannot fetch subreddit data.", file=sys.stderr)
+        return {}, {}
+    names = list(dict.fromkeys(subreddit_names))
+    by_key = {name.lower(): name for name in names}
+    found = {}
+    try:
+        for subreddit in reddit_client.info(subreddits=names):
+            name = by_key.get(subreddit.display_name.lower())
+            if name:
+                found[name] = subreddit
+    except PrawcoreException as e:
+        print(f"[WARNING] Bulk subreddit lookup failed, checking each subreddit instead: {type(e).__name__}: {e}", file=sys.stderr)
+    print(f"[DEBUG] Info endpoint returned {len(found)} of {len(names)} subreddits.", file=sys.stderr)
+
+    statuses = {}
+    # vars() reads the fields the info response filled in; attribute access
+    # would trigger a lazy about request for anything missing.
+    public = []
+    for name, subreddit in found.items():
+        if vars(subreddit).get('subreddit_type') == 'private':
+            statuses[name] = STATUS_PRIVATE
+        else:
+            public.append(name)
+
+    missing = [name for name in names if name not in found]
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for name, status in zip(missing, executor.map(lambda name: _probe_missing_subreddit(reddit_client, name), missing)):
+            statuses[name] = status
+            if status == STATUS_EXISTS:
+                found[name] = reddit_client.subreddit(name)
+                public.append(name)
+
+        def fetch_hot(name):
+            _wait_for_rate_limit(reddit_client, max_workers + 1, lock)
+            try:
+                return [{
+                    'title': submission.title,
+                    'score': submission.score,
+                    'num_comments': submission.num_comments,
+                    'created_utc': submission.created_utc
+                } for submission in found[name].hot(limit=hot_limit)]
+            except Forbidden:
+                statuses[name] = STATUS_PRIVATE
+            except NotFound:
+                statuses[name] = STATUS_BANNED
+            except PrawcoreException as e:
+                print(f"[ERROR] Could not fetch hot posts for r/{name}: {type(e).__name__}: {e}", file=sys.stderr)
+            return None
+
+        data = {}
+        for name, posts in zip(public, executor.map(fetch_hot, public)):
+            if posts is None:
+                continue
+            fields = vars(found[name])
+            data[name] = {
+                'subreddit': name,
+                'subscribers': fields.get('subscribers') or 0,
+                'active_user_count': fields.get('active_user_count') or fields.get('accounts_active') or 0,
+                'posts': posts
+            }
+            statuses[name] = STATUS_EXISTS if posts else STATUS_NO_CONTENT
+    print(f"[DEBUG] Collected {len(data)} subreddits; statuses: {statuses}", file=sys.stderr)
+    return data, statuses
+
+def update_subreddit_status(config_path, statuses):
+    """Merges collected statuses into config.json's subreddit_status.
+
+    Keys are the names as given (the config's display case). Subreddits that
+    exist are dropped from the map, since make-html treats missing entries as
+    'Exists'; undetermined (None) statuses leave the entry alone. Returns True
+    if the file changed.
+    """
+    def change(config):
+        current = config.get('subreddit_status', {})
+        updated = dict(current)
+        for name, status in statuses.items():
+            if status is None:
+                continue
+            if status == STATUS_EXISTS:
+                updated.pop(name, None)
+            else:
+                updated[name] = status
+        if updated == current:
+            return False
+        config['subreddit_status'] = updated
+        return True
+
+    if not update_config(change, config_path):
+        return False
+    print(f"[INFO] Updated subreddit_status in {config_path}.", file=sys.stderr)
+    return True
+
 if __name__ == '__main__':
     import argparse
 
     parser = argparse.ArgumentParser(description="Scrape Reddit subreddit data.")
-    parser.add_argument("subreddit", help="The subreddit to search for (e.g., LearnGraph).")
+    parser.add_argument("subreddits", nargs='*', metavar='subreddit', help="The subreddit(s) to fetch (e.g., LearnGraph).")
+    parser.add_argument("--all", action="store_true", help="Fetch every hashtag in config.json as a subreddit in one bulk run.")
+    parser.add_argument("--update-config", action="store_true", help="Write the detected statuses to subreddit_status in config.json.")
+    parser.add_argument("--max-workers", type=int, default=4, help="Concurrent Reddit requests in bulk mode.")
     args = parser.parse_args()
 
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+    names = args.subreddits
+    if args.all:
+        names = names + read_config(config_path).get('hashtags', [])
+    if not names:
+        parser.error("give at least one subreddit or --all")
+
     reddit = get_reddit_client()
     if reddit:
-        subreddit_data = get_subreddit_data(reddit, args.subreddit)
-        if subreddit_data:
-            print(json.dumps(subreddit_data))
+        if len(names) == 1 and not args.update_config:
+            subreddit_data = get_subreddit_data(reddit, names[0])
+            if subreddit_data:
+                print(json.dumps(subreddit_data))
+            else:
+                print("[]")
         else:
-            print("[]")
+            data, statuses = collect_subreddits(reddit, names, max_workers=args.max_workers)
+            if args.update_config:
+                update_subreddit_status(config_path, statuses)
+            print(json.dumps({'subreddits': data, 'statuses': statuses}))
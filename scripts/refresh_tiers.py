@@ -0,0 +1,143 @@
+"""
+Data-driven hashtag ranking and tiered refresh scheduling for quick_update.py.
+
+Each configured hashtag is scored from the exported analytics:
+
+  momentum       average Bluesky posts per day over the last MOMENTUM_DAYS
+                 days of data, plus any rise over the MOMENTUM_DAYS before
+  youtube_views  total views of the hashtag's top YouTube videos
+
+Each signal becomes a percentile rank among the configured hashtags, and
+the score is their SIGNAL_WEIGHTS-weighted sum (0 to 1). The ranked
+hashtags are split into tiers ("refresh_tiers" in config.json, DEFAULT_TIERS
+otherwise): the top share is hot and refreshed often, the rest warm or cold
+and refreshed rarely. A hashtag is due once its last refresh, kept in
+data/refresh_state.json, is older than its tier's interval.
+"""
+
+import os
+import json
+import datetime
+
+from file_lock import atomic_write_json
+from report_data import read_bluesky_analytics, read_csv_rows
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SCRIPT_DIR, '..', 'data')
+STATE_PATH = os.path.join(DATA_DIR, 'refresh_state.json')
+
+# Tiers in rank order; share is the fraction of hashtags in the tier (the last tier takes the rest).
+DEFAULT_TIERS = [
+    {'name': 'hot', 'share': 0.2, 'interval_minutes': 60},
+    {'name': 'warm', 'share': 0.3, 'interval_minutes': 360},
+    {'name': 'cold', 'share': 0.5, 'interval_minutes': 1440},
+]
+MOMENTUM_DAYS = 7
+SIGNAL_WEIGHTS = {'momentum': 0.7, 'youtube_views': 0.3}
+
+def bluesky_momentum(daily, reference_date, days=MOMENTUM_DAYS):
+    """Average daily posts over the days up to reference_date, plus the rise over the window before it."""
+    recent_start = reference_date - datetime.timedelta(days=days - 1)
+    previous_start = recent_start - datetime.timedelta(days=days)
+    recent = previous = 0
+    for date_str, posts in daily.items():
+        try:
+            date = datetime.date.fromisoformat(date_str)
+        except ValueError:
+            continue
+        if recent_start <= date <= reference_date:
+            recent += posts
+        elif previous_start <= date < recent_start:
+            previous += posts
+    recent_average = recent / days
+    return recent_average + max(recent_average - previous / days, 0)
+
+def percentile_ranks(values):
+    """Maps each key to the fraction of values at or below its value (0 for zero values, ties share a rank)."""
+    ordered = sorted(values.values())
+    ranks = {}
+    for key, value in values.items():
+        if not value:
+            ranks[key] = 0.0
+            continue
+        at_or_below = len(ordered) - next(i for i, v in enumerate(reversed(ordered)) if v <= value)
+        ranks[key] = at_or_below / len(ordered)
+    return ranks
+
+def rank_hashtags(config, data_dir=DATA_DIR):
+    """Returns the configured hashtags as dicts (hashtag, score, momentum, youtube_views), highest score first."""
+    hashtags = config.get('hashtags', [])
+    bluesky = {hashtag.lower(): entry for hashtag, entry in read_bluesky_analytics(os.path.join(data_dir, 'BlueskyAnalytics.csv')).items()}
+    youtube = {row.get('hashtag', '').lower(): row for row in read_csv_rows(os.path.join(data_dir, 'YouTubeAnalytics.csv'))}
+
+    # Momentum is measured up to the newest day in the data, so a stale export still ranks sensibly.
+    dates = [date for entry in bluesky.values() for date in entry['daily'] if date]
+    reference_date = datetime.date.fromisoformat(max(dates)) if dates else datetime.date.today()
+
+    signals = {'momentum': {}, 'youtube_views': {}}
+    for hashtag in hashtags:
+        entry = bluesky.get(hashtag.lower())
+        signals['momentum'][hashtag] = bluesky_momentum(entry['daily'], reference_date) if entry else 0.0
+        views = (youtube.get(hashtag.lower()) or {}).get('total_views') or ''
+        signals['youtube_views'][hashtag] = int(views) if views.isdigit() else 0
+
+    ranks = {name: percentile_ranks(values) for name, values in signals.items()}
+    ranked = [
+        {
+            'hashtag': hashtag,
+            'score': round(sum(weight * ranks[name][hashtag] for name, weight in SIGNAL_WEIGHTS.items()), 4),
+            'momentum': round(signals['momentum'][hashtag], 2),
+            'youtube_views': signals['youtube_views'][hashtag],
+        }
+        for hashtag in hashtags
+    ]
+    # Ties keep config order (sorted() is stable).
+    return sorted(ranked, key=lambda item: item['score'], reverse=True)
+
+def assign_tiers(ranked, tiers=DEFAULT_TIERS):
+    """Adds 'tier' and 'interval' (a timedelta) to each ranked hashtag, in place."""
+    start = 0
+    for index, tier in enumerate(tiers):
+        last = index == len(tiers) - 1
+        end = len(ranked) if last else start + max(round(tier['share'] * len(ranked)), 1)
+        for item in ranked[start:end]:
+            item['tier'] = tier['name']
+            item['interval'] = datetime.timedelta(minutes=tier['interval_minutes'])
+        start = end
+    return ranked
+
+def read_refresh_state(path=STATE_PATH):
+    """Returns {lowercased hashtag: datetime of its last successful refresh}."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {hashtag: datetime.datetime.fromisoformat(when) for hashtag, when in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"[WARNING] Ignoring unreadable refresh state in {path}: {e}")
+        return {}
+
+def mark_refreshed(hashtags, when=None, path=STATE_PATH):
+    """Records hashtags as refreshed at when (default: now)."""
+    when = when or datetime.datetime.now()
+    state = read_refresh_state(path)
+    for hashtag in hashtags:
+        state[hashtag.lower()] = when
+    atomic_write_json(path, {hashtag: refreshed.isoformat(timespec='seconds') for hashtag, refreshed in sorted(state.items())}, indent=2)
+
+def plan_refresh(config, now=None, data_dir=DATA_DIR, state_path=STATE_PATH):
+    """Returns the ranked, tiered hashtags, each with 'last_refreshed', 'next_due' and 'due'."""
+    now = now or datetime.datetime.now()
+    ranked = assign_tiers(rank_hashtags(config, data_dir), config.get('refresh_tiers', DEFAULT_TIERS))
+    state = read_refresh_state(state_path)
+    for item in ranked:
+        item['last_refreshed'] = state.get(item['hashtag'].lower())
+        item['next_due'] = item['last_refreshed'] + item['interval'] if item['last_refreshed'] else now
+        item['due'] = item['next_due'] <= now
+    return ranked
+
+def due_hashtags(plan, limit=None):
+    """The due hashtags of a plan, hottest first (most overdue first within a tier), at most limit of them."""
+    order = {item['hashtag']: index for index, item in enumerate(plan)}
+    due = sorted((item for item in plan if item['due']), key=lambda item: (item['interval'], item['next_due'], order[item['hashtag']]))
+    return [item['hashtag'] for item in due][:limit]
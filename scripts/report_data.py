@@ -0,0 +1,176 @@
+"""
+Loaders for the data the HTML report is built from.
+
+Each CSV is read in a single streaming pass: rows the report does not use
+are skipped as they are read, and the quantile-based hotness levels are
+computed from what that pass collected. Results are memoized per file on
+(path, mtime, size), so watch mode and repeated generate_report() calls
+skip files that have not changed.
+"""
+
+import os
+import csv
+import functools
+import threading
+
+import numpy as np
+
+# read_config lives in config_store with the rest of the config handling; re-exported for the report code.
+from config_store import file_signature, read_config
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+def format_hashtag_for_display(hashtag_raw):
+    """Formats a raw hashtag string for display, preserving camelCase but ensuring initial capitalization."""
+    if not hashtag_raw:
+        return ""
+    # Capitalize the first letter, and keep the rest as is (preserving camelCase)
+    return hashtag_raw[0].upper() + hashtag_raw[1:]
+
+def memoized_by_file(loader):
+    """Caches loader(path) until the file's mtime or size changes (a missing file is cached too)."""
+    @functools.wraps(loader)
+    def load(path):
+        key = (loader.__name__, os.path.abspath(path))
+        signature = file_signature(path)
+        with _memo_lock:
+            cached = _memo.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        result = loader(path)
+        with _memo_lock:
+            _memo[key] = (signature, result)
+        return result
+    return load
+
+def clear_cache():
+    with _memo_lock:
+        _memo.clear()
+
+def hotness_levels(values, population=None):
+    """Maps each key of values to 0-3 (Low to Very High) by the quartiles of population (default: all the values)."""
+    quantiles = np.percentile(list(values.values()) if population is None else population, [25, 50, 75])
+    levels = {}
+    for key, value in values.items():
+        if value <= quantiles[0]:
+            levels[key] = 0  # Low
+        elif value <= quantiles[1]:
+            levels[key] = 1  # Medium
+        elif value <= quantiles[2]:
+            levels[key] = 2  # High
+        else:
+            levels[key] = 3  # Very High
+    return levels
+
+@memoized_by_file
+def read_analytics_data(csv_path):
+    """Returns ({hashtag: [daily post counts]}, max daily posts, {hashtag: hotness}) from BlueskyAnalytics.csv."""
+    daily_posts = {}
+    try:
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            columns = {name: index for index, name in enumerate(next(reader, []))}
+            metric, hashtag_column, value_column = columns['metric'], columns['hashtag'], columns['value']
+            for row in reader:
+                if row[metric] != 'daily_posts':
+                    continue
+                hashtag = format_hashtag_for_display(row[hashtag_column])
+                daily_posts.setdefault(hashtag, []).append(int(row[value_column]))
+
+        # Calculate hotness based on quantiles
+        max_posts = {hashtag: max(posts) for hashtag, posts in daily_posts.items() if posts}
+        if not max_posts:
+            return {}, 0, {}
+
+        print(f"[DEBUG] Loaded Bluesky analytics data for {len(daily_posts)} hashtags.")
+        return daily_posts, max(max_posts.values()), hotness_levels(max_posts)
+
+    except FileNotFoundError:
+        print(f"[WARNING] Bluesky Analytics CSV file not found: {csv_path}. Proceeding without Bluesky analytics.")
+        return {}, 0, {}
+    except Exception as e:
+        print(f"[ERROR] Error reading Bluesky analytics CSV: {e}")
+        return {}, 0, {}
+
+@memoized_by_file
+def read_bluesky_analytics(csv_path):
+    """Returns {hashtag: {'daily': {date: posts}, 'top_poster_activity': [(author, posts)],
+    'top_poster_engagement': [(author, engagement)]}} from BlueskyAnalytics.csv, keyed by the stored hashtag."""
+    analytics = {}
+    try:
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                entry = analytics.setdefault(row['hashtag'], {'daily': {}, 'top_poster_activity': [], 'top_poster_engagement': []})
+                if row['metric'] == 'daily_posts':
+                    entry['daily'][row['date']] = int(row['value'])
+                elif row['metric'] in entry:
+                    entry[row['metric']].append((row['author'], int(row['value'])))
+    except FileNotFoundError:
+        print(f"[WARNING] Bluesky Analytics CSV file not found: {csv_path}.")
+    except Exception as e:
+        print(f"[ERROR] Error reading Bluesky analytics CSV: {e}")
+    return analytics
+
+@memoized_by_file
+def read_csv_rows(csv_path):
+    """Returns every row of a CSV file as a dict ([] if the file is missing)."""
+    try:
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            return list(csv.DictReader(f))
+    except FileNotFoundError:
+        return []
+
+@memoized_by_file
+def read_reddit_analytics_data(csv_path):
+    """Returns ({subreddit: subscribers}, max subscribers) from RedditAnalytics.csv."""
+    reddit_analytics_data = {}
+    max_subscribers = 0
+    try:
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                subreddit = row.get('subreddit')
+                subscribers_str = row.get('subscribers')
+                if subreddit and subscribers_str and subscribers_str.isdigit():
+                    subscribers = int(subscribers_str)
+                    reddit_analytics_data[subreddit] = subscribers
+                    if subscribers > max_subscribers:
+                        max_subscribers = subscribers
+        print(f"[DEBUG] Loaded Reddit analytics data for {len(reddit_analytics_data)} subreddits. Max subscribers: {max_subscribers}")
+    except FileNotFoundError:
+        print(f"[WARNING] Reddit Analytics CSV file not found: {csv_path}. Proceeding without Reddit analytics.")
+    except Exception as e:
+        print(f"[ERROR] Error reading Reddit analytics CSV: {e}")
+    return reddit_analytics_data, max_subscribers
+
+@memoized_by_file
+def read_youtube_analytics_data(csv_path):
+    """Returns ({hashtag: row}, {hashtag: hotness}) from YouTubeAnalytics.csv.
+
+    Hotness quartiles are taken over the rows with a numeric total_views; rows
+    without one count as 0 views.
+    """
+    youtube_analytics_data = {}
+    views = {}
+    has_views = []
+    try:
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                views_str = row.get('total_views') or ''
+                if views_str.isdigit():
+                    has_views.append(int(views_str))
+                hashtag = format_hashtag_for_display(row.get('hashtag'))
+                if hashtag:
+                    youtube_analytics_data[hashtag] = row
+                    views[hashtag] = int(views_str) if views_str.isdigit() else 0
+        if not has_views:
+            return {}, {}
+
+        print(f"[DEBUG] Loaded YouTube analytics data for {len(youtube_analytics_data)} hashtags.")
+        return youtube_analytics_data, hotness_levels(views, population=has_views)
+    except FileNotFoundError:
+        print(f"[WARNING] YouTube Analytics CSV file not found: {csv_path}. Proceeding without YouTube analytics.")
+    except Exception as e:
+        print(f"[ERROR] Error reading YouTube analytics CSV: {e}")
+    return {}, {}
@@ -0,0 +1,119 @@
+"""
+Watch engine for make-html.py --watch.
+
+Watches config.json, the data CSVs and the templates directory, collects
+change events for DEBOUNCE_SECONDS after the last one (an update run rewrites
+several CSVs in a row), and then calls back once with the set of sources that
+changed. Report inputs are compared by content hash so touching a file
+without changing what the report shows does nothing, and per-hashtag changes
+are pushed to the api_server's Socket.IO clients as data_updated events
+(see live_updates.py).
+"""
+
+import os
+import sys
+import json
+import hashlib
+import threading
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+DEBOUNCE_SECONDS = 1.0
+
+# Event types that mean a file's content may have changed (watchdog also reports opens and read-only closes).
+CHANGE_EVENTS = ('created', 'modified', 'moved', 'deleted', 'closed')
+
+# Data file name -> source name passed to the change callback.
+DATA_SOURCES = {
+    'BlueskyAnalytics.csv': 'bluesky',
+    'RedditAnalytics.csv': 'reddit',
+    'YouTubeAnalytics.csv': 'youtube',
+}
+
+def content_hash(*parts):
+    """SHA-256 over JSON-serializable parts (dict keys sorted, so equal content hashes equally)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class ReportWatcher(FileSystemEventHandler):
+    """Debounced watch over the report's inputs.
+
+    on_change(sources) runs on a timer thread with a set of 'config',
+    'template' and DATA_SOURCES names; calls never overlap.
+    """
+
+    def __init__(self, config_path, data_dir, template_dir, on_change, debounce=DEBOUNCE_SECONDS):
+        self.config_path = os.path.abspath(config_path)
+        self.data_dir = os.path.abspath(data_dir)
+        self.template_dir = os.path.abspath(template_dir)
+        self.on_change = on_change
+        self.debounce = debounce
+        self._pending = set()
+        self._timer = None
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._observer = None
+
+    def source_for(self, path):
+        """Returns the source name a changed path belongs to, or None if the report does not read it."""
+        path = os.path.abspath(path)
+        directory, name = os.path.split(path)
+        if path == self.config_path:
+            return 'config'
+        if directory == self.data_dir:
+            return DATA_SOURCES.get(name)
+        if path.startswith(self.template_dir + os.sep) and not name.startswith('.'):
+            return 'template'
+        return None
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in CHANGE_EVENTS:
+            return
+        # Files written through a temporary name arrive as a move onto the real path.
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            source = self.source_for(path) if path else None
+            if source:
+                self._schedule(source)
+
+    def _schedule(self, source):
+        with self._lock:
+            self._pending.add(source)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush(self):
+        with self._run_lock:
+            with self._lock:
+                sources, self._pending = self._pending, set()
+                self._timer = None
+            if not sources:
+                return
+            try:
+                self.on_change(sources)
+            except Exception as e:
+                print(f"[ERROR] Report regeneration failed after changes to {', '.join(sorted(sources))}: {e}", file=sys.stderr)
+
+    def start(self):
+        self._observer = Observer()
+        directories = {os.path.dirname(self.config_path), self.data_dir, self.template_dir}
+        for directory in directories:
+            if os.path.isdir(directory):
+                self._observer.schedule(self, directory, recursive=directory == self.template_dir)
+        self._observer.start()
+
+    def stop(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
@@ -0,0 +1,216 @@
+"""
+Local cache of scraper responses, shared by the Bluesky, Reddit and YouTube fetches.
+
+Responses live in data/cache.db (SQLite) under the SHA-256 of their request:
+platform, query and parameters serialized as canonical JSON. Each platform has
+its own time-to-live, set under "cache" in config.json, and the cache is kept
+under max_bytes by evicting the least recently used responses.
+
+Usage:
+  python response_cache.py stats
+  python response_cache.py clear [--platform Bluesky]
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from collections import defaultdict
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(SCRIPT_DIR, '..', 'config.json')
+CACHE_PATH = os.path.join(SCRIPT_DIR, '..', 'data', 'cache.db')
+
+# Used for anything config.json does not set.
+DEFAULT_TTLS = {'Bluesky': 600, 'Reddit': 3600, 'YouTube': 6 * 3600}
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    platform TEXT NOT NULL,
+    request TEXT NOT NULL,
+    body TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+def request_key(platform, query, params=None):
+    """Returns (key, canonical request JSON) for a platform/query/params triple."""
+    request = json.dumps({'platform': platform, 'query': query, 'params': params or {}}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(request.encode('utf-8')).hexdigest(), request
+
+def read_cache_settings(config_path=CONFIG_PATH):
+    """Returns ({platform: ttl seconds}, max_bytes) from the "cache" section of config.json."""
+    ttls = dict(DEFAULT_TTLS)
+    max_bytes = DEFAULT_MAX_BYTES
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            settings = json.load(f).get('cache', {})
+        ttls.update(settings.get('ttl_seconds', {}))
+        max_bytes = settings.get('max_bytes', max_bytes)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[WARNING] Could not read cache settings from {config_path}, using defaults: {e}")
+    return ttls, max_bytes
+
+class ResponseCache:
+    """TTL + LRU cache of JSON-serializable scraper results.
+
+    max_age, when given, overrides every platform's TTL for lookups (0 means
+    always refetch but still store the fresh result). A disabled cache never
+    reads or writes but still counts misses, so reports look the same.
+    Safe to share between the fetch scheduler's threads.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttls=None, max_bytes=DEFAULT_MAX_BYTES, max_age=None, enabled=True):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self.stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._lock = threading.Lock()
+        self._conn = None
+        if enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+
+    def ttl(self, platform):
+        return self.max_age if self.max_age is not None else self.ttls.get(platform, 0)
+
+    def get(self, platform, query, params=None):
+        """Returns the cached result, or None on a miss or an expired entry."""
+        key, _ = request_key(platform, query, params)
+        result = None
+        if self.enabled:
+            now = time.time()
+            with self._lock, self._conn:
+                row = self._conn.execute('SELECT body, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+                if row and now - row[1] <= self.ttl(platform):
+                    self._conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+                    result = json.loads(row[0])
+        with self._lock:
+            self.stats[platform]['hits' if result is not None else 'misses'] += 1
+        return result
+
+    def put(self, platform, query, params, result):
+        if not self.enabled:
+            return
+        key, request = request_key(platform, query, params)
+        body = json.dumps(result)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, platform, request, body, size, created_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, platform, request, body, len(body), now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        # Keep the most recently used responses whose sizes add up to max_bytes.
+        self._conn.execute(
+            'DELETE FROM responses WHERE key IN ('
+            ' SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS running FROM responses)'
+            ' WHERE running > ?)',
+            (self.max_bytes,)
+        )
+
+    def fetch(self, platform, query, params, fetch_func):
+        """Returns the cached result for the request, or calls fetch_func() and caches what it returns.
+
+        Any result but None is cached, empty ones included. The scrapers return
+        None on failure, and a failed fetch should not be replayed for a whole TTL.
+        """
+        result = self.get(platform, query, params)
+        if result is not None:
+            print(f"[DEBUG] Cache hit for {platform} '{query}'.", file=sys.stderr)
+            return result
+        result = fetch_func()
+        if result is not None:
+            self.put(platform, query, params, result)
+        return result
+
+    def clear(self, platform=None):
+        if not self.enabled:
+            return 0
+        with self._lock, self._conn:
+            if platform:
+                return self._conn.execute('DELETE FROM responses WHERE platform = ?', (platform,)).rowcount
+            return self._conn.execute('DELETE FROM responses').rowcount
+
+    def report(self):
+        if not self.stats:
+            return
+        parts = [f"{platform} {counts['hits']} hits / {counts['misses']} misses" for platform, counts in sorted(self.stats.items())]
+        state = '' if self.enabled else ' (disabled)'
+        print(f"[INFO] Response cache{state}: {', '.join(parts)}.")
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
+
+def open_cache(config_path=CONFIG_PATH, path=CACHE_PATH, max_age=None, no_cache=False):
+    """Creates a ResponseCache with the TTLs and size limit from config.json."""
+    ttls, max_bytes = read_cache_settings(config_path)
+    return ResponseCache(path, ttls, max_bytes, max_age=max_age, enabled=not no_cache)
+
+def add_cache_arguments(parser):
+    """Adds the shared --max-age / --no-cache options to a CLI parser."""
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        help="Reuse cached scraper responses up to this many seconds old, overriding the per-platform TTLs in config.json."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Fetch everything live; do not read or write the response cache."
+    )
+
+def cache_arguments(args):
+    """Turns parsed --max-age / --no-cache options back into command-line arguments for a child script."""
+    forwarded = []
+    if getattr(args, 'max_age', None) is not None:
+        forwarded.extend(['--max-age', str(args.max_age)])
+    if getattr(args, 'no_cache', False):
+        forwarded.append('--no-cache')
+    return forwarded
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the scraper response cache.")
+    parser.add_argument('action', choices=['stats', 'clear'])
+    parser.add_argument('--platform', help='Only clear responses for this platform.')
+    parser.add_argument('--cache', default=CACHE_PATH, help='Path to the cache database.')
+    args = parser.parse_args()
+
+    cache = open_cache(path=args.cache)
+    try:
+        if args.action == 'clear':
+            print(f"[INFO] Removed {cache.clear(args.platform)} cached responses.")
+        else:
+            now = time.time()
+            rows = cache._conn.execute(
+                'SELECT platform, COUNT(*), SUM(size), MIN(created_at) FROM responses GROUP BY platform ORDER BY platform'
+            ).fetchall()
+            if not rows:
+                print("[INFO] The response cache is empty.")
+            for platform, count, size, oldest in rows:
+                print(f"[INFO] {platform}: {count} responses, {size / 1024:.0f} KiB, oldest {now - oldest:.0f}s "
+                      f"(TTL {cache.ttl(platform):.0f}s)")
+    finally:
+        cache.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+import os
+import sys
+import json
+import subprocess
+import threading
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def run_scraper(scraper_path, args, timeout=60):
+    """Runs a scraper script as a subprocess."""
+    command = [sys.executable, scraper_path] + args
+    print(f"[DEBUG] Scraper command: {' '.join(command)}", file=sys.stderr)
+
+    env = os.environ.copy()
+    env['PYTHONIOENCODING'] = 'utf-8'
+
+    try:
+        process = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            check=True,
+            env=env,
+            timeout=timeout
+        )
+
+        if process.stdout:
+            if process.stderr:
+                print(f"[DEBUG] Scraper stderr for {scraper_path}:\n{process.stderr}", file=sys.stderr)
+            return json.loads(process.stdout)
+        else:
+            print(f"[DEBUG] Scraper stdout for {scraper_path} was empty.")
+            if process.stderr:
+                print(f"[DEBUG] Scraper stderr for {scraper_path}:\n{process.stderr}", file=sys.stderr)
+            return None
+
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] Scraper process failed for {scraper_path} (Exit Code: {e.returncode}):\n{e.stderr}")
+    except FileNotFoundError:
+        print(f"[ERROR] {scraper_path} not found.")
+    except json.JSONDecodeError as e:
+        print(f"[ERROR] JSON decoding error for {scraper_path}: {e}\nRaw stdout: {process.stdout}")
+    except subprocess.TimeoutExpired:
+        print(f"[ERROR] Scraper process timed out for {scraper_path}.")
+    except Exception as e:
+        print(f"[ERROR] Unexpected error running scraper {scraper_path}: {e}")
+
+    return None
+
+def cached_fetch(cache, platform, query, params, fetch_func):
+    """Runs fetch_func through the response cache, if the engine has one."""
+    if cache is None:
+        return fetch_func()
+    return cache.fetch(platform, query, params, fetch_func)
+
+def subreddit_statuses(subreddits, data, statuses):
+    """Completes the statuses of a subreddit batch: cached subreddits are judged by their stored posts."""
+    statuses = dict(statuses)
+    for name in subreddits:
+        if name not in statuses and data.get(name):
+            statuses[name] = 'Exists' if data[name].get('posts') else 'No Content'
+    return statuses
+
+def cached_batch_fetch(cache, platform, queries, params, fetch_func):
+    """Like cached_fetch for a batch: only the queries without a fresh cached result go to fetch_func.
+
+    fetch_func takes the list of missing queries and returns {query: result}.
+    Returns {query: result} for every query, None for queries fetch_func returned nothing for.
+    """
+    results = {}
+    missing = []
+    for query in queries:
+        cached = cache.get(platform, query, params) if cache is not None else None
+        if cached is not None:
+            results[query] = cached
+        else:
+            missing.append(query)
+    if missing:
+        fetched = fetch_func(missing) or {}
+        for query in missing:
+            # None (a failed fetch) is kept so callers can tell it from an empty result.
+            results[query] = fetched.get(query)
+            if cache is not None and results[query] is not None:
+                cache.put(platform, query, params, results[query])
+    return results
+
+class ScraperEngine:
+    """Runs the platform scrapers inside the calling process.
+
+    Each platform client is created on first use and then reused for every
+    hashtag, so a full run logs into Bluesky and initializes PRAW once instead
+    of once per hashtag. Client creation is locked so concurrent workers share
+    a single client per platform. Results go through the optional
+    response_cache.ResponseCache, so a fresh cached response never reaches the
+    client at all.
+    """
+
+    name = 'inprocess'
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self._bluesky_client = None
+        self._bluesky_initialized = False
+        self._reddit_client = None
+        self._reddit_initialized = False
+        self._client_lock = threading.Lock()
+
+    def get_bluesky_client(self):
+        with self._client_lock:
+            if self._bluesky_initialized:
+                return self._bluesky_client
+            self._bluesky_initialized = True
+            try:
+                from bluesky_scraper import get_bluesky_client
+                self._bluesky_client = get_bluesky_client()
+            except ImportError as e:
+                print(f"[ERROR] Bluesky scraper unavailable: {e}", file=sys.stderr)
+        return self._bluesky_client
+
+    def get_reddit_client(self):
+        with self._client_lock:
+            if self._reddit_initialized:
+                return self._reddit_client
+            self._reddit_initialized = True
+            try:
+                from reddit_scraper import get_reddit_client
+                self._reddit_client = get_reddit_client()
+            except ImportError as e:
+                print(f"[ERROR] Reddit scraper unavailable: {e}", file=sys.stderr)
+        return self._reddit_client
+
+    def search_bluesky(self, hashtag, limit=100, stop_at=None, max_pages=1):
+        params = {'limit': limit, 'stop_at': stop_at, 'max_pages': max_pages}
+        return cached_fetch(self.cache, 'Bluesky', hashtag, params,
+                            lambda: self._search_bluesky(hashtag, limit, stop_at, max_pages))
+
+    def _search_bluesky(self, hashtag, limit, stop_at, max_pages):
+        client = self.get_bluesky_client()
+        if not client:
+            return None
+        from bluesky_scraper import search_bluesky_hashtag
+        return search_bluesky_hashtag(client, hashtag, limit, stop_at=stop_at, max_pages=max_pages)
+
+    def get_subreddit_data(self, subreddit_name):
+        return cached_fetch(self.cache, 'Reddit', subreddit_name, None, lambda: self._get_subreddit_data(subreddit_name))
+
+    def _get_subreddit_data(self, subreddit_name):
+        client = self.get_reddit_client()
+        if not client:
+            return None
+        from reddit_scraper import get_subreddit_data
+        return get_subreddit_data(client, subreddit_name)
+
+    def collect_subreddits(self, subreddit_names, max_workers=4):
+        """Fetches many subreddits in bulk; returns ({name: data}, {name: status})."""
+        statuses = {}
+
+        def fetch(missing):
+            client = self.get_reddit_client()
+            if not client:
+                return {}
+            from reddit_scraper import collect_subreddits
+            data, fetched_statuses = collect_subreddits(client, missing, max_workers=max_workers)
+            statuses.update(fetched_statuses)
+            return data
+
+        data = cached_batch_fetch(self.cache, 'Reddit', subreddit_names, None, fetch)
+        data = {name: result for name, result in data.items() if result}
+        return data, subreddit_statuses(subreddit_names, data, statuses)
+
+    def search_youtube(self, hashtag, limit=5):
+        from youtube_scraper import search_youtube
+        return cached_fetch(self.cache, 'YouTube', hashtag, {'limit': limit}, lambda: search_youtube(hashtag, limit))
+
+    def search_youtube_batch(self, hashtags, limit=5, max_workers=4, limiter=None):
+        """limiter, if given, is entered around each search of the batch."""
+        from youtube_scraper import search_youtube_batch
+        return cached_batch_fetch(self.cache, 'YouTube', hashtags, {'limit': limit},
+                                  lambda missing: search_youtube_batch(missing, limit, max_workers, limiter=limiter))
+
+class SubprocessScraperEngine:
+    """Runs each scraper CLI as a separate Python process (the original behaviour).
+
+    Kept for comparison runs and as a fallback when a scraper misbehaves in-process.
+    """
+
+    name = 'subprocess'
+
+    def __init__(self, cache=None):
+        self.cache = cache
+
+    def search_bluesky(self, hashtag, limit=100, stop_at=None, max_pages=1):
+        args = [hashtag, '--limit', str(limit), '--max-pages', str(max_pages)]
+        if stop_at and stop_at.get('uri'):
+            args.extend(['--stop-at-uri', stop_at['uri']])
+        if stop_at and stop_at.get('created_at'):
+            args.extend(['--stop-at-created-at', stop_at['created_at']])
+        params = {'limit': limit, 'stop_at': stop_at, 'max_pages': max_pages}
+        return cached_fetch(self.cache, 'Bluesky', hashtag, params,
+                            lambda: run_scraper(os.path.join(SCRIPT_DIR, 'bluesky_scraper.py'), args))
+
+    def get_subreddit_data(self, subreddit_name):
+        return cached_fetch(self.cache, 'Reddit', subreddit_name, None,
+                            lambda: run_scraper(os.path.join(SCRIPT_DIR, 'reddit_scraper.py'), [subreddit_name]) or None)
+
+    def collect_subreddits(self, subreddit_names, max_workers=4):
+        statuses = {}
+
+        def fetch(missing):
+            if len(missing) == 1:
+                # With a single subreddit the script prints its data, not the bulk result.
+                return {missing[0]: run_scraper(os.path.join(SCRIPT_DIR, 'reddit_scraper.py'), list(missing)) or None}
+            args = list(missing) + ['--max-workers', str(max_workers)]
+            output = run_scraper(os.path.join(SCRIPT_DIR, 'reddit_scraper.py'), args, timeout=30 * len(missing)) or {}
+            statuses.update(output.get('statuses') or {})
+            return output.get('subreddits') or {}
+
+        data = cached_batch_fetch(self.cache, 'Reddit', subreddit_names, None, fetch)
+        data = {name: result for name, result in data.items() if result}
+        return data, subreddit_statuses(subreddit_names, data, statuses)
+
+    def search_youtube(self, hashtag, limit=5):
+        return cached_fetch(self.cache, 'YouTube', hashtag, {'limit': limit},
+                            lambda: run_scraper(os.path.join(SCRIPT_DIR, 'youtube_scraper.py'), [hashtag, '--limit', str(limit)]))
+
+    def search_youtube_batch(self, hashtags, limit=5, max_workers=4, limiter=None):
+        def fetch(missing):
+            # One process (and one yt-dlp session) for the whole batch; with a single
+            # hashtag the script prints a plain list instead of a mapping. The
+            # script spaces its searches by the limiter's min_interval itself.
+            args = list(missing) + ['--limit', str(limit), '--max-workers', str(max_workers)]
+            if limiter is not None:
+                args.extend(['--min-interval', str(limiter.min_interval)])
+            output = run_scraper(os.path.join(SCRIPT_DIR, 'youtube_scraper.py'), args, timeout=60 * len(missing))
+            if len(missing) == 1:
+                return {missing[0]: output}
+            return output or {}
+        return cached_batch_fetch(self.cache, 'YouTube', hashtags, {'limit': limit}, fetch)
+
+ENGINES = {
+    ScraperEngine.name: ScraperEngine,
+    SubprocessScraperEngine.name: SubprocessScraperEngine,
+}
+
+def create_engine(name=ScraperEngine.name, cache=None):
+    """Returns a scraper engine instance by name ('inprocess' or 'subprocess'), optionally backed by a ResponseCache."""
+    return ENGINES[name](cache)
@@ -0,0 +1,561 @@
+"""
+SQLite storage for scraped posts and per-hashtag analytics.
+
+data/social.db replaces the append-only CSV files as the primary store. The
+CSV files are still produced by `export` (and the small summary tables are
+exported after every update) so make-html.py and other readers keep working.
+
+Usage:
+  python storage.py import            # one-shot import of the CSV files in data/
+  python storage.py export            # write the summary CSVs from the database
+  python storage.py export --posts    # ... including BlueskyScrapedData.csv
+"""
+
+import os
+import csv
+import sys
+import sqlite3
+import argparse
+import itertools
+import threading
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SCRIPT_DIR, '..', 'data')
+DB_PATH = os.path.join(DATA_DIR, 'social.db')
+
+POST_FIELDS = ['hashtag', 'author', 'text', 'likes', 'reposts', 'replies', 'uri', 'created_at']
+ANALYTICS_FIELDS = ['metric', 'hashtag', 'date', 'author', 'value']
+YOUTUBE_FIELDS = ['hashtag', 'total_views', 'total_likes', 'total_comments', 'top_video_url']
+REDDIT_FIELDS = ['subreddit', 'subscribers', 'active_user_count', 'posts_count', 'avg_score', 'avg_comments']
+
+# table name -> (CSV file name in data/, CSV columns)
+CSV_TABLES = {
+    'posts': ('BlueskyScrapedData.csv', POST_FIELDS),
+    'bluesky_analytics': ('BlueskyAnalytics.csv', ANALYTICS_FIELDS),
+    'youtube_analytics': ('YouTubeAnalytics.csv', YOUTUBE_FIELDS),
+    'reddit_analytics': ('RedditAnalytics.csv', REDDIT_FIELDS),
+}
+SUMMARY_TABLES = ['bluesky_analytics', 'youtube_analytics', 'reddit_analytics']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    hashtag TEXT NOT NULL,
+    author TEXT,
+    text TEXT,
+    likes INTEGER NOT NULL DEFAULT 0,
+    reposts INTEGER NOT NULL DEFAULT 0,
+    replies INTEGER NOT NULL DEFAULT 0,
+    uri TEXT NOT NULL,
+    created_at TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_posts_uri ON posts (uri);
+CREATE INDEX IF NOT EXISTS idx_posts_hashtag_created_at ON posts (hashtag, created_at);
+CREATE INDEX IF NOT EXISTS idx_posts_hashtag_id ON posts (hashtag, id);
+
+CREATE TABLE IF NOT EXISTS bluesky_analytics (
+    metric TEXT NOT NULL,
+    hashtag TEXT NOT NULL,
+    date TEXT,
+    author TEXT,
+    value INTEGER NOT NULL
+);
+
+-- Running counters behind bluesky_analytics, updated from new posts only.
+-- first_post_id / id record first appearance so rebuilt rows keep the order
+-- a full analyze_bluesky_data() pass would produce.
+CREATE TABLE IF NOT EXISTS analytics_hashtags (
+    id INTEGER PRIMARY KEY,
+    hashtag TEXT NOT NULL UNIQUE,
+    first_dated_post_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS daily_post_counts (
+    hashtag TEXT NOT NULL,
+    date TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    first_post_id INTEGER NOT NULL,
+    PRIMARY KEY (hashtag, date)
+);
+-- author is '' for posts without one: NULLs would never conflict in the
+-- UNIQUE key, so every batch would add a row instead of updating it.
+CREATE TABLE IF NOT EXISTS author_stats (
+    id INTEGER PRIMARY KEY,
+    hashtag TEXT NOT NULL,
+    author TEXT NOT NULL DEFAULT '',
+    posts INTEGER NOT NULL,
+    engagement INTEGER NOT NULL,
+    UNIQUE (hashtag, author)
+);
+CREATE INDEX IF NOT EXISTS idx_author_stats_posts ON author_stats (hashtag, posts DESC, id);
+CREATE INDEX IF NOT EXISTS idx_author_stats_engagement ON author_stats (hashtag, engagement DESC, id);
+
+CREATE TABLE IF NOT EXISTS store_state (
+    key TEXT PRIMARY KEY,
+    value
+);
+
+CREATE TABLE IF NOT EXISTS youtube_analytics (
+    hashtag TEXT PRIMARY KEY,
+    total_views INTEGER,
+    total_likes INTEGER,
+    total_comments INTEGER,
+    top_video_url TEXT
+);
+
+CREATE TABLE IF NOT EXISTS reddit_analytics (
+    subreddit TEXT PRIMARY KEY,
+    subscribers INTEGER,
+    active_user_count INTEGER,
+    posts_count INTEGER,
+    avg_score REAL,
+    avg_comments REAL
+);
+"""
+
+# SQLite limits the number of bound parameters per statement.
+QUERY_CHUNK_SIZE = 500
+COUNT_FIELDS = ('likes', 'reposts', 'replies')
+
+class ScrapedPostsReader:
+    """Streams BlueskyScrapedData.csv as post dicts, chunk_size rows at a time.
+
+    Memory stays bounded by one chunk however long the history is. Iterating
+    the reader yields posts (so it can be handed straight to
+    analyze_bluesky_data), chunks() yields lists of them. Rows with the wrong
+    number of columns, non-integer counts or CSV syntax errors are skipped and
+    counted in bad_rows instead of ending the read; the first few are logged
+    with their line numbers.
+    """
+
+    def __init__(self, csv_path, chunk_size=5000, max_logged=10):
+        self.csv_path = csv_path
+        self.chunk_size = chunk_size
+        self.max_logged = max_logged
+        self.rows_read = 0
+        self.bad_rows = 0
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def chunks(self):
+        self.rows_read = 0
+        self.bad_rows = 0
+        if not os.path.exists(self.csv_path):
+            return
+        with open(self.csv_path, 'r', newline='', encoding='utf-8', errors='replace') as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, None)
+            if header is None:
+                return
+            missing = [field for field in POST_FIELDS if field not in header]
+            if missing:
+                print(f"[ERROR] {self.csv_path} is missing columns {missing}; no posts read.")
+                return
+            positions = [(field, header.index(field)) for field in POST_FIELDS]
+            width = len(header)
+            chunk = []
+            while True:
+                try:
+                    row = next(reader)
+                except StopIteration:
+                    break
+                except csv.Error as e:
+                    self._bad_row(reader.line_num, str(e))
+                    continue
+                if not row:
+                    continue
+                if len(row) != width:
+                    self._bad_row(reader.line_num, f"expected {width} columns, found {len(row)}")
+                    continue
+                post = {field: row[index] for field, index in positions}
+                try:
+                    for field in COUNT_FIELDS:
+                        post[field] = int(post[field]) if post[field] else 0
+                except ValueError as e:
+                    self._bad_row(reader.line_num, str(e))
+                    continue
+                post['created_at'] = post['created_at'] or None
+                self.rows_read += 1
+                chunk.append(post)
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        self.report()
+
+    def _bad_row(self, line_num, reason):
+        self.bad_rows += 1
+        if self.bad_rows <= self.max_logged:
+            print(f"[WARNING] Skipping malformed row ending on line {line_num} of {self.csv_path}: {reason}")
+
+    def report(self):
+        if self.bad_rows:
+            print(f"[WARNING] Read {self.rows_read} posts from {self.csv_path}, skipped {self.bad_rows} malformed rows.")
+        else:
+            print(f"[DEBUG] Read {self.rows_read} posts from {self.csv_path}.")
+
+def iter_chunks(iterable, size):
+    """Yields lists of up to size items from any iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class SocialDataStore:
+    """Thread-safe wrapper around the social data SQLite database.
+
+    A single connection is shared by the fetch scheduler's worker threads and
+    every statement runs under one lock.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def count(self, table):
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+    # --- posts ---
+
+    def existing_uris(self, uris):
+        """Returns the subset of uris that is already stored (one indexed lookup per URI).
+
+        uris may be any iterable, e.g. a generator over a ScrapedPostsReader;
+        it is consumed QUERY_CHUNK_SIZE at a time.
+        """
+        found = set()
+        for chunk in iter_chunks(uris, QUERY_CHUNK_SIZE):
+            placeholders = ','.join('?' * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(f'SELECT uri FROM posts WHERE uri IN ({placeholders})', chunk).fetchall()
+            found.update(row[0] for row in rows)
+        return found
+
+    def insert_posts(self, posts):
+        """Inserts posts, skipping URIs that are already stored. Returns the number inserted."""
+        rows = [tuple(post.get(field) for field in POST_FIELDS) for post in posts]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f'INSERT OR IGNORE INTO posts ({", ".join(POST_FIELDS)}) VALUES ({", ".join("?" * len(POST_FIELDS))})',
+                rows
+            )
+            inserted = self._conn.total_changes - before
+        print(f"[DEBUG] Stored {inserted} new posts in {self.db_path}")
+        return inserted
+
+    def iter_posts(self, hashtag=None, after_id=0, chunk_size=5000):
+        """Yields stored posts as dicts (including their row 'id') in insertion order.
+
+        Only posts with an id greater than after_id are returned, and rows are
+        fetched chunk_size at a time.
+        """
+        last_id = after_id
+        while True:
+            query = f'SELECT id, {", ".join(POST_FIELDS)} FROM posts WHERE id > ?'
+            params = [last_id]
+            if hashtag is not None:
+                query += ' AND hashtag = ?'
+                params.append(hashtag)
+            query += ' ORDER BY id LIMIT ?'
+            params.append(chunk_size)
+            with self._lock:
+                rows = self._conn.execute(query, params).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            for row in rows:
+                yield dict(row)
+
+    def iter_post_uris(self, after_id=0, chunk_size=50000):
+        """Yields (id, uri) for posts with an id greater than after_id, in id order."""
+        last_id = after_id
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT id, uri FROM posts WHERE id > ? ORDER BY id LIMIT ?', (last_id, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            for row in rows:
+                yield row[0], row[1]
+
+    def post_columns(self, chunk_size=50000):
+        """Returns (hashtags, authors, created_ats, engagement, uris) lists for every stored post in insertion order."""
+        columns = ([], [], [], [], [])
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT hashtag, COALESCE(author, ''), COALESCE(created_at, ''), likes + reposts + replies, uri FROM posts ORDER BY id"
+            )
+            while True:
+                batch = cursor.fetchmany(chunk_size)
+                if not batch:
+                    break
+                for column, values in zip(columns, zip(*batch)):
+                    column.extend(values)
+        return columns
+
+    def posts_page(self, hashtag, before_id=None, limit=50):
+        """Returns up to limit posts for hashtag, newest first, with ids below before_id.
+
+        Keyset pagination over the (hashtag, id) index: pass the last returned
+        id as before_id to get the next page.
+        """
+        query = f'SELECT id, {", ".join(POST_FIELDS)} FROM posts WHERE hashtag = ?'
+        params = [hashtag]
+        if before_id is not None:
+            query += ' AND id < ?'
+            params.append(before_id)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params).fetchall()]
+
+    def newest_post(self, hashtag):
+        """Returns {'uri', 'created_at'} of the newest stored post for hashtag, using the (hashtag, created_at) index."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT uri, created_at FROM posts WHERE hashtag = ? AND created_at IS NOT NULL '
+                'ORDER BY created_at DESC LIMIT 1',
+                (hashtag,)
+            ).fetchone()
+        return {'uri': row['uri'], 'created_at': row['created_at']} if row else None
+
+    # --- state ---
+
+    def get_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM store_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO store_state (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+                (key, value)
+            )
+
+    # --- incremental Bluesky analytics ---
+
+    def apply_analytics_increments(self, hashtags, daily_counts, author_counts, last_post_id):
+        """Adds one batch of aggregated posts to the analytics counters.
+
+        hashtags maps hashtag -> first dated post id (or None) in first-appearance
+        order, daily_counts maps (hashtag, date) -> [count, first_post_id] and
+        author_counts maps (hashtag, author) -> [posts, engagement], also in
+        first-appearance order; a None author is counted as ''. Everything,
+        including the new high-water post id, is committed in one transaction.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO analytics_hashtags (hashtag, first_dated_post_id) VALUES (?, ?) '
+                'ON CONFLICT (hashtag) DO UPDATE SET first_dated_post_id = '
+                'COALESCE(analytics_hashtags.first_dated_post_id, excluded.first_dated_post_id)',
+                list(hashtags.items())
+            )
+            self._conn.executemany(
+                'INSERT INTO daily_post_counts (hashtag, date, count, first_post_id) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (hashtag, date) DO UPDATE SET count = count + excluded.count',
+                [(hashtag, date, count, first_id) for (hashtag, date), (count, first_id) in daily_counts.items()]
+            )
+            self._conn.executemany(
+                'INSERT INTO author_stats (hashtag, author, posts, engagement) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (hashtag, author) DO UPDATE SET posts = posts + excluded.posts, '
+                'engagement = engagement + excluded.engagement',
+                [(hashtag, author or '', posts, engagement) for (hashtag, author), (posts, engagement) in author_counts.items()]
+            )
+            self._conn.execute(
+                "INSERT INTO store_state (key, value) VALUES ('analytics_last_post_id', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (last_post_id,)
+            )
+
+    def reset_analytics_counters(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM analytics_hashtags')
+            self._conn.execute('DELETE FROM daily_post_counts')
+            self._conn.execute('DELETE FROM author_stats')
+            self._conn.execute("DELETE FROM store_state WHERE key = 'analytics_last_post_id'")
+
+    def top_authors(self, hashtag, column, limit=5):
+        """Returns [(author, value)] for the top authors of hashtag by 'posts' or 'engagement'.
+
+        Served from the (hashtag, <column> DESC, id) index; ties keep first-appearance order.
+        """
+        if column not in ('posts', 'engagement'):
+            raise ValueError(f"Unknown author_stats column: {column}")
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT author, {column} FROM author_stats WHERE hashtag = ? ORDER BY {column} DESC, id LIMIT ?',
+                (hashtag, limit)
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def daily_post_counts(self, hashtag):
+        """Returns {date: posts} from the counters for one hashtag."""
+        with self._lock:
+            rows = self._conn.execute('SELECT date, count FROM daily_post_counts WHERE hashtag = ?', (hashtag,)).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def max_daily_post_counts(self):
+        """Returns {hashtag: busiest day's post count} from the counters."""
+        with self._lock:
+            rows = self._conn.execute('SELECT hashtag, MAX(count) FROM daily_post_counts GROUP BY hashtag').fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def analytics_from_counters(self, top_n=5):
+        """Builds bluesky_analytics rows from the counters, in analyze_bluesky_data() order."""
+        with self._lock:
+            daily = self._conn.execute(
+                'SELECT d.hashtag, d.date, d.count FROM daily_post_counts d '
+                'JOIN analytics_hashtags h ON h.hashtag = d.hashtag '
+                'ORDER BY h.first_dated_post_id, d.first_post_id'
+            ).fetchall()
+            hashtags = [row[0] for row in self._conn.execute('SELECT hashtag FROM analytics_hashtags ORDER BY id')]
+
+        analytics_data = [{'metric': 'daily_posts', 'hashtag': hashtag, 'date': date, 'author': None, 'value': count}
+                          for hashtag, date, count in daily]
+        for metric, column in (('top_poster_activity', 'posts'), ('top_poster_engagement', 'engagement')):
+            for hashtag in hashtags:
+                for author, value in self.top_authors(hashtag, column, top_n):
+                    analytics_data.append({'metric': metric, 'hashtag': hashtag, 'author': author, 'date': None, 'value': value})
+        return analytics_data
+
+    # --- per-hashtag summaries ---
+
+    def replace_bluesky_analytics(self, rows):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM bluesky_analytics')
+            self._conn.executemany(
+                'INSERT INTO bluesky_analytics (metric, hashtag, date, author, value) VALUES (?, ?, ?, ?, ?)',
+                [tuple(row.get(field) for field in ANALYTICS_FIELDS) for row in rows]
+            )
+
+    def upsert_youtube(self, data):
+        self._upsert('youtube_analytics', 'hashtag', YOUTUBE_FIELDS, data)
+
+    def upsert_reddit(self, data):
+        self._upsert('reddit_analytics', 'subreddit', REDDIT_FIELDS, data)
+
+    def _upsert(self, table, key, fields, data):
+        updates = ', '.join(f'{field} = excluded.{field}' for field in fields if field != key)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f'INSERT INTO {table} ({", ".join(fields)}) VALUES ({", ".join("?" * len(fields))}) '
+                f'ON CONFLICT ({key}) DO UPDATE SET {updates}',
+                tuple(data.get(field) for field in fields)
+            )
+
+    def rows(self, table):
+        fields = CSV_TABLES[table][1]
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(f'SELECT {", ".join(fields)} FROM {table} ORDER BY rowid')]
+
+    # --- CSV compatibility ---
+
+    def import_csv(self, table, csv_path):
+        """Loads one CSV file into its table. Posts already present (by URI) are skipped."""
+        if not os.path.exists(csv_path):
+            return 0
+        if table == 'posts':
+            return self.import_posts_csv(csv_path)
+        fields = CSV_TABLES[table][1]
+        with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
+            rows = [tuple(row.get(field) or None for field in fields) for row in csv.DictReader(csvfile)]
+        verb = 'INSERT OR IGNORE' if table == 'bluesky_analytics' else 'INSERT OR REPLACE'
+        with self._lock, self._conn:
+            if table == 'bluesky_analytics':
+                self._conn.execute('DELETE FROM bluesky_analytics')
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f'{verb} INTO {table} ({", ".join(fields)}) VALUES ({", ".join("?" * len(fields))})',
+                rows
+            )
+            imported = self._conn.total_changes - before
+        print(f"[DEBUG] Imported {imported} rows from {csv_path} into {table}.")
+        return imported
+
+    def import_posts_csv(self, csv_path, chunk_size=5000):
+        """Streams the scraped-posts CSV into the posts table one chunk at a time, in one transaction.
+
+        Text stays as read (an empty author is ''); empty counts become 0.
+        """
+        reader = ScrapedPostsReader(csv_path, chunk_size)
+        insert = f'INSERT OR IGNORE INTO posts ({", ".join(POST_FIELDS)}) VALUES ({", ".join("?" * len(POST_FIELDS))})'
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            for chunk in reader.chunks():
+                self._conn.executemany(insert, [tuple(post[field] for field in POST_FIELDS) for post in chunk])
+            imported = self._conn.total_changes - before
+        print(f"[DEBUG] Imported {imported} rows from {csv_path} into posts.")
+        return imported
+
+    def export_csv(self, table, csv_path):
+        fields = CSV_TABLES[table][1]
+        tmp_path = csv_path + '.tmp'
+        with self._lock, open(tmp_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(fields)
+            cursor = self._conn.execute(f'SELECT {", ".join(fields)} FROM {table} ORDER BY rowid')
+            while True:
+                batch = cursor.fetchmany(5000)
+                if not batch:
+                    break
+                writer.writerows(['' if value is None else value for value in row] for row in batch)
+        os.replace(tmp_path, csv_path)
+        print(f"[DEBUG] Exported {table} to {csv_path}")
+
+def import_csvs(store, data_dir=DATA_DIR, tables=None):
+    for table in tables or CSV_TABLES:
+        store.import_csv(table, os.path.join(data_dir, CSV_TABLES[table][0]))
+
+def export_csvs(store, data_dir=DATA_DIR, tables=SUMMARY_TABLES):
+    for table in tables:
+        store.export_csv(table, os.path.join(data_dir, CSV_TABLES[table][0]))
+
+def open_store(db_path=DB_PATH, data_dir=DATA_DIR):
+    """Opens the store, importing the legacy CSV files the first time the database is created."""
+    is_new = not os.path.exists(db_path)
+    store = SocialDataStore(db_path)
+    if is_new:
+        print(f"[INFO] Creating {db_path} and importing existing CSV data.")
+        import_csvs(store, data_dir)
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export the SQLite social data store.")
+    parser.add_argument('action', choices=['import', 'export'], help='import the CSV files in data/, or export the database to them')
+    parser.add_argument('--db', default=DB_PATH, help='Path to the SQLite database.')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Directory holding the CSV files.')
+    parser.add_argument('--posts', action='store_true', help='Also export BlueskyScrapedData.csv (scans the whole post history).')
+    args = parser.parse_args()
+
+    store = SocialDataStore(args.db)
+    try:
+        if args.action == 'import':
+            import_csvs(store, args.data_dir)
+        else:
+            tables = (['posts'] if args.posts else []) + SUMMARY_TABLES
+            export_csvs(store, args.data_dir, tables)
+        print(f"[INFO] {store.count('posts')} posts in {args.db}", file=sys.stderr)
+    finally:
+        store.close()
+
+if __name__ == '__main__':
+    main()
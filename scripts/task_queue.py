@@ -0,0 +1,446 @@
+"""
+Durable task queue shared by api_server.py (producer) and gremlin.py (worker).
+
+Tasks live in data/tasks.db (SQLite in WAL mode), so an enqueue is one
+INSERT and a claim is one short write transaction; concurrent producers and
+workers never lose or double-claim a task. A claimed task is leased: the
+worker renews the lease while the task runs, and if the worker dies the task
+becomes claimable again once the lease expires. A failed attempt is retried
+with exponential backoff up to the task's max_attempts.
+
+Tasks have a kind. Enqueueing a task whose (kind, dedupe_key) matches a task
+that is still queued returns the queued task instead of adding another, and
+claim_related() lets a worker take several queued tasks of one kind at once
+and run them as a single unit of work.
+
+Every finished attempt is appended to the task_results table, which keeps
+the last RESULT_RETENTION_DAYS days and at most MAX_RESULTS rows.
+
+Workers block on a UDP "doorbell" on localhost instead of polling: enqueue()
+sends one datagram to DOORBELL_PORT. The doorbell only shortens the wait; a
+missed ring costs at most the worker's idle timeout.
+
+Usage:
+  python task_queue.py status                  # queued and running tasks
+  python task_queue.py results [--task-id ID] [--limit N]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import argparse
+import datetime
+import threading
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SCRIPT_DIR, '..', 'data')
+DB_PATH = os.path.join(DATA_DIR, 'tasks.db')
+
+DOORBELL_HOST = '127.0.0.1'
+DOORBELL_PORT = 5055
+
+LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 30
+RESULT_RETENTION_DAYS = 30
+MAX_RESULTS = 5000
+# stdout/stderr are stored up to this many characters (the end of the output is kept).
+MAX_OUTPUT_CHARS = 20000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL DEFAULT 'command',
+    dedupe_key TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    lease_token TEXT,
+    lease_expires REAL,
+    worker TEXT,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_available ON tasks (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_dedupe_key ON tasks (kind, dedupe_key);
+
+CREATE TABLE IF NOT EXISTS task_results (
+    id INTEGER PRIMARY KEY,
+    task_id TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    returncode INTEGER,
+    stdout TEXT,
+    stderr TEXT,
+    worker TEXT,
+    started_at TEXT,
+    finished_at TEXT NOT NULL,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_task_results_task_id ON task_results (task_id, id);
+CREATE INDEX IF NOT EXISTS idx_task_results_finished_at ON task_results (finished_at);
+"""
+
+RESULT_FIELDS = ('task_id', 'attempt', 'status', 'returncode', 'stdout', 'stderr', 'worker', 'started_at', 'finished_at', 'metrics')
+
+# Columns added after the first version of the schema: table -> [(column, definition)].
+ADDED_COLUMNS = {
+    'tasks': [('kind', "TEXT NOT NULL DEFAULT 'command'"), ('dedupe_key', 'TEXT')],
+    'task_results': [('metrics', 'TEXT')],
+}
+
+def _now_iso():
+    return datetime.datetime.now().isoformat()
+
+def _tail(text):
+    if text is not None and len(text) > MAX_OUTPUT_CHARS:
+        return text[-MAX_OUTPUT_CHARS:]
+    return text
+
+def ring_doorbell(host=DOORBELL_HOST, port=DOORBELL_PORT):
+    """Wakes a worker blocked in Doorbell.wait(). Nothing happens if no worker is listening."""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b'task', (host, port))
+    except OSError as e:
+        print(f"[DEBUG] Could not ring the task doorbell: {e}")
+
+class Doorbell:
+    """The worker's end of the doorbell: a UDP socket that wait() blocks on.
+
+    If the port is taken (another worker is running), wait() falls back to
+    sleeping for its timeout, which still picks up every task.
+    """
+
+    def __init__(self, host=DOORBELL_HOST, port=DOORBELL_PORT):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self._sock.bind((host, port))
+        except OSError as e:
+            print(f"[WARNING] Task doorbell port {port} is unavailable ({e}); polling instead.")
+            self._sock.close()
+            self._sock = None
+
+    def wait(self, timeout):
+        """Blocks until a ring or until timeout seconds pass. Returns True if it was rung."""
+        if self._sock is None:
+            time.sleep(timeout)
+            return False
+        self._sock.settimeout(max(timeout, 0.01))
+        try:
+            self._sock.recv(64)
+        except socket.timeout:
+            return False
+        # Several enqueues in a row ring several times; one wake-up covers them all.
+        self._sock.setblocking(False)
+        try:
+            while True:
+                self._sock.recv(64)
+        except (BlockingIOError, OSError):
+            pass
+        return True
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+class TaskQueue:
+    """SQLite-backed task queue. Safe to share between threads and between processes.
+
+    claim() returns a task dict with id, payload, attempts and lease_token;
+    pass it back to renew(), ack() or nack(). A worker whose lease expired
+    and whose task was claimed again can no longer ack it.
+    """
+
+    def __init__(self, db_path=DB_PATH, doorbell_port=DOORBELL_PORT):
+        self.db_path = db_path
+        self.doorbell_port = doorbell_port
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.RLock()
+        # Autocommit mode: claims open their own BEGIN IMMEDIATE transaction.
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._add_missing_columns()
+        self._conn.executescript(SCHEMA)
+
+    def _add_missing_columns(self):
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row['name'] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+            if not existing:
+                continue
+            for column, definition in columns:
+                if column not in existing:
+                    self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn)
+
+    def enqueue(self, payload, task_id=None, max_attempts=DEFAULT_MAX_ATTEMPTS, ring=True, kind='command', dedupe_key=None):
+        """Adds a task with a JSON-serializable payload and returns its id.
+
+        If a queued task of the same kind has the same dedupe_key, nothing is
+        added and that task's id is returned.
+        """
+        task_id = task_id or str(uuid.uuid4())
+        now = time.time()
+        with self._lock, self._transaction():
+            if dedupe_key is not None:
+                row = self._conn.execute(
+                    "SELECT id FROM tasks WHERE kind = ? AND dedupe_key = ? AND status = 'queued'", (kind, dedupe_key)
+                ).fetchone()
+                if row is not None:
+                    print(f"[DEBUG] Task {row['id']} already queued for {kind} {dedupe_key}; not adding another.")
+                    return row['id']
+            self._conn.execute(
+                'INSERT INTO tasks (id, kind, dedupe_key, payload, max_attempts, created_at, available_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (task_id, kind, dedupe_key, json.dumps(payload, ensure_ascii=False), max_attempts, now, now)
+            )
+        if ring:
+            ring_doorbell(port=self.doorbell_port)
+        return task_id
+
+    def claim(self, worker, lease_seconds=LEASE_SECONDS, exclude_kinds=()):
+        """Leases the oldest task that is due (or whose previous lease expired) to worker. Returns None if there is none.
+
+        Tasks of exclude_kinds are left for a later claim.
+        """
+        now = time.time()
+        excluded = ''.join(' AND kind != ?' for _ in exclude_kinds)
+        with self._lock, self._transaction():
+            while True:
+                row = self._conn.execute(
+                    f"""SELECT * FROM tasks
+                       WHERE ((status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_expires < ?)){excluded}
+                       ORDER BY available_at, created_at LIMIT 1""",
+                    (now, now, *exclude_kinds)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row['status'] == 'running' and row['attempts'] >= row['max_attempts']:
+                    # The last allowed attempt died with its worker.
+                    self._finish(row, {'status': 'lost', 'stderr': f"Lease held by {row['worker']} expired"}, None)
+                    continue
+                if row['status'] == 'running':
+                    print(f"[WARNING] Reclaiming task {row['id']} from {row['worker']} after its lease expired.")
+                return self._lease(row, worker, now + lease_seconds)
+
+    def claim_related(self, task, limit, lease_seconds=LEASE_SECONDS):
+        """Leases up to limit more due, queued tasks of task's kind to the same worker, oldest first."""
+        now = time.time()
+        with self._lock, self._transaction():
+            rows = self._conn.execute(
+                """SELECT * FROM tasks WHERE status = 'queued' AND available_at <= ? AND kind = ? AND id != ?
+                   ORDER BY available_at, created_at LIMIT ?""",
+                (now, task['kind'], task['id'], limit)
+            ).fetchall()
+            return [self._lease(row, task['worker'], now + lease_seconds) for row in rows]
+
+    def _lease(self, row, worker, lease_expires):
+        lease_token = uuid.uuid4().hex
+        self._conn.execute(
+            """UPDATE tasks SET status = 'running', attempts = attempts + 1, lease_token = ?, lease_expires = ?, worker = ?
+               WHERE id = ?""",
+            (lease_token, lease_expires, worker, row['id'])
+        )
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'payload': json.loads(row['payload']),
+            'attempts': row['attempts'] + 1,
+            'max_attempts': row['max_attempts'],
+            'created_at': row['created_at'],
+            'lease_token': lease_token,
+            'worker': worker,
+            'started_at': _now_iso(),
+        }
+
+    def renew(self, task, lease_seconds=LEASE_SECONDS):
+        """Extends the task's lease. Returns False if the lease was lost to another worker."""
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE tasks SET lease_expires = ? WHERE id = ? AND lease_token = ?',
+                (time.time() + lease_seconds, task['id'], task['lease_token'])
+            )
+        return cursor.rowcount == 1
+
+    def keep_alive(self, task, lease_seconds=LEASE_SECONDS):
+        """Context manager that renews the task's lease in the background while the block runs."""
+        return _LeaseKeeper(self, task, lease_seconds)
+
+    def ack(self, task, result):
+        """Records a successful attempt and removes the task. Returns False if the lease was lost."""
+        with self._lock, self._transaction():
+            row = self._leased_row(task)
+            if row is None:
+                return False
+            self._finish(row, dict(result, status=result.get('status', 'completed')), task)
+            return True
+
+    def nack(self, task, result, retry_delay=RETRY_DELAY_SECONDS):
+        """Records a failed attempt and requeues the task with backoff, or drops it after its last attempt.
+
+        Returns False if the lease was lost.
+        """
+        with self._lock, self._transaction():
+            row = self._leased_row(task)
+            if row is None:
+                return False
+            result = dict(result, status=result.get('status', 'failed'))
+            if row['attempts'] >= row['max_attempts']:
+                self._finish(row, result, task)
+                return True
+            self._record(row, result, task)
+            delay = retry_delay * 2 ** (row['attempts'] - 1)
+            self._conn.execute(
+                """UPDATE tasks SET status = 'queued', available_at = ?, lease_token = NULL, lease_expires = NULL, last_error = ?
+                   WHERE id = ?""",
+                (time.time() + delay, _tail(result.get('stderr')), row['id'])
+            )
+            print(f"[INFO] Task {row['id']} failed (attempt {row['attempts']}/{row['max_attempts']}); retrying in {delay}s.")
+            return True
+
+    def _leased_row(self, task):
+        row = self._conn.execute('SELECT * FROM tasks WHERE id = ? AND lease_token = ?', (task['id'], task['lease_token'])).fetchone()
+        if row is None:
+            print(f"[WARNING] Task {task['id']} is no longer leased to {task.get('worker')}; dropping its result.")
+        return row
+
+    def _record(self, row, result, task):
+        self._conn.execute(
+            f'INSERT INTO task_results ({", ".join(RESULT_FIELDS)}) VALUES ({", ".join("?" * len(RESULT_FIELDS))})',
+            (row['id'], row['attempts'], result['status'], result.get('returncode'), _tail(result.get('stdout')),
+             _tail(result.get('stderr')), row['worker'], task['started_at'] if task else None, _now_iso(),
+             json.dumps(result['metrics']) if result.get('metrics') else None)
+        )
+
+    def _finish(self, row, result, task):
+        self._record(row, result, task)
+        self._conn.execute('DELETE FROM tasks WHERE id = ?', (row['id'],))
+        self._prune_results()
+
+    def _prune_results(self):
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=RESULT_RETENTION_DAYS)).isoformat()
+        self._conn.execute('DELETE FROM task_results WHERE finished_at < ?', (cutoff,))
+        self._conn.execute(
+            'DELETE FROM task_results WHERE id <= (SELECT id FROM task_results ORDER BY id DESC LIMIT 1 OFFSET ?)',
+            (MAX_RESULTS,)
+        )
+
+    def next_due_in(self, default, exclude_kinds=()):
+        """Seconds until the next queued task is due or a running task's lease expires (at most default)."""
+        excluded = ' AND '.join('kind != ?' for _ in exclude_kinds)
+        with self._lock:
+            row = self._conn.execute(
+                f"""SELECT MIN(CASE WHEN status = 'queued' THEN available_at ELSE lease_expires END) FROM tasks
+                    {'WHERE ' + excluded if excluded else ''}""",
+                exclude_kinds
+            ).fetchone()
+        if row[0] is None:
+            return default
+        return min(max(row[0] - time.time(), 0), default)
+
+    def depth(self):
+        """Returns {kind: {status: count}} over the pending tasks."""
+        with self._lock:
+            rows = self._conn.execute('SELECT kind, status, COUNT(*) AS count FROM tasks GROUP BY kind, status').fetchall()
+        depth = {}
+        for row in rows:
+            depth.setdefault(row['kind'], {})[row['status']] = row['count']
+        return depth
+
+    def pending(self):
+        """Returns the queued and running tasks, oldest first."""
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM tasks ORDER BY created_at').fetchall()
+        return [dict(row, payload=json.loads(row['payload'])) for row in rows]
+
+    def task(self, task_id):
+        """Returns the pending task with task_id, or None once it has finished (see results())."""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        return dict(row, payload=json.loads(row['payload'])) if row else None
+
+    def results(self, task_id=None, limit=50):
+        """Returns recorded attempts, newest first, optionally for one task."""
+        query = f'SELECT {", ".join(RESULT_FIELDS)} FROM task_results'
+        params = []
+        if task_id:
+            query += ' WHERE task_id = ?'
+            params.append(task_id)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(row, metrics=json.loads(row['metrics']) if row['metrics'] else None) for row in rows]
+
+class _ImmediateTransaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK: takes the write lock up front, so two claimers cannot pick the same row."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+class _LeaseKeeper:
+    def __init__(self, queue, task, lease_seconds):
+        self.queue = queue
+        self.task = task
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            if not self.queue.renew(self.task, self.lease_seconds):
+                print(f"[WARNING] Lost the lease on task {self.task['id']}.")
+                return
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the gremlin task queue.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help="List queued and running tasks.")
+    results_parser = subparsers.add_parser('results', help="Show recorded task attempts, newest first.")
+    results_parser.add_argument('--task-id', help="Only this task's attempts.")
+    results_parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    queue = TaskQueue()
+    if args.command == 'status':
+        tasks = queue.pending()
+        for task in tasks:
+            print(f"{task['id']}  {task['kind']:<18} {task['status']:<8} attempt {task['attempts']}/{task['max_attempts']}  {json.dumps(task['payload'], ensure_ascii=False)}")
+        print(f"[INFO] {len(tasks)} pending tasks: {json.dumps(queue.depth())}")
+    else:
+        print(json.dumps(queue.results(args.task_id, args.limit), indent=2, ensure_ascii=False))
+    queue.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
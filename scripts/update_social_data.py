@@ -1,24 +1,55 @@
-import re
-import csv
 import os
-import subprocess
 import sys
 import json
+import time
 import argparse
+import threading
 from collections import defaultdict
 from datetime import datetime
 
+from scraper_engine import create_engine, ENGINES
+from fetch_scheduler import FetchScheduler
+from storage import open_store, export_csvs
+from uri_index import PostUriIndex
+from response_cache import open_cache, add_cache_arguments
+from youtube_scraper import summarize_youtube_videos
+from live_updates import NOTIFY_URL, LiveUpdatePublisher
+from config_store import read_config
+from bluesky_scraper import parse_created_at
+
+# subreddit_status values that mean the subreddit cannot be read, so no Reddit request is made for it.
+SKIPPED_SUBREDDIT_STATUSES = ('Non-existent', 'Banned', 'Private')
+
+def subreddit_map(config, hashtags):
+    """Returns {hashtag: subreddit name or None}, computed once from the config.
+
+    A hashtag's subreddit is the hashtag itself unless subreddit_overrides
+    names another one (or null for none). Hashtags whose subreddit_status is
+    Non-existent, Banned or Private map to None. Both lookups ignore case.
+    """
+    overrides = {key.lower(): value for key, value in config.get('subreddit_overrides', {}).items()}
+    statuses = {key.lower(): value for key, value in config.get('subreddit_status', {}).items()}
+    subreddits = {}
+    for hashtag in hashtags:
+        subreddit = overrides.get(hashtag.lower(), hashtag)
+        status = statuses.get(hashtag.lower())
+        if status in SKIPPED_SUBREDDIT_STATUSES:
+            print(f"[DEBUG] Skipping Reddit for #{hashtag}: subreddit is {status}.")
+            subreddit = None
+        subreddits[hashtag] = subreddit
+    return subreddits
+
 def read_hashtags_from_config(config_path):
     print(f"[DEBUG] Reading hashtags from: {config_path}")
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        config = read_config(config_path)
         hashtags = config.get('hashtags', [])
         platform_url_templates = config.get('platform_url_templates', {})
+        subreddits = subreddit_map(config, hashtags)
         hashtag_data = []
         for hashtag in hashtags:
             platforms = {platform: template.format(hashtag) for platform, template in platform_url_templates.items()}
-            hashtag_data.append({'hashtag': hashtag, 'platforms': platforms})
+            hashtag_data.append({'hashtag': hashtag, 'platforms': platforms, 'subreddit': subreddits[hashtag]})
         print(f"[DEBUG] Found {len(hashtag_data)} hashtags.")
         return hashtag_data
     except FileNotFoundError:
@@ -27,160 +58,46 @@ def read_hashtags_from_config(config_path):
         print(f"[ERROR] Error reading config file: {e}")
     return []
 
-def get_existing_post_uris(csv_path):
-    """Reads a CSV file and returns a set of post URIs."""
-    if not os.path.exists(csv_path):
-        return set()
-    
-    uris = set()
-    try:
-        with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                if 'uri' in row:
-                    uris.add(row['uri'])
-    except Exception as e:
-        print(f"[ERROR] Could not read existing scraped data from {csv_path}: {e}")
-    print(f"[DEBUG] Found {len(uris)} existing post URIs.")
-    return uris
-
-def get_existing_youtube_hashtags(csv_path):
-    """Reads a CSV file and returns a set of hashtags."""
-    if not os.path.exists(csv_path):
-        return set()
-    
-    hashtags = set()
-    try:
-        with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                if 'hashtag' in row:
-                    hashtags.add(row['hashtag'])
-    except Exception as e:
-        print(f"[ERROR] Could not read existing YouTube data from {csv_path}: {e}")
-    print(f"[DEBUG] Found {len(hashtags)} existing YouTube hashtags.")
-    return hashtags
-
-def read_all_scraped_data(csv_path):
-    """Reads all data from the scraped data CSV."""
-    data = []
-    if not os.path.exists(csv_path):
-        return data
-    try:
-        with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                row['likes'] = int(row.get('likes', 0))
-                row['reposts'] = int(row.get('reposts', 0))
-                row['replies'] = int(row.get('replies', 0))
-                data.append(row)
-    except Exception as e:
-        print(f"[ERROR] Could not read all scraped data from {csv_path}: {e}")
-    print(f"[DEBUG] Read {len(data)} total posts for analysis.")
-    return data
-
-def run_scraper(scraper_path, args, timeout=60):
-    """Runs a scraper script as a subprocess."""
-    command = [sys.executable, scraper_path] + args
-    print(f"[DEBUG] Scraper command: {' '.join(command)}", file=sys.stderr)
-    
-    env = os.environ.copy()
-    env['PYTHONIOENCODING'] = 'utf-8'
-
-    try:
-        process = subprocess.run(
-            command, 
-            capture_output=True, 
-            text=True, 
-            encoding='utf-8', 
-            check=True, 
-            env=env,
-            timeout=timeout
-        )
-        
-        if process.stdout:
-            if process.stderr:
-                print(f"[DEBUG] Scraper stderr for {scraper_path}:\n{process.stderr}", file=sys.stderr)
-            return json.loads(process.stdout)
-        else:
-            print(f"[DEBUG] Scraper stdout for {scraper_path} was empty.")
-            if process.stderr:
-                print(f"[DEBUG] Scraper stderr for {scraper_path}:\n{process.stderr}", file=sys.stderr)
-            return None
-
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] Scraper process failed for {scraper_path} (Exit Code: {e.returncode}):\n{e.stderr}")
-    except FileNotFoundError:
-        print(f"[ERROR] {scraper_path} not found.")
-    except json.JSONDecodeError as e:
-        print(f"[ERROR] JSON decoding error for {scraper_path}: {e}\nRaw stdout: {process.stdout}")
-    except subprocess.TimeoutExpired:
-        print(f"[ERROR] Scraper process timed out for {scraper_path}.")
-    except Exception as e:
-        print(f"[ERROR] Unexpected error running scraper {scraper_path}: {e}")
-    
-    return None
-
-def write_reddit_data_to_csv(data, output_csv_path):
-    print(f"[DEBUG] Writing Reddit data to: {output_csv_path}")
-    fieldnames = ['subreddit', 'subscribers', 'active_user_count', 'posts_count', 'avg_score', 'avg_comments']
-
-    file_exists = os.path.exists(output_csv_path)
-
+def newest_post_marker(posts, current=None):
+    """Returns {'uri', 'created_at'} of the newest post in posts, or current if none is newer."""
+    newest = current
+    newest_at = parse_created_at(current['created_at']) if current else None
+    for post in posts:
+        created_at = parse_created_at(post.get('created_at'))
+        if created_at and (newest_at is None or created_at > newest_at):
+            newest = {'uri': post['uri'], 'created_at': post['created_at']}
+            newest_at = created_at
+    return newest
+
+def read_high_water_marks(state_path, store, hashtags):
+    """Returns the newest stored post per hashtag as {hashtag: {'uri', 'created_at'}}.
+
+    Marks are kept in a small JSON state file next to the data. Hashtags missing
+    from it (new tags, or a first run) are looked up once in the store.
+    """
+    marks = {}
+    if os.path.exists(state_path):
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                marks = json.load(f)
+            print(f"[DEBUG] Loaded Bluesky high-water marks for {len(marks)} hashtags.")
+        except Exception as e:
+            print(f"[ERROR] Could not read Bluesky high-water marks from {state_path}, rebuilding: {e}")
+
+    for hashtag in hashtags:
+        if hashtag not in marks:
+            marker = store.newest_post(hashtag)
+            if marker:
+                marks[hashtag] = marker
+    return marks
+
+def write_high_water_marks(marks, state_path):
     try:
-        with open(output_csv_path, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            if not file_exists or os.stat(output_csv_path).st_size == 0:
-                writer.writeheader()
-            writer.writerow(data)
-        print(f"[DEBUG] Reddit data written to {output_csv_path}")
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump(marks, f, indent=2, ensure_ascii=False)
+        print(f"[DEBUG] Bluesky high-water marks written to {state_path}")
     except Exception as e:
-        print(f"[ERROR] Error writing Reddit data CSV: {e}")
-
-def write_youtube_data_to_csv(data, output_csv_path):
-    print(f"[DEBUG] Writing YouTube data to: {output_csv_path}")
-    fieldnames = ['hashtag', 'total_views', 'total_likes', 'total_comments', 'top_video_url']
-
-    # Read existing data
-    existing_data = []
-    if os.path.exists(output_csv_path):
-        with open(output_csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                existing_data.append(row)
-
-    # Update or add new data
-    updated = False
-    for i, row in enumerate(existing_data):
-        if row['hashtag'] == data['hashtag']:
-            existing_data[i] = data
-            updated = True
-            break
-    if not updated:
-        existing_data.append(data)
-
-    try:
-        with open(output_csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(existing_data)
-        print(f"[DEBUG] YouTube data written to {output_csv_path}")
-    except Exception as e:
-        print(f"[ERROR] Error writing YouTube data CSV: {e}")
-
-def write_scraped_data_to_csv(data, output_csv_path, write_header=False):
-    print(f"[DEBUG] Appending {len(data)} new posts to: {output_csv_path}")
-    fieldnames = ['hashtag', 'author', 'text', 'likes', 'reposts', 'replies', 'uri', 'created_at']
-
-    try:
-        with open(output_csv_path, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            if write_header:
-                writer.writeheader()
-            writer.writerows(data)
-        print(f"[DEBUG] Scraped data written to {output_csv_path}")
-    except Exception as e:
-        print(f"[ERROR] Error writing scraped data CSV: {e}")
+        print(f"[ERROR] Error writing Bluesky high-water marks: {e}")
 
 def analyze_bluesky_data(scraped_data):
     print("[DEBUG] Analyzing Bluesky data...")
@@ -190,7 +107,7 @@ def analyze_bluesky_data(scraped_data):
 
     for post in scraped_data:
         hashtag = post['hashtag']
-        author = post['author']
+        author = post['author'] or ''
         created_at_str = post.get('created_at')
         likes = post.get('likes', 0)
         reposts = post.get('reposts', 0)
@@ -225,144 +142,399 @@ def analyze_bluesky_data(scraped_data):
     print(f"[DEBUG] Generated {len(analytics_data)} analytics records.")
     return analytics_data
 
-def write_analytics_to_csv(data, output_csv_path):
-    print(f"[DEBUG] Writing analytics data to: {output_csv_path}")
-    fieldnames = ['metric', 'hashtag', 'date', 'author', 'value']
-    
+def aggregate_new_posts(store):
+    """Folds posts stored since the last aggregation into the persisted analytics counters.
+
+    Applies the same per-post rules as analyze_bluesky_data, but only to posts
+    with an id above the stored high-water id, so the cost follows the batch
+    size instead of the history. Returns the number of posts aggregated.
+    """
+    last_post_id = store.get_state('analytics_last_post_id', 0)
+    hashtags = {}
+    daily_counts = {}
+    author_counts = {}
+    processed = 0
+
+    for post in store.iter_posts(after_id=last_post_id):
+        processed += 1
+        last_post_id = post['id']
+        hashtag = post['hashtag']
+        author = post['author'] or ''
+        created_at_str = post.get('created_at')
+        hashtags.setdefault(hashtag, None)
+
+        if created_at_str:
+            try:
+                post_date = str(datetime.fromisoformat(created_at_str.replace('Z', '+00:00')).date())
+                if hashtags[hashtag] is None:
+                    hashtags[hashtag] = post['id']
+                counts = daily_counts.setdefault((hashtag, post_date), [0, post['id']])
+                counts[0] += 1
+            except ValueError:
+                print(f"[WARNING] Could not parse date {created_at_str} for post {post.get('uri')}")
+
+        counts = author_counts.setdefault((hashtag, author), [0, 0])
+        counts[0] += 1
+        counts[1] += post.get('likes', 0) + post.get('reposts', 0) + post.get('replies', 0)
+
+    if processed:
+        store.apply_analytics_increments(hashtags, daily_counts, author_counts, last_post_id)
+    print(f"[DEBUG] Aggregated {processed} new posts into the analytics counters.")
+    return processed
+
+def recompute_analytics(store, engine='python'):
+    """Recomputes the Bluesky analytics from every stored post with the row-wise or NumPy engine."""
+    if engine == 'numpy':
+        from columnar_analytics import analyze_columns, load_post_columns_from_store
+        return analyze_columns(load_post_columns_from_store(store))
+    return analyze_bluesky_data(store.iter_posts())
+
+def verify_analytics(store, engine='python'):
+    """Checks the incrementally maintained analytics against a full recompute."""
+    expected = recompute_analytics(store, engine)
+    actual = store.analytics_from_counters()
+    if expected == actual:
+        print(f"[INFO] Analytics verification passed ({len(actual)} records match a full recompute).")
+        return True
+
+    print(f"[ERROR] Analytics verification failed: {len(actual)} incremental records vs {len(expected)} recomputed.")
+    shown = 0
+    for index in range(max(len(expected), len(actual))):
+        expected_row = expected[index] if index < len(expected) else None
+        actual_row = actual[index] if index < len(actual) else None
+        if expected_row != actual_row:
+            print(f"[ERROR]   #{index}: expected {expected_row}, got {actual_row}")
+            shown += 1
+            if shown >= 10:
+                break
+    print("[ERROR] Run with --rebuild-analytics to recompute the counters from the stored posts.")
+    return False
+
+class UpdateContext:
+    """State shared by every fetch job of one update run.
+
+    Jobs run concurrently on the fetch scheduler. A post URI counts as seen if
+    it is already in the store or was claimed earlier in this run; both checks
+    happen under uri_lock so a post tagged with two hashtags is kept once.
+    Stored URIs are looked up through uri_index (the Bloom filter in front of
+    the store) when one is given, otherwise in the store directly.
+    """
+
+    def __init__(self, engine, store, high_water_marks, bluesky_max_pages=10, uri_index=None):
+        self.engine = engine
+        self.store = store
+        self.uri_index = uri_index
+        self.high_water_marks = high_water_marks
+        self.bluesky_max_pages = bluesky_max_pages
+        self.claimed_uris = set()
+        self.uri_lock = threading.Lock()
+
+    def claim_new_posts(self, posts):
+        """Returns the posts whose URI has not been seen yet and marks them as seen."""
+        new_posts = []
+        with self.uri_lock:
+            candidates = {}
+            for post in posts:
+                if post['uri'] not in self.claimed_uris and post['uri'] not in candidates:
+                    candidates[post['uri']] = post
+            stored = (self.uri_index or self.store).existing_uris(candidates)
+            for uri, post in candidates.items():
+                if uri not in stored:
+                    self.claimed_uris.add(uri)
+                    new_posts.append(post)
+        return new_posts
+
+    def advance_high_water_mark(self, hashtag, posts):
+        with self.uri_lock:
+            marker = newest_post_marker(posts, self.high_water_marks.get(hashtag))
+            if marker:
+                self.high_water_marks[hashtag] = marker
+
+def process_bluesky(hashtag, context):
+    """Returns the new posts for hashtag, or None if the search failed.
+
+    The high-water mark only moves when the walk reached it (or there was
+    none yet): a walk cut short by bluesky_max_pages leaves a gap of unread
+    posts below its oldest page, and the next run has to walk into it again.
+    """
+    print(f"[DEBUG] Processing Bluesky for #{hashtag}")
+    with context.uri_lock:
+        stop_at = context.high_water_marks.get(hashtag)
+    result = context.engine.search_bluesky(hashtag, limit=100, stop_at=stop_at, max_pages=context.bluesky_max_pages)
+    if result is None:
+        print(f"[ERROR] Bluesky search failed for #{hashtag}; its high-water mark is unchanged.")
+        return None
+    scraped_posts = result['posts']
+    print(f"[DEBUG] Bluesky scraper returned {len(scraped_posts)} posts for #{hashtag}")
+    if result['complete'] or stop_at is None:
+        context.advance_high_water_mark(hashtag, scraped_posts)
+    else:
+        print(f"[WARNING] Bluesky search for #{hashtag} stopped after {context.bluesky_max_pages} pages before reaching "
+              f"the stored posts; its high-water mark is unchanged. Raise --bluesky-max-pages to close the gap.")
+    if not scraped_posts:
+        return []
+    new_posts = context.claim_new_posts(scraped_posts)
+    if new_posts:
+        print(f"[INFO] Found {len(new_posts)} new posts for #{hashtag}.")
+    else:
+        print(f"[DEBUG] No new Bluesky posts found for #{hashtag}.")
+    return new_posts
+
+def process_reddit(hashtag, subreddit_name, context):
+    print(f"[DEBUG] Processing Reddit for #{hashtag} (r/{subreddit_name})")
+    reddit_data = context.engine.get_subreddit_data(subreddit_name)
+    return store_reddit_analytics(subreddit_name, reddit_data, context)
+
+def process_reddit_batch(subreddits, context, max_workers=1):
+    """Fetches every hashtag's subreddit in one bulk collection and stores each summary.
+
+    subreddits maps hashtag to subreddit name. Returns {hashtag: status} for
+    the hashtags whose subreddit status could be determined.
+    """
+    print(f"[DEBUG] Processing Reddit for {len(subreddits)} hashtags in one batch")
+    names = list(dict.fromkeys(subreddits.values()))
+    reddit_data, statuses = context.engine.collect_subreddits(names, max_workers=max_workers)
+    for name in names:
+        store_reddit_analytics(name, reddit_data.get(name), context)
+    return {hashtag: statuses[name] for hashtag, name in subreddits.items() if statuses.get(name)}
+
+def store_reddit_analytics(subreddit_name, reddit_data, context):
+    if reddit_data:
+        processed_reddit_data = {
+            'subreddit': subreddit_name,
+            'subscribers': reddit_data.get('subscribers', 0),
+            'active_user_count': reddit_data.get('active_user_count', 0),
+            'posts_count': len(reddit_data.get('posts', [])),
+            'avg_score': sum(p['score'] for p in reddit_data.get('posts', [])) / len(reddit_data['posts']) if reddit_data.get('posts') else 0,
+            'avg_comments': sum(p['num_comments'] for p in reddit_data.get('posts', [])) / len(reddit_data['posts']) if reddit_data.get('posts') else 0
+        }
+        context.store.upsert_reddit(processed_reddit_data)
+        return processed_reddit_data
+    return None
+
+def record_subreddit_statuses(config_path, statuses):
+    """Writes the statuses found by a Reddit batch to subreddit_status in config.json."""
+    if not statuses:
+        return
     try:
-        with open(output_csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
-        print(f"[DEBUG] Analytics data written to {output_csv_path}")
+        from reddit_scraper import update_subreddit_status
+        update_subreddit_status(config_path, statuses)
     except Exception as e:
-        print(f"[ERROR] Error writing analytics CSV: {e}")
+        print(f"[WARNING] Could not record subreddit statuses in {config_path}: {e}")
+
+def process_youtube(hashtag, context):
+    """Stores and returns the hashtag's YouTube summary, or returns None if the search failed.
+
+    A failed search leaves the stored summary alone rather than replacing it with zeros.
+    """
+    print(f"[DEBUG] Processing YouTube for #{hashtag}")
+    videos = context.engine.search_youtube(hashtag, limit=5)
+    if videos is None:
+        print(f"[ERROR] YouTube search failed for #{hashtag}; keeping its stored summary.")
+        return None
+    return store_youtube_analytics(hashtag, videos, context)
+
+def process_youtube_batch(hashtags, context, limiter):
+    """Searches YouTube for all hashtags in one batch and stores each summary.
+
+    Every search of the batch goes through limiter, the scheduler's YouTube
+    PlatformLimiter, with as many searches at a time as it allows.
+    """
+    print(f"[DEBUG] Processing YouTube for {len(hashtags)} hashtags in one batch")
+    results = context.engine.search_youtube_batch(hashtags, limit=5, max_workers=limiter.max_concurrency, limiter=limiter)
+    summaries = {}
+    for hashtag in hashtags:
+        if results.get(hashtag) is None:
+            print(f"[ERROR] YouTube search failed for #{hashtag}; keeping its stored summary.")
+            summaries[hashtag] = None
+        else:
+            summaries[hashtag] = store_youtube_analytics(hashtag, results[hashtag], context)
+    return summaries
+
+def store_youtube_analytics(hashtag, videos, context):
+    youtube_analytics = summarize_youtube_videos(hashtag, videos)
+    print(f"[DEBUG] YouTube analytics for #{hashtag} before writing: {youtube_analytics}".encode('utf-8', 'ignore').decode('utf-8'))
+    context.store.upsert_youtube(youtube_analytics)
+    return youtube_analytics
 
-def process_single_hashtag(entry, script_dir, project_root, existing_uris, existing_youtube_hashtags, output_scraped_csv_path, output_reddit_analytics_csv_path, output_youtube_analytics_csv_path):
+def hashtag_jobs(entry, context, include_reddit=True, include_youtube=True):
+    """Returns the scheduler jobs, (key, platform, func, args), for one hashtag entry."""
     hashtag = entry['hashtag']
     platforms = entry['platforms']
-    new_posts_found_for_hashtag = False
-    all_new_posts_for_hashtag = []
-
-    if 'Bluesky' in platforms and platforms['Bluesky']:
-        print(f"[DEBUG] Processing Bluesky for #{hashtag}")
-        bluesky_scraper_path = os.path.join(script_dir, 'bluesky_scraper.py')
-        scraped_posts = run_scraper(bluesky_scraper_path, [hashtag, '--limit', '100'])
-        print(f"[DEBUG] Bluesky scraper returned {len(scraped_posts) if scraped_posts else 0} posts for #{hashtag}")
-        if scraped_posts:
-            new_posts = [post for post in scraped_posts if post['uri'] not in existing_uris]
-
-            if new_posts:
-                new_posts_found_for_hashtag = True
-                print(f"[INFO] Found {len(new_posts)} new posts for #{hashtag}.")
-                all_new_posts_for_hashtag.extend(new_posts)
-                for post in new_posts:
-                    existing_uris.add(post['uri'])
-            else:
-                print(f"[DEBUG] No new Bluesky posts found for #{hashtag}.")
-    
-    if 'Reddit' in platforms and platforms['Reddit']:
-        reddit_url = platforms['Reddit']
-        match = re.search(r'reddit\\.com/r/([^/]+)', reddit_url)
-        if match:
-            subreddit_name = match.group(1)
-            reddit_scraper_path = os.path.join(script_dir, 'reddit_scraper.py')
-            reddit_data = run_scraper(reddit_scraper_path, [subreddit_name])
-            
-            if reddit_data:
-                processed_reddit_data = {
-                    'subreddit': subreddit_name,
-                    'subscribers': reddit_data.get('subscribers', 0),
-                    'active_user_count': reddit_data.get('active_user_count', 0),
-                    'posts_count': len(reddit_data.get('posts', [])),
-                    'avg_score': sum(p['score'] for p in reddit_data.get('posts', [])) / len(reddit_data['posts']) if reddit_data.get('posts') else 0,
-                    'avg_comments': sum(p['num_comments'] for p in reddit_data.get('posts', [])) / len(reddit_data['posts']) if reddit_data.get('posts') else 0
-                }
-                write_reddit_data_to_csv(processed_reddit_data, output_reddit_analytics_csv_path)
-
-    if 'YouTube' in platforms and platforms['YouTube']:
-        print(f"[DEBUG] Processing YouTube for #{hashtag}")
-        youtube_scraper_path = os.path.join(script_dir, 'youtube_scraper.py')
-        videos = run_scraper(youtube_scraper_path, [hashtag, '--limit', '5'])
-        
-        
-        youtube_analytics = {
-            'hashtag': hashtag,
-            'total_views': sum(v.get('view_count') or 0 for v in videos),
-            'total_likes': sum(v.get('like_count') or 0 for v in videos),
-            'total_comments': sum(v.get('comment_count') or 0 for v in videos),
-            'top_video_url': videos[0].get('url') if videos else ""
-        }
-        print(f"[DEBUG] YouTube analytics for #{hashtag} before writing: {youtube_analytics}".encode('utf-8', 'ignore').decode('utf-8'))
-        
-        write_youtube_data_to_csv(youtube_analytics, output_youtube_analytics_csv_path)
-    return new_posts_found_for_hashtag, all_new_posts_for_hashtag
+    jobs = []
+    if platforms.get('Bluesky'):
+        jobs.append((('Bluesky', hashtag), 'Bluesky', process_bluesky, (hashtag, context)))
+    if include_reddit and platforms.get('Reddit') and entry.get('subreddit'):
+        jobs.append((('Reddit', hashtag), 'Reddit', process_reddit, (hashtag, entry['subreddit'], context)))
+    if include_youtube and platforms.get('YouTube'):
+        jobs.append((('YouTube', hashtag), 'YouTube', process_youtube, (hashtag, context)))
+    return jobs
+
+def process_single_hashtag(entry, context, on_result=None):
+    """Processes every platform of one hashtag sequentially in the calling thread.
+
+    on_result, like the fetch scheduler's, is called as (key, result) after each platform.
+    """
+    results = {}
+    for key, platform, func, args in hashtag_jobs(entry, context):
+        results[key] = func(*args)
+        if on_result:
+            on_result(key, results[key])
+    new_posts = results.get(('Bluesky', entry['hashtag'])) or []
+    return bool(new_posts), new_posts
+
+def read_scraper_limits(config_path):
+    try:
+        return read_config(config_path).get('scraper_limits', {})
+    except Exception as e:
+        print(f"[WARNING] Could not read scraper limits from {config_path}, using defaults: {e}")
+        return {}
 
 def main():
     parser = argparse.ArgumentParser(description="Update social media data for hashtags.")
-    parser.add_argument("--hashtag", help="Process only a specific hashtag.")
+    parser.add_argument("--hashtag", nargs='+', help="Process only these hashtags.")
+    parser.add_argument(
+        "--engine",
+        choices=sorted(ENGINES),
+        default='inprocess',
+        help="Run scrapers in this process with shared clients (default) or as one subprocess per call."
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=8,
+        help="Maximum number of concurrent fetches across all platforms (1 processes hashtags sequentially)."
+    )
+    parser.add_argument(
+        "--bluesky-max-pages",
+        type=int,
+        default=10,
+        help="Maximum number of 100-post search pages to walk back per hashtag before reaching stored data."
+    )
+    parser.add_argument(
+        "--verify-analytics",
+        action="store_true",
+        help="After updating, check the incremental analytics against a full recompute over all stored posts."
+    )
+    parser.add_argument(
+        "--analytics-engine",
+        choices=['python', 'numpy'],
+        default='python',
+        help="Engine for the full recompute done by --verify-analytics; 'numpy' is the columnar engine for large stores."
+    )
+    parser.add_argument(
+        "--rebuild-analytics",
+        action="store_true",
+        help="Reset the analytics counters and rebuild them from every stored post."
+    )
+    parser.add_argument(
+        "--push-url",
+        default=NOTIFY_URL,
+        help="api_server endpoint that relays each hashtag's fresh numbers to open reports as soon as its scrape finishes."
+    )
+    parser.add_argument(
+        "--no-push",
+        action="store_true",
+        help="Do not push live updates to open reports."
+    )
+    add_cache_arguments(parser)
     args = parser.parse_args()
+    start_time = time.perf_counter()
 
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.join(script_dir, '..')
     
     config_path = os.path.join(project_root, 'config.json')
-    output_scraped_csv_path = os.path.join(project_root, 'data', 'BlueskyScrapedData.csv')
-    output_analytics_csv_path = os.path.join(project_root, 'data', 'BlueskyAnalytics.csv')
-    output_reddit_analytics_csv_path = os.path.join(project_root, 'data', 'RedditAnalytics.csv')
-    output_youtube_analytics_csv_path = os.path.join(project_root, 'data', 'YouTubeAnalytics.csv')
+    data_dir = os.path.join(project_root, 'data')
+    high_water_marks_path = os.path.join(data_dir, 'BlueskyHighWaterMarks.json')
 
-    print("[DEBUG] Starting incremental update_social_data.py.")
+    print(f"[DEBUG] Starting incremental update_social_data.py (engine: {args.engine}).")
     hashtag_data = read_hashtags_from_config(config_path)
-    
-    existing_uris = get_existing_post_uris(output_scraped_csv_path)
-    existing_youtube_hashtags = get_existing_youtube_hashtags(output_youtube_analytics_csv_path)
-    
-    if os.path.exists(output_reddit_analytics_csv_path):
-        os.remove(output_reddit_analytics_csv_path)
-
-    file_exists = os.path.exists(output_scraped_csv_path)
-    if not file_exists:
-        write_scraped_data_to_csv([], output_scraped_csv_path, write_header=True)
-
-    new_posts_found = False
-    all_new_posts = []
 
     if not hashtag_data:
         print("[DEBUG] No hashtags found or error reading config. Exiting.")
         return
 
-    print(f"[DEBUG] Existing YouTube hashtags before processing: {existing_youtube_hashtags}")
     if args.hashtag:
-        # Process only the specified hashtag
-        cleaned_hashtag_arg = args.hashtag.strip('"')
-        filtered_hashtag_data = [entry for entry in hashtag_data if entry['hashtag'].lower() == cleaned_hashtag_arg.lower()]
-        if not filtered_hashtag_data:
-            print(f"[ERROR] Hashtag '{args.hashtag}' not found in config.json. Exiting.")
+        # Process only the specified hashtags
+        requested = {hashtag.strip('"').lower(): hashtag.strip('"') for hashtag in args.hashtag}
+        configured = {entry['hashtag'].lower() for entry in hashtag_data}
+        for key, hashtag in requested.items():
+            if key not in configured:
+                print(f"[WARNING] Hashtag '{hashtag}' not found in config.json. Skipping.")
+        hashtag_data = [entry for entry in hashtag_data if entry['hashtag'].lower() in requested]
+        if not hashtag_data:
+            print(f"[ERROR] None of the hashtags {', '.join(args.hashtag)} are in config.json. Exiting.")
             return
-        for entry in filtered_hashtag_data:
-            found, new_posts = process_single_hashtag(entry, script_dir, project_root, existing_uris, existing_youtube_hashtags, output_scraped_csv_path, output_reddit_analytics_csv_path, output_youtube_analytics_csv_path)
-            if found:
-                new_posts_found = True
-                all_new_posts.extend(new_posts)
-    else:
-        # Process all hashtags
+
+    cache = open_cache(config_path, os.path.join(data_dir, 'cache.db'), max_age=args.max_age, no_cache=args.no_cache)
+    engine = create_engine(args.engine, cache)
+    store = open_store(os.path.join(data_dir, 'social.db'), data_dir)
+    high_water_marks = read_high_water_marks(high_water_marks_path, store, [entry['hashtag'] for entry in hashtag_data])
+
+    uri_index = PostUriIndex(store, os.path.join(data_dir, 'post_uris.bloom'))
+    context = UpdateContext(engine, store, high_water_marks, args.bluesky_max_pages, uri_index)
+    publisher = None if args.no_push else LiveUpdatePublisher(store, args.push_url)
+    on_result = publisher.on_result if publisher else None
+    if args.max_workers <= 1:
+        new_posts_by_hashtag = {}
         for entry in hashtag_data:
-            found, new_posts = process_single_hashtag(entry, script_dir, project_root, existing_uris, existing_youtube_hashtags, output_scraped_csv_path, output_reddit_analytics_csv_path, output_youtube_analytics_csv_path)
-            if found:
-                new_posts_found = True
-                all_new_posts.extend(new_posts)
+            _, new_posts_by_hashtag[entry['hashtag']] = process_single_hashtag(entry, context, on_result)
+    else:
+        scheduler = FetchScheduler(read_scraper_limits(config_path), max_workers=args.max_workers)
+        # A full run searches YouTube as one batch job so yt-dlp starts once per worker, and
+        # collects Reddit as one bulk job so subreddit metadata takes one info
+        # request per 100 subreddits; each batch runs as many requests at a
+        # time as its platform limit allows. Runs for several --hashtag values
+        # (e.g. merged gremlin tasks) batch the same way.
+        batch = len(hashtag_data) > 1
+        jobs = [job for entry in hashtag_data
+                for job in hashtag_jobs(entry, context, include_reddit=not batch, include_youtube=not batch)]
+        subreddits = {entry['hashtag']: entry['subreddit'] for entry in hashtag_data
+                      if entry['platforms'].get('Reddit') and entry.get('subreddit')}
+        if batch and subreddits:
+            max_workers = scheduler.limiter('Reddit').max_concurrency
+            jobs.append((('Reddit', None), 'Reddit', process_reddit_batch, (subreddits, context, max_workers)))
+        youtube_hashtags = [entry['hashtag'] for entry in hashtag_data if entry['platforms'].get('YouTube')]
+        if batch and youtube_hashtags:
+            # No scheduler slot for the batch job itself: each of its searches takes one.
+            jobs.append((('YouTube', None), None, process_youtube_batch, (youtube_hashtags, context, scheduler.limiter('YouTube'))))
+        print(f"[DEBUG] Scheduling {len(jobs)} fetch jobs on up to {args.max_workers} workers.")
+        results = scheduler.run(jobs, on_result=on_result)
+        new_posts_by_hashtag = {entry['hashtag']: results.get(('Bluesky', entry['hashtag'])) or [] for entry in hashtag_data}
+        record_subreddit_statuses(config_path, results.get(('Reddit', None)))
+
+    # Keep config order in the store regardless of which fetch finished first.
+    all_new_posts = [post for entry in hashtag_data for post in new_posts_by_hashtag.get(entry['hashtag'], [])]
 
     if all_new_posts:
-        write_scraped_data_to_csv(all_new_posts, output_scraped_csv_path)
-
-    if new_posts_found:
-        print("[DEBUG] New posts were found. Re-analyzing all Bluesky data...")
-        all_scraped_data = read_all_scraped_data(output_scraped_csv_path)
-        analytics_data = analyze_bluesky_data(all_scraped_data)
-        write_analytics_to_csv(analytics_data, output_analytics_csv_path)
+        store.insert_posts(all_new_posts)
+    if publisher:
+        publisher.report()
+    uri_index.sync()
+    uri_index.report()
+    uri_index.close()
+    # Only persisted once the posts they point at are stored.
+    write_high_water_marks(context.high_water_marks, high_water_marks_path)
+
+    if args.rebuild_analytics:
+        print("[INFO] Rebuilding analytics counters from all stored posts.")
+        store.reset_analytics_counters()
+    if aggregate_new_posts(store):
+        store.replace_bluesky_analytics(store.analytics_from_counters())
     else:
-        print("[DEBUG] No new posts found. Analytics file is up-to-date.")
+        print("[DEBUG] No new posts found. Analytics are up-to-date.")
+    if args.verify_analytics:
+        verify_analytics(store, args.analytics_engine)
+
+    # make-html.py and other readers still consume the per-hashtag summary CSVs.
+    export_csvs(store, data_dir)
+    store.close()
+    cache.report()
+    cache.close()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"[INFO] Update finished in {elapsed:.1f}s using the {args.engine} scraper engine.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
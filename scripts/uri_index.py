@@ -0,0 +1,231 @@
+"""
+Persistent dedup index for stored post URIs.
+
+data/post_uris.bloom is a Bloom filter over every URI in the posts table,
+memory-mapped so opening it costs nothing however long the history is. A
+"not present" answer is final; a "maybe present" answer is confirmed with an
+exact indexed lookup in SQLite, so false positives never drop a post. The file
+remembers the highest post id it has seen and catches up from the store on
+open and after each insert, so it stays in sync even if another process
+appended posts.
+
+Usage:
+  python uri_index.py rebuild         # rebuild the filter from the store
+  python uri_index.py stats
+"""
+
+import os
+import sys
+import math
+import mmap
+import struct
+import hashlib
+import argparse
+
+from file_lock import FileLock
+from storage import DB_PATH, DATA_DIR, SocialDataStore
+
+INDEX_PATH = os.path.join(DATA_DIR, 'post_uris.bloom')
+
+# magic, version, number of bits, number of hash functions, capacity, URIs added, highest post id added
+HEADER = struct.Struct('<8sIQIQQQ')
+MAGIC = b'URIBLOOM'
+VERSION = 1
+MIN_CAPACITY = 100_000
+FALSE_POSITIVE_RATE = 0.001
+
+def _hash_pair(uri):
+    digest = hashlib.blake2b(uri.encode('utf-8'), digest_size=16).digest()
+    # The second hash is the step of the double-hashing sequence; keep it odd so it never collapses to one bit.
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+class UriBloomFilter:
+    """A Bloom filter stored in a memory-mapped file (header followed by the bit array).
+
+    Bit positions come from one blake2b digest split into two 64-bit hashes
+    (double hashing), so each URI is hashed once however many bits it sets.
+    """
+
+    def __init__(self, path, file, mm):
+        self.path = path
+        self._file = file
+        self._mm = mm
+        _, _, self.num_bits, self.num_hashes, self.capacity, self.count, self.last_post_id = HEADER.unpack_from(mm, 0)
+
+    @classmethod
+    def create(cls, path, capacity, error_rate=FALSE_POSITIVE_RATE):
+        """Writes an empty filter sized for capacity URIs at error_rate and opens it."""
+        capacity = max(int(capacity), 1)
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        num_bits = (num_bits + 7) // 8 * 8
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, num_bits, num_hashes, capacity, 0, 0))
+            f.truncate(HEADER.size + num_bits // 8)
+        os.replace(tmp_path, path)
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path):
+        """Opens an existing filter, or returns None if it is missing or unreadable."""
+        if not os.path.exists(path):
+            return None
+        file = open(path, 'r+b')
+        try:
+            mm = mmap.mmap(file.fileno(), 0)
+        except ValueError:  # empty file
+            file.close()
+            return None
+        if len(mm) >= HEADER.size:
+            magic, version, num_bits = HEADER.unpack_from(mm, 0)[:3]
+            if magic == MAGIC and version == VERSION and len(mm) == HEADER.size + num_bits // 8:
+                return cls(path, file, mm)
+        print(f"[WARNING] {path} is not a valid URI index; it will be rebuilt.")
+        mm.close()
+        file.close()
+        return None
+
+    def is_current(self):
+        """False once another process has replaced the file (e.g. rebuilt it larger)."""
+        try:
+            return os.path.samestat(os.fstat(self._file.fileno()), os.stat(self.path))
+        except OSError:
+            return False
+
+    def reload_header(self):
+        """Picks up the count and post id another process may have written."""
+        self.count, self.last_post_id = HEADER.unpack_from(self._mm, 0)[5:]
+
+    def _positions(self, uri):
+        h1, h2 = _hash_pair(uri)
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, uri):
+        mm = self._mm
+        for position in self._positions(uri):
+            offset = HEADER.size + (position >> 3)
+            mm[offset] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, uri):
+        mm = self._mm
+        for position in self._positions(uri):
+            if not mm[HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def flush(self):
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.num_bits, self.num_hashes, self.capacity, self.count, self.last_post_id)
+        self._mm.flush()
+
+    def close(self):
+        # The header is only written by flush() under the index lock, so closing
+        # never overwrites a newer count written by another process.
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+class PostUriIndex:
+    """Bloom filter in front of the store's exact URI lookup.
+
+    existing_uris() has the same contract as SocialDataStore.existing_uris(),
+    so UpdateContext can use either. sync() folds posts stored since the last
+    sync into the filter; when the filter outgrows its capacity it is rebuilt
+    at twice the size.
+    """
+
+    def __init__(self, store, path=INDEX_PATH):
+        self.store = store
+        self.path = path
+        self._lock = FileLock(path + '.lock')
+        self.bloom = None
+        self.checked = 0
+        self.maybe = 0
+        self.false_positives = 0
+        with self._lock:
+            self.bloom = UriBloomFilter.open(path)
+            if self.bloom is None:
+                self._rebuild()
+            else:
+                self._sync()
+
+    def _rebuild(self, capacity=None):
+        if self.bloom is not None:
+            self.bloom.close()
+        post_count = self.store.count('posts')
+        capacity = capacity or max(MIN_CAPACITY, post_count * 2)
+        print(f"[INFO] Building URI index {self.path} for {post_count} posts (capacity {capacity}).")
+        self.bloom = UriBloomFilter.create(self.path, capacity)
+        self._sync()
+
+    def _sync(self):
+        if not self.bloom.is_current():
+            self.bloom.close()
+            self.bloom = UriBloomFilter.open(self.path)
+            if self.bloom is None:
+                self._rebuild()
+                return
+        self.bloom.reload_header()
+        added = 0
+        for post_id, uri in self.store.iter_post_uris(after_id=self.bloom.last_post_id):
+            self.bloom.add(uri)
+            self.bloom.last_post_id = post_id
+            added += 1
+        self.bloom.flush()
+        if self.bloom.count > self.bloom.capacity:
+            self._rebuild(self.bloom.capacity * 2)
+        elif added:
+            print(f"[DEBUG] Added {added} URIs to {self.path}.")
+
+    def sync(self):
+        """Adds every post stored since the last sync (by this or any other process)."""
+        with self._lock:
+            self._sync()
+
+    def existing_uris(self, uris):
+        """Returns the subset of uris that is already stored."""
+        uris = list(uris)
+        maybe = [uri for uri in uris if uri in self.bloom]
+        found = self.store.existing_uris(maybe) if maybe else set()
+        self.checked += len(uris)
+        self.maybe += len(maybe)
+        self.false_positives += len(maybe) - len(found)
+        return found
+
+    def report(self):
+        if self.checked:
+            print(f"[DEBUG] URI index: {self.checked} lookups, {self.checked - self.maybe} answered by the filter alone, "
+                  f"{self.maybe} confirmed in the store ({self.false_positives} false positives).")
+
+    def close(self):
+        if self.bloom is not None:
+            with self._lock:
+                self.bloom.close()
+            self.bloom = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the post URI dedup index.")
+    parser.add_argument('action', choices=['rebuild', 'stats'])
+    parser.add_argument('--db', default=DB_PATH, help='Path to the SQLite database.')
+    parser.add_argument('--index', default=INDEX_PATH, help='Path to the Bloom filter file.')
+    args = parser.parse_args()
+
+    store = SocialDataStore(args.db)
+    try:
+        if args.action == 'rebuild' and os.path.exists(args.index):
+            os.remove(args.index)
+        index = PostUriIndex(store, args.index)
+        bloom = index.bloom
+        fill = bloom.count / bloom.capacity if bloom.capacity else 0
+        print(f"[INFO] {args.index}: {bloom.count} URIs, capacity {bloom.capacity} ({fill:.0%} full), "
+              f"{bloom.num_bits // 8 // 1024} KiB, {bloom.num_hashes} hashes, synced to post id {bloom.last_post_id}",
+              file=sys.stderr)
+        index.close()
+    finally:
+        store.close()
+
+if __name__ == '__main__':
+    main()
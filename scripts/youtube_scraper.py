@@ -1,58 +1,264 @@
 import json
+import queue
 import subprocess
 import sys
 import argparse
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
-def search_youtube(hashtag, limit=5):
-    """Searches YouTube for a given hashtag and returns video metadata."""
-    search_query = f"ytsearch{limit}:{hashtag}"
-    command = [
-        'yt-dlp',
-        '--dump-json',
-        '--no-download',
-        '--ignore-errors',
-        search_query
-    ]
-    
+from fetch_scheduler import PlatformLimiter
 
+try:
+    import yt_dlp
+except ImportError:  # fall back to the yt-dlp command-line tool
+    yt_dlp = None
+
+# Seconds to wait for one video's metadata (or, in subprocess mode, for the next line of output).
+DEFAULT_VIDEO_TIMEOUT = 30
+
+def video_to_dict(video_data, hashtag):
+    return {
+        'hashtag': hashtag,
+        'title': video_data.get('title'),
+        'url': video_data.get('webpage_url') or video_data.get('url'),
+        'channel': video_data.get('channel') or video_data.get('uploader'),
+        'view_count': video_data.get('view_count'),
+        'like_count': video_data.get('like_count'),
+        'comment_count': video_data.get('comment_count')
+    }
+
+def ydl_options():
+    return {
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+        'ignoreerrors': True,
+        'socket_timeout': DEFAULT_VIDEO_TIMEOUT,
+        # Search results only need the video list; full extraction is done per video when asked for.
+        'extract_flat': 'in_playlist',
+    }
+
+def _extract_videos(ydl, entries, hashtag, video_timeout):
+    """Fully extracts each flat search entry, skipping videos that fail or exceed video_timeout.
+
+    Extractions run one at a time on a helper thread (ydl is not thread-safe).
+    A timed-out extraction cannot be cancelled, and every later one would wait
+    behind it, so the first timeout stops the walk: the stuck thread is left to
+    finish in the background and the remaining videos keep their search data.
+    Returns (videos, abandoned), where abandoned means such a thread may still
+    be using ydl.
+    """
+    videos = []
+    abandoned = False
+    executor = ThreadPoolExecutor(max_workers=1)
     try:
-        process = subprocess.run(
-            command, 
-            capture_output=True, 
-            text=True, 
-            encoding='utf-8', 
-            check=True
-        )
-        
-        videos = []
-        for line in process.stdout.strip().split('\n'):
-            video_data = json.loads(line)
-            videos.append({
-                'hashtag': hashtag,
-                'title': video_data.get('title'),
-                'url': video_data.get('webpage_url'),
-                'channel': video_data.get('channel'),
-                'view_count': video_data.get('view_count'),
-                'like_count': video_data.get('like_count'),
-                'comment_count': video_data.get('comment_count')
-            })
+        futures = [(entry, executor.submit(ydl.extract_info, entry.get('url') or entry.get('id'), download=False))
+                   for entry in entries]
+        for entry, future in futures:
+            video_data = None
+            if not abandoned:
+                try:
+                    video_data = future.result(timeout=video_timeout)
+                except FutureTimeoutError:
+                    print(f"[WARNING] Timed out after {video_timeout}s fetching {entry.get('url')} for '{hashtag}'; using search data for it and the remaining videos.", file=sys.stderr)
+                    abandoned = True
+                    for _, pending in futures:
+                        pending.cancel()
+                except Exception as e:
+                    print(f"[WARNING] Could not fetch {entry.get('url')} for '{hashtag}': {type(e).__name__}: {e}", file=sys.stderr)
+            videos.append(video_to_dict(video_data or entry, hashtag))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return videos, abandoned
+
+def _search_with(ydl, hashtag, limit, flat, video_timeout):
+    """Runs one search on ydl; returns (videos, abandoned) like _extract_videos."""
+    result = ydl.extract_info(f"ytsearch{limit}:{hashtag}", download=False)
+    if result is None:
+        # With ignoreerrors, yt-dlp reports a failed search as None instead of raising.
+        raise RuntimeError(f"yt-dlp search for '{hashtag}' failed")
+    entries = [entry for entry in result.get('entries') or [] if entry]
+    if flat:
+        return [video_to_dict(entry, hashtag) for entry in entries], False
+    return _extract_videos(ydl, entries, hashtag, video_timeout)
+
+def search_youtube_api(hashtag, limit=5, flat=False, video_timeout=DEFAULT_VIDEO_TIMEOUT):
+    """Searches YouTube through yt-dlp's Python API, in this process.
+
+    The search itself is a flat extraction (titles, URLs, channels and view
+    counts, no per-video requests). Unless flat is True each hit is then
+    extracted fully for like and comment counts, with video_timeout seconds
+    allowed per video.
+    """
+    ydl = yt_dlp.YoutubeDL(ydl_options())
+    abandoned = False
+    try:
+        videos, abandoned = _search_with(ydl, hashtag, limit, flat, video_timeout)
         return videos
+    finally:
+        # A timed-out extraction thread may still be using ydl; it is left to that thread.
+        if not abandoned:
+            ydl.close()
+
+def _read_lines(stream, lines):
+    for line in stream:
+        lines.put(line)
+    lines.put(None)
 
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] yt-dlp failed for hashtag '{hashtag}': {e.stderr}", file=sys.stderr)
-        return []
+def search_youtube_subprocess(hashtag, limit=5, flat=False, video_timeout=DEFAULT_VIDEO_TIMEOUT):
+    """Searches YouTube with the yt-dlp CLI, parsing each JSON line as soon as it is printed.
+
+    A line that is not valid JSON is skipped, and the process is stopped when
+    no new video arrives within video_timeout seconds; whatever was parsed by
+    then is returned.
+    """
+    command = ['yt-dlp', '--dump-json', '--no-download', '--ignore-errors', '--socket-timeout', str(video_timeout)]
+    if flat:
+        command.append('--flat-playlist')
+    command.append(f"ytsearch{limit}:{hashtag}")
+
+    try:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace'
+        )
+    except FileNotFoundError:
+        print("[ERROR] yt-dlp is not installed or not on PATH.", file=sys.stderr)
+        return None
+
+    # A reader thread keeps the timeout portable: select() does not work on pipes on Windows.
+    lines = queue.Queue()
+    threading.Thread(target=_read_lines, args=(process.stdout, lines), daemon=True).start()
+    stderr_lines = []
+    threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True).start()
+
+    videos = []
+    while True:
+        try:
+            line = lines.get(timeout=video_timeout)
+        except queue.Empty:
+            print(f"[WARNING] yt-dlp produced no output for {video_timeout}s for '{hashtag}'; stopping after {len(videos)} videos.", file=sys.stderr)
+            process.kill()
+            break
+        if line is None:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            videos.append(video_to_dict(json.loads(line), hashtag))
+        except json.JSONDecodeError as e:
+            print(f"[WARNING] Skipping unparseable yt-dlp output line for '{hashtag}': {e}", file=sys.stderr)
+
+    returncode = process.wait()
+    if returncode not in (0, None) and not videos:
+        print(f"[ERROR] yt-dlp failed for hashtag '{hashtag}' (exit code {returncode}): {''.join(stderr_lines)}", file=sys.stderr)
+        return None
+    return videos
+
+def search_youtube(hashtag, limit=5, flat=False, video_timeout=DEFAULT_VIDEO_TIMEOUT, mode=None):
+    """Searches YouTube for a given hashtag and returns video metadata, or None if the search failed.
+
+    mode is 'api' (yt-dlp's Python API, the default when the yt_dlp package is
+    installed) or 'subprocess' (the streaming yt-dlp CLI).
+    """
+    mode = mode or ('api' if yt_dlp else 'subprocess')
+    try:
+        if mode == 'api':
+            return search_youtube_api(hashtag, limit, flat, video_timeout)
+        return search_youtube_subprocess(hashtag, limit, flat, video_timeout)
     except Exception as e:
         print(f"[ERROR] An unexpected error occurred while searching YouTube for '{hashtag}': {e}", file=sys.stderr)
-        return []
+        return None
+
+def search_youtube_batch(hashtags, limit=5, max_workers=4, flat=False, video_timeout=DEFAULT_VIDEO_TIMEOUT, mode=None, limiter=None):
+    """Searches YouTube for many hashtags at once and returns {hashtag: videos}.
+
+    Up to max_workers searches run at a time. In 'api' mode each worker thread
+    keeps its own YoutubeDL instance (YoutubeDL is not thread-safe), so
+    yt-dlp's extractors are set up once per worker rather than once per
+    hashtag; an instance that a timed-out extraction may still be using is
+    replaced. limiter, a context manager such as fetch_scheduler's
+    PlatformLimiter, is entered around each search, so the batch keeps the
+    platform's concurrency and spacing limits. A failing hashtag maps to
+    None without affecting the others.
+    """
+    mode = mode or ('api' if yt_dlp else 'subprocess')
+    limiter = limiter or contextlib.nullcontext()
+    results = {}
+    local = threading.local()
+    instances = []
+    instances_lock = threading.Lock()
+
+    def search(hashtag):
+        with limiter:
+            if mode != 'api':
+                return search_youtube_subprocess(hashtag, limit, flat, video_timeout)
+            ydl = getattr(local, 'ydl', None)
+            if ydl is None:
+                ydl = local.ydl = yt_dlp.YoutubeDL(ydl_options())
+                with instances_lock:
+                    instances.append(ydl)
+            videos, abandoned = _search_with(ydl, hashtag, limit, flat, video_timeout)
+            if abandoned:
+                local.ydl = None
+                with instances_lock:
+                    instances.remove(ydl)
+            return videos
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {executor.submit(search, hashtag): hashtag for hashtag in hashtags}
+            for future, hashtag in futures.items():
+                try:
+                    results[hashtag] = future.result()
+                except Exception as e:
+                    print(f"[ERROR] An unexpected error occurred while searching YouTube for '{hashtag}': {e}", file=sys.stderr)
+                    results[hashtag] = None
+    finally:
+        for ydl in instances:
+            ydl.close()
+    return results
+
+def summarize_youtube_videos(hashtag, videos):
+    """Builds the youtube_analytics row for one hashtag from its search results."""
+    videos = videos or []
+    return {
+        'hashtag': hashtag,
+        'total_views': sum(v.get('view_count') or 0 for v in videos),
+        'total_likes': sum(v.get('like_count') or 0 for v in videos),
+        'total_comments': sum(v.get('comment_count') or 0 for v in videos),
+        'top_video_url': videos[0].get('url') if videos else ""
+    }
 
 def main():
     parser = argparse.ArgumentParser(description="Search YouTube for videos with a specific hashtag.")
-    parser.add_argument("hashtag", help="The hashtag to search for.")
+    parser.add_argument(
+        "hashtags",
+        nargs='+',
+        metavar='hashtag',
+        help="The hashtag to search for. With several hashtags they are searched as one batch and the output maps each hashtag to its videos."
+    )
     parser.add_argument("--limit", type=int, default=5, help="The maximum number of videos to return.")
+    parser.add_argument("--mode", choices=['api', 'subprocess'], help="Use yt-dlp's Python API (default if installed) or the streaming yt-dlp CLI.")
+    parser.add_argument("--flat", action="store_true", help="Only return search-page data (no like/comment counts), without fetching each video.")
+    parser.add_argument("--video-timeout", type=float, default=DEFAULT_VIDEO_TIMEOUT, help="Seconds allowed per video.")
+    parser.add_argument("--max-workers", type=int, default=4, help="Concurrent searches in batch mode.")
+    parser.add_argument("--min-interval", type=float, default=0.0, help="Minimum seconds between two search starts in batch mode.")
     args = parser.parse_args()
 
-    videos = search_youtube(args.hashtag, args.limit)
-    print(json.dumps(videos))
+    if len(args.hashtags) == 1:
+        videos = search_youtube(args.hashtags[0], args.limit, args.flat, args.video_timeout, args.mode)
+        print(json.dumps(videos))
+    else:
+        limiter = PlatformLimiter('YouTube', args.max_workers, args.min_interval)
+        results = search_youtube_batch(args.hashtags, args.limit, args.max_workers, args.flat, args.video_timeout, args.mode, limiter)
+        print(json.dumps(results))
 
 if __name__ == "__main__":
     main()
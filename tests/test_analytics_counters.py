@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from storage import SocialDataStore
+from update_social_data import aggregate_new_posts, verify_analytics
+
+AUTHORS = ['alice.bsky.social', 'bob.bsky.social', 'carol.bsky.social', '', None]
+
+def random_posts(rng, count, first_id):
+    return [{
+        'hashtag': rng.choice(['LearnGraph', 'Python']),
+        'author': rng.choice(AUTHORS),
+        'text': 'post',
+        'likes': rng.randint(0, 5),
+        'reposts': rng.randint(0, 5),
+        'replies': rng.randint(0, 5),
+        'uri': f'at://post/{first_id + n}',
+        'created_at': f'2026-10-{rng.randint(1, 3):02d}T12:00:00Z',
+    } for n in range(count)]
+
+@pytest.mark.parametrize('seed', range(10))
+def test_counters_match_full_recompute_with_missing_authors(tmp_path, seed):
+    rng = random.Random(seed)
+    store = SocialDataStore(str(tmp_path / 'social.db'))
+    try:
+        posts = 0
+        for _ in range(4):
+            batch = random_posts(rng, rng.randint(1, 15), posts)
+            store.insert_posts(batch)
+            posts += len(batch)
+            aggregate_new_posts(store)
+        assert verify_analytics(store)
+        assert verify_analytics(store, engine='numpy')
+        for hashtag in ['LearnGraph', 'Python']:
+            authors = [author for author, _ in store.top_authors(hashtag, 'posts', limit=len(AUTHORS))]
+            assert len(authors) == len(set(authors))
+            assert None not in authors
+    finally:
+        store.close()
@@ -0,0 +1,130 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+import collector
+import youtube_scraper
+from collector import UNHEALTHY_AFTER_ERRORS, Collector, start_health_server
+from scraper_engine import ScraperEngine
+
+try:
+    import reddit_scraper
+except ImportError:  # e.g. a prawcore release without the exceptions reddit_scraper catches
+    reddit_scraper = None
+
+class FailingBlueskyClient:
+    """Stands in for an atproto Client whose searches fail."""
+
+    def __init__(self):
+        self.app = self
+        self.bsky = self
+        self.feed = self
+
+    def search_posts(self, params):
+        raise ConnectionError('network unreachable')
+
+class FailingYoutubeDL:
+    """yt-dlp with ignoreerrors reports a failed extraction as None."""
+
+    def __init__(self, options):
+        pass
+
+    def extract_info(self, url, download=False):
+        return None
+
+    def close(self):
+        pass
+
+class StatusEngine(ScraperEngine):
+    """Reports a fixed status for every subreddit, without data."""
+
+    def __init__(self, status):
+        super().__init__()
+        self.status = status
+
+    def collect_subreddits(self, subreddit_names, max_workers=4):
+        return {}, {name: self.status for name in subreddit_names}
+
+def make_collector(tmp_path, monkeypatch, engine, templates):
+    config_path = tmp_path / 'config.json'
+    config_path.write_text(json.dumps({'hashtags': ['LearnGraph'], 'platform_url_templates': templates}))
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    monkeypatch.setattr(collector, 'create_engine', lambda name: engine)
+    instance = Collector(push_url=None, config_path=str(config_path), data_dir=str(data_dir))
+    instance.refresh_feeds()
+    return instance
+
+def poll_all(instance):
+    for feed in instance.feeds.values():
+        feed.next_due = 0
+    return instance.poll_due()
+
+@pytest.fixture
+def bluesky_collector(tmp_path, monkeypatch):
+    engine = ScraperEngine()
+    engine._bluesky_client = FailingBlueskyClient()
+    engine._bluesky_initialized = True
+    instance = make_collector(tmp_path, monkeypatch, engine, {'Bluesky': 'https://bsky.app/search?q=%23{}'})
+    yield instance
+    instance.close()
+
+def test_failing_bluesky_client_counts_as_error(bluesky_collector):
+    poll_all(bluesky_collector)
+    health = bluesky_collector.health['Bluesky']
+    assert health.errors == 1
+    assert health.last_success is None
+    feed = bluesky_collector.feeds[('Bluesky', 'LearnGraph')]
+    assert feed.consecutive_errors == 1
+    # The error backoff, not the empty-result backoff.
+    assert feed.interval == collector.DEFAULT_SETTINGS['Bluesky']['min_interval_seconds']
+
+def test_health_endpoint_returns_503_after_repeated_failures(bluesky_collector):
+    server = start_health_server(bluesky_collector, port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/health"
+    try:
+        with urllib.request.urlopen(url) as response:
+            assert response.status == 200
+        for _ in range(UNHEALTHY_AFTER_ERRORS):
+            poll_all(bluesky_collector)
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url)
+        assert error.value.code == 503
+        status = json.loads(error.value.read())
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert status['status'] == 'degraded'
+    assert status['scrapers']['Bluesky']['errors'] == UNHEALTHY_AFTER_ERRORS
+    assert status['scrapers']['Bluesky']['failing_hashtags'] == ['LearnGraph']
+
+def test_failed_youtube_search_keeps_stored_summary(tmp_path, monkeypatch):
+    monkeypatch.setattr(youtube_scraper, 'yt_dlp', type('yt_dlp', (), {'YoutubeDL': FailingYoutubeDL}))
+    instance = make_collector(tmp_path, monkeypatch, ScraperEngine(), {'YouTube': 'https://www.youtube.com/results?search_query=%23{}'})
+    try:
+        stored = {'hashtag': 'LearnGraph', 'total_views': 100, 'total_likes': 10, 'total_comments': 1, 'top_video_url': 'https://youtu.be/x'}
+        instance.store.upsert_youtube(stored)
+        poll_all(instance)
+        assert instance.health['YouTube'].errors == 1
+        assert instance.feeds[('YouTube', 'LearnGraph')].consecutive_errors == 1
+        assert instance.store.rows('youtube_analytics')[0]['total_views'] == 100
+    finally:
+        instance.close()
+
+@pytest.mark.skipif(reddit_scraper is None, reason="reddit_scraper (praw/prawcore) is not importable")
+def test_unreadable_subreddit_is_recorded_and_dropped(tmp_path, monkeypatch):
+    instance = make_collector(tmp_path, monkeypatch, StatusEngine('Banned'), {'Reddit': 'https://www.reddit.com/r/{}'})
+    try:
+        assert ('Reddit', 'LearnGraph') in instance.feeds
+        poll_all(instance)
+        assert instance.health['Reddit'].errors == 0
+        assert ('Reddit', 'LearnGraph') not in instance.feeds
+        config = json.loads((tmp_path / 'config.json').read_text())
+        assert config['subreddit_status'] == {'LearnGraph': 'Banned'}
+        # The rewritten config skips the subreddit, so the feed does not come back.
+        instance.refresh_feeds()
+        assert ('Reddit', 'LearnGraph') not in instance.feeds
+    finally:
+        instance.close()
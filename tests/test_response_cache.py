@@ -0,0 +1,22 @@
+from response_cache import ResponseCache
+
+def test_empty_results_are_cached_and_failures_are_not(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    calls = []
+
+    def fetch(result):
+        calls.append(result)
+        return result
+
+    try:
+        empty = {'posts': [], 'complete': True}
+        assert cache.fetch('Bluesky', 'LearnGraph', None, lambda: fetch(empty)) == empty
+        assert cache.fetch('Bluesky', 'LearnGraph', None, lambda: fetch('refetched')) == empty
+        assert cache.fetch('YouTube', 'LearnGraph', None, lambda: fetch([])) == []
+        assert cache.fetch('YouTube', 'LearnGraph', None, lambda: fetch('refetched')) == []
+
+        assert cache.fetch('Reddit', 'LearnGraph', None, lambda: fetch(None)) is None
+        assert cache.fetch('Reddit', 'LearnGraph', None, lambda: fetch({'posts': []})) == {'posts': []}
+        assert calls == [empty, [], None, {'posts': []}]
+    finally:
+        cache.close()
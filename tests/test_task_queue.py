@@ -0,0 +1,112 @@
+import sys
+import time
+
+import pytest
+
+import gremlin
+from gremlin import Gremlin, UPDATE_KIND, execute_tasks, queue_hashtag_update, task_command
+from task_queue import TaskQueue
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    # Enqueues would otherwise ring a gremlin listening on the real doorbell port.
+    monkeypatch.setattr('task_queue.ring_doorbell', lambda *args, **kwargs: None)
+    monkeypatch.setattr('gremlin.ring_doorbell', lambda *args, **kwargs: None)
+    queue = TaskQueue(str(tmp_path / 'tasks.db'))
+    yield queue
+    queue.close()
+
+def test_queued_update_for_same_hashtag_is_reused(queue):
+    first = queue_hashtag_update(queue, 'LearnGraph')
+    assert queue_hashtag_update(queue, 'learngraph') == first
+    assert queue_hashtag_update(queue, 'Python') != first
+    assert len(queue.pending()) == 2
+
+def test_running_update_is_not_reused(queue):
+    first = queue_hashtag_update(queue, 'LearnGraph')
+    assert queue.claim('worker-a')['id'] == first
+    assert queue_hashtag_update(queue, 'LearnGraph') != first
+
+def test_update_tasks_are_claimed_as_one_merged_run(queue):
+    for hashtag in ['AI', 'Python', 'ai', 'Rust']:
+        queue.enqueue({'hashtags': [hashtag]}, kind=UPDATE_KIND)
+    command_id = queue.enqueue({'command': [sys.executable, '-c', 'pass']})
+
+    runner = Gremlin(queue)
+    tasks = runner.claim()
+    assert [task['kind'] for task in tasks] == [UPDATE_KIND] * 4
+    assert task_command(tasks)[-4:] == ['--hashtag', 'AI', 'Python', 'Rust']
+
+    # While the update runs, other updates wait and other tasks still run.
+    queue_hashtag_update(queue, 'Go')
+    other = runner.claim()
+    assert [task['id'] for task in other] == [command_id]
+    assert runner.claim() is None
+
+def test_failed_attempt_is_retried_with_backoff(queue):
+    task_id = queue.enqueue({'command': ['false']}, max_attempts=3)
+    task = queue.claim('worker-a')
+    assert queue.nack(task, {'stderr': 'boom'}, retry_delay=0.2)
+
+    pending = queue.task(task_id)
+    assert pending['status'] == 'queued'
+    assert pending['available_at'] - time.time() == pytest.approx(0.2, abs=0.1)
+    assert queue.claim('worker-a') is None
+
+    time.sleep(0.25)
+    task = queue.claim('worker-a')
+    assert task['attempts'] == 2
+    queue.nack(task, {'stderr': 'boom'}, retry_delay=0.2)
+    # The second retry waits twice as long.
+    assert queue.task(task_id)['available_at'] - time.time() == pytest.approx(0.4, abs=0.1)
+
+def test_last_failed_attempt_finishes_the_task(queue):
+    task_id = queue.enqueue({'command': ['false']}, max_attempts=1)
+    task = queue.claim('worker-a')
+    queue.nack(task, {'stderr': 'boom'})
+    assert queue.task(task_id) is None
+    assert [result['status'] for result in queue.results(task_id)] == ['failed']
+
+def test_expired_lease_is_reclaimed_and_stale_ack_is_rejected(queue):
+    task_id = queue.enqueue({'command': ['true']})
+    stale = queue.claim('worker-a', lease_seconds=0.05)
+    assert queue.claim('worker-b') is None
+
+    time.sleep(0.1)
+    task = queue.claim('worker-b')
+    assert task['id'] == task_id
+    assert task['attempts'] == 2
+
+    assert not queue.renew(stale)
+    assert not queue.ack(stale, {'status': 'completed'})
+    assert queue.ack(task, {'status': 'completed'})
+    assert queue.task(task_id) is None
+    assert [result['worker'] for result in queue.results(task_id)] == ['worker-b']
+
+def test_expired_last_attempt_is_recorded_as_lost(queue):
+    task_id = queue.enqueue({'command': ['true']}, max_attempts=1)
+    queue.claim('worker-a', lease_seconds=0.05)
+    time.sleep(0.1)
+    assert queue.claim('worker-b') is None
+    assert [result['status'] for result in queue.results(task_id)] == ['lost']
+
+def test_keep_alive_renews_the_lease(queue):
+    queue.enqueue({'command': ['true']})
+    task = queue.claim('worker-a', lease_seconds=0.3)
+    with queue.keep_alive(task, lease_seconds=0.3):
+        time.sleep(0.5)
+        assert queue.claim('worker-b') is None
+    assert queue.ack(task, {'status': 'completed'})
+
+def test_execute_tasks_acks_success_and_retries_failure(queue):
+    ok_id = queue.enqueue({'command': [sys.executable, '-c', 'print("done")']})
+    execute_tasks(queue, [queue.claim(gremlin.WORKER_ID)])
+    assert queue.task(ok_id) is None
+    result = queue.results(ok_id)[0]
+    assert (result['status'], result['stdout'].strip()) == ('completed', 'done')
+    assert result['metrics']['tasks'] == 1
+
+    failing_id = queue.enqueue({'command': [sys.executable, '-c', 'raise SystemExit(2)']})
+    execute_tasks(queue, [queue.claim(gremlin.WORKER_ID)])
+    assert queue.task(failing_id)['status'] == 'queued'
+    assert queue.results(failing_id)[0]['returncode'] == 2
@@ -0,0 +1,38 @@
+import threading
+import time
+
+import youtube_scraper
+
+class StuckVideoYoutubeDL:
+    """Returns five search hits; extracting the second one hangs until released."""
+
+    def __init__(self, options=None):
+        self.release = threading.Event()
+        self.extracted = []
+
+    def extract_info(self, url, download=False):
+        if url.startswith('ytsearch'):
+            return {'entries': [{'url': f'https://youtu.be/{n}', 'title': f'video {n}', 'view_count': n} for n in range(5)]}
+        self.extracted.append(url)
+        if url.endswith('/1'):
+            self.release.wait(5)
+        return {'webpage_url': url, 'view_count': 100, 'like_count': 10, 'comment_count': 1}
+
+    def close(self):
+        pass
+
+def test_stuck_video_stops_extraction_and_keeps_search_data():
+    ydl = StuckVideoYoutubeDL()
+    started = time.monotonic()
+    try:
+        videos, abandoned = youtube_scraper._search_with(ydl, 'LearnGraph', 5, flat=False, video_timeout=0.2)
+    finally:
+        ydl.release.set()
+    elapsed = time.monotonic() - started
+
+    assert abandoned
+    # One timeout, not one per remaining video.
+    assert elapsed < 0.6
+    assert ydl.extracted == ['https://youtu.be/0', 'https://youtu.be/1']
+    assert [video['view_count'] for video in videos] == [100, 1, 2, 3, 4]
+    assert [video['like_count'] for video in videos] == [10, None, None, None, None]